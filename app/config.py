@@ -33,22 +33,35 @@ class Settings(BaseSettings):
     redisdsn: RedisDsn = Field(default=...)
     redis_prefix: str = "fgoapi"
     clear_redis_cache: bool = True
+    cache_single_flight_timeout: float = 30.0
+    cache_warm_up_size: int = 500
+    cache_warm_up_concurrency: int = 2
     rayshift_api_key: SecretStr = SecretStr("")
     rayshift_api_url: str = "https://rayshift.io/api/v1/"
     quest_cache_length: int = 3600
     db_pool_size: int = 3
     db_max_overflow: int = 10
     write_postgres_data: bool = True
+    db_incremental_load: bool = True
+    db_load_workers: int = 2
     write_redis_data: bool = True
     asset_url: str = "https://assets.atlasacademy.io/GameData"
     openapi_url: Optional[HttpUrl] = None
     export_all_nice: bool = False
+    export_workers: int = 2
+    export_db_connections: int = 4
+    export_incremental: bool = True
     documentation_all_nice: bool = False
     github_webhook_secret: SecretStr = SecretStr("")
     github_webhook_git_pull: bool = False
     webhooks: list[str] = []
     error_webhooks: list[HttpUrl] = []
     quest_heavy_cache_threshold: int = 1000
+    redis_lru_cache_size: int = 20000
+    redis_lru_version_check_interval: float = 1.0
+    redis_zstd_dict_size: int = 0
+    redis_compress_workers: int = 2
+    datavals_cache_size: int = 100000
 
     @field_validator("asset_url", "rayshift_api_url")
     @classmethod
@@ -1,7 +1,7 @@
 import asyncio
 from collections import defaultdict
-from dataclasses import dataclass
-from typing import Any, Callable, Generator, Iterable, Optional, Sequence
+from dataclasses import dataclass, field
+from typing import Any, Callable, Generator, Iterable, Mapping, Optional, Sequence
 
 from fastapi import HTTPException
 from loguru import logger
@@ -11,7 +11,17 @@ from ..config import Settings
 from ..db.helpers import fetch, quest
 from ..redis import Redis
 from ..redis.helpers import pydantic_object
-from ..redis.helpers.reverse import RedisReverse, get_reverse_ids
+from ..redis.helpers.reverse import (
+    BUFF_REVERSE_TYPES,
+    FUNC_REVERSE_TYPES,
+    SKILL_REVERSE_TYPES,
+    TD_REVERSE_TYPES,
+    RedisReverse,
+    ReverseIds,
+    get_reverse_id_tree,
+    get_reverse_values,
+    lookup_reverse_ids,
+)
 from ..schemas.basic import (
     BasicBuffReverse,
     BasicCommandCode,
@@ -94,6 +104,7 @@ from .utils import (
     get_traits_list,
     get_traits_list_list,
     get_translation,
+    get_values_by_keys,
 )
 
 settings = Settings()
@@ -268,18 +279,13 @@ async def get_basic_buff_from_raw(
 ) -> BasicBuffReverse:
     basic_buff = get_basic_buff_no_reverse(mstBuff, region, lang)
     if reverse and reverseDepth >= ReverseDepth.function:
-        func_ids = await get_reverse_ids(
-            redis, region, RedisReverse.BUFF_TO_FUNC, mstBuff.id
+        reverse_ids = await get_reverse_id_tree(
+            redis, region, BUFF_REVERSE_TYPES, mstBuff.id, reverseDepth
         )
-        buff_reverse = BasicReversedBuff(
-            function=[
-                await get_basic_function(
-                    redis, region, func_id, lang, reverse, reverseDepth
-                )
-                for func_id in func_ids
-            ]
+        entities = await get_basic_reverse_entities(redis, region, reverse_ids, lang)
+        basic_buff.reverse = BasicReversedBuffType(
+            basic=get_basic_buff_reverse(entities, reverse_ids, mstBuff.id)
         )
-        basic_buff.reverse = BasicReversedBuffType(basic=buff_reverse)
     return basic_buff
 
 
@@ -299,13 +305,8 @@ async def get_basic_buff(
     )
 
 
-async def get_basic_function_from_raw(
-    redis: Redis,
-    region: Region,
-    mstFunc: MstFunc,
-    lang: Language,
-    reverse: bool = False,
-    reverseDepth: ReverseDepth = ReverseDepth.skillNp,
+def get_basic_function_no_reverse(
+    region: Region, mstFunc: MstFunc, lang: Language, mstBuffs: Mapping[int, MstBuff]
 ) -> BasicFunctionReverse:
     traitVals = []
     buffs: list[BasicBuffReverse] = []
@@ -313,13 +314,10 @@ async def get_basic_function_from_raw(
         traitVals = get_traits_list(mstFunc.vals)
     else:
         for buff_id in mstFunc.vals:
-            mstBuff = await pydantic_object.fetch_id(redis, region, MstBuff, buff_id)
-            if mstBuff:
-                buffs.append(
-                    await get_basic_buff_from_raw(redis, region, mstBuff, lang)
-                )
+            if buff_id in mstBuffs:
+                buffs.append(get_basic_buff_no_reverse(mstBuffs[buff_id], region, lang))
 
-    basic_func = BasicFunctionReverse(
+    return BasicFunctionReverse(
         funcId=mstFunc.id,
         funcType=FUNC_TYPE_NAME[mstFunc.funcType],
         funcTargetTeam=FUNC_APPLYTARGET_NAME[mstFunc.applyTarget],
@@ -332,26 +330,37 @@ async def get_basic_function_from_raw(
         buffs=buffs,
     )
 
+
+def get_func_buff_ids(mstFuncs: Iterable[MstFunc]) -> set[int]:
+    return {
+        buff_id
+        for mstFunc in mstFuncs
+        if mstFunc.funcType not in FUNC_VALS_NOT_BUFF
+        for buff_id in mstFunc.vals
+    }
+
+
+async def get_basic_function_from_raw(
+    redis: Redis,
+    region: Region,
+    mstFunc: MstFunc,
+    lang: Language,
+    reverse: bool = False,
+    reverseDepth: ReverseDepth = ReverseDepth.skillNp,
+) -> BasicFunctionReverse:
+    mstBuffs = await pydantic_object.fetch_id_many(
+        redis, region, MstBuff, get_func_buff_ids([mstFunc])
+    )
+    basic_func = get_basic_function_no_reverse(region, mstFunc, lang, mstBuffs)
+
     if reverse and reverseDepth >= ReverseDepth.skillNp:
-        skill_ids = await get_reverse_ids(
-            redis, region, RedisReverse.FUNC_TO_SKILL, mstFunc.id
+        reverse_ids = await get_reverse_id_tree(
+            redis, region, FUNC_REVERSE_TYPES, mstFunc.id, reverseDepth
         )
-        td_ids = await get_reverse_ids(
-            redis, region, RedisReverse.FUNC_TO_TD, mstFunc.id
+        entities = await get_basic_reverse_entities(redis, region, reverse_ids, lang)
+        basic_func.reverse = BasicReversedFunctionType(
+            basic=get_basic_func_reverse(entities, reverse_ids, mstFunc.id)
         )
-        func_reverse = BasicReversedFunction(
-            skill=[
-                await get_basic_skill(
-                    redis, region, skill_id, lang, reverse, reverseDepth
-                )
-                for skill_id in skill_ids
-            ],
-            NP=[
-                await get_basic_td(redis, region, td_id, lang, reverse, reverseDepth)
-                for td_id in td_ids
-            ],
-        )
-        basic_func.reverse = BasicReversedFunctionType(basic=func_reverse)
 
     return basic_func
 
@@ -372,6 +381,22 @@ async def get_basic_function(
     )
 
 
+def get_basic_skill_no_reverse(
+    region: Region, mstSkill: MstSkill, lang: Language
+) -> BasicSkillReverse:
+    return BasicSkillReverse(
+        id=mstSkill.id,
+        name=get_translation(lang, mstSkill.name),
+        ruby=mstSkill.ruby,
+        icon=fmt_url(
+            AssetURL.skillIcon,
+            base_url=settings.asset_url,
+            region=region,
+            item_id=mstSkill.iconId,
+        ),
+    )
+
+
 async def get_basic_skill(
     redis: Redis,
     region: Region,
@@ -385,48 +410,29 @@ async def get_basic_skill(
         mstSkill = await pydantic_object.fetch_id(redis, region, MstSkill, skill_id)
     if not mstSkill:
         raise HTTPException(status_code=404, detail=f"Skill not found: {skill_id}")
-    basic_skill = BasicSkillReverse(
-        id=mstSkill.id,
-        name=get_translation(lang, mstSkill.name),
-        ruby=mstSkill.ruby,
-        icon=fmt_url(
-            AssetURL.skillIcon,
-            base_url=settings.asset_url,
-            region=region,
-            item_id=mstSkill.iconId,
-        ),
-    )
+    basic_skill = get_basic_skill_no_reverse(region, mstSkill, lang)
 
     if reverse and reverseDepth >= ReverseDepth.servant:
-        activeSkills = set(
-            await get_reverse_ids(
-                redis, region, RedisReverse.ACTIVE_SKILL_TO_SVT, skill_id
-            )
-        )
-        passiveSkills = set(
-            await get_reverse_ids(
-                redis, region, RedisReverse.PASSIVE_SKILL_TO_SVT, skill_id
-            )
+        reverse_ids = await get_reverse_id_tree(
+            redis, region, SKILL_REVERSE_TYPES, skill_id, reverseDepth
         )
-        mc_ids = await get_reverse_ids(
-            redis, region, RedisReverse.SKILL_TO_MC, skill_id
-        )
-        cc_ids = await get_reverse_ids(
-            redis, region, RedisReverse.SKILL_TO_CC, skill_id
-        )
-
-        skill_reverse = BasicReversedSkillTd(
-            servant=[
-                await get_basic_servant(redis, region, svt_id, lang=lang)
-                for svt_id in sorted(activeSkills | passiveSkills)
-            ],
-            MC=[await get_basic_mc(redis, region, mc_id, lang) for mc_id in mc_ids],
-            CC=[await get_basic_cc(redis, region, cc_id, lang) for cc_id in cc_ids],
+        entities = await get_basic_reverse_entities(redis, region, reverse_ids, lang)
+        basic_skill.reverse = BasicReversedSkillTdType(
+            basic=get_basic_skill_reverse(entities, reverse_ids, skill_id)
         )
-        basic_skill.reverse = BasicReversedSkillTdType(basic=skill_reverse)
     return basic_skill
 
 
+def get_basic_td_no_reverse(
+    mstTreasureDevice: MstTreasureDevice, lang: Language
+) -> BasicTdReverse:
+    return BasicTdReverse(
+        id=mstTreasureDevice.id,
+        name=get_np_name(mstTreasureDevice.name, mstTreasureDevice.ruby, lang),
+        ruby=mstTreasureDevice.ruby,
+    )
+
+
 async def get_basic_td(
     redis: Redis,
     region: Region,
@@ -442,24 +448,188 @@ async def get_basic_td(
         )
     if not mstTreasureDevice:
         raise HTTPException(status_code=404, detail="NP not found")
-    basic_td = BasicTdReverse(
-        id=mstTreasureDevice.id,
-        name=get_np_name(mstTreasureDevice.name, mstTreasureDevice.ruby, lang),
-        ruby=mstTreasureDevice.ruby,
-    )
+    basic_td = get_basic_td_no_reverse(mstTreasureDevice, lang)
 
     if reverse and reverseDepth >= ReverseDepth.servant:
-        svt_ids = await get_reverse_ids(redis, region, RedisReverse.TD_TO_SVT, td_id)
-        td_reverse = BasicReversedSkillTd(
-            servant=[
-                await get_basic_servant(redis, region, svt_id, lang=lang)
-                for svt_id in svt_ids
-            ]
+        reverse_ids = await get_reverse_id_tree(
+            redis, region, TD_REVERSE_TYPES, td_id, reverseDepth
+        )
+        entities = await get_basic_reverse_entities(redis, region, reverse_ids, lang)
+        basic_td.reverse = BasicReversedSkillTdType(
+            basic=get_basic_td_reverse(entities, reverse_ids, td_id)
         )
-        basic_td.reverse = BasicReversedSkillTdType(basic=td_reverse)
     return basic_td
 
 
+@dataclass
+class BasicReverseEntities:
+    """Basic entities of a reverse ID tree, each loaded only once"""
+
+    servants: dict[int, BasicServant] = field(default_factory=dict)
+    mcs: dict[int, BasicMysticCode] = field(default_factory=dict)
+    ccs: dict[int, BasicCommandCode] = field(default_factory=dict)
+    skills: dict[int, BasicSkillReverse] = field(default_factory=dict)
+    tds: dict[int, BasicTdReverse] = field(default_factory=dict)
+    functions: dict[int, BasicFunctionReverse] = field(default_factory=dict)
+
+
+def get_basic_skill_reverse(
+    entities: BasicReverseEntities, reverse_ids: ReverseIds, skill_id: int
+) -> BasicReversedSkillTd:
+    svt_ids = set(
+        lookup_reverse_ids(reverse_ids, RedisReverse.ACTIVE_SKILL_TO_SVT, skill_id)
+    ) | set(
+        lookup_reverse_ids(reverse_ids, RedisReverse.PASSIVE_SKILL_TO_SVT, skill_id)
+    )
+    return BasicReversedSkillTd(
+        servant=get_values_by_keys(entities.servants, sorted(svt_ids)),
+        MC=get_values_by_keys(
+            entities.mcs,
+            lookup_reverse_ids(reverse_ids, RedisReverse.SKILL_TO_MC, skill_id),
+        ),
+        CC=get_values_by_keys(
+            entities.ccs,
+            lookup_reverse_ids(reverse_ids, RedisReverse.SKILL_TO_CC, skill_id),
+        ),
+    )
+
+
+def get_basic_td_reverse(
+    entities: BasicReverseEntities, reverse_ids: ReverseIds, td_id: int
+) -> BasicReversedSkillTd:
+    return BasicReversedSkillTd(
+        servant=get_values_by_keys(
+            entities.servants,
+            lookup_reverse_ids(reverse_ids, RedisReverse.TD_TO_SVT, td_id),
+        )
+    )
+
+
+def get_basic_func_reverse(
+    entities: BasicReverseEntities, reverse_ids: ReverseIds, func_id: int
+) -> BasicReversedFunction:
+    return BasicReversedFunction(
+        skill=get_values_by_keys(
+            entities.skills,
+            lookup_reverse_ids(reverse_ids, RedisReverse.FUNC_TO_SKILL, func_id),
+        ),
+        NP=get_values_by_keys(
+            entities.tds,
+            lookup_reverse_ids(reverse_ids, RedisReverse.FUNC_TO_TD, func_id),
+        ),
+    )
+
+
+def get_basic_buff_reverse(
+    entities: BasicReverseEntities, reverse_ids: ReverseIds, buff_id: int
+) -> BasicReversedBuff:
+    return BasicReversedBuff(
+        function=get_values_by_keys(
+            entities.functions,
+            lookup_reverse_ids(reverse_ids, RedisReverse.BUFF_TO_FUNC, buff_id),
+        )
+    )
+
+
+async def get_basic_reverse_entities(
+    redis: Redis, region: Region, reverse_ids: ReverseIds, lang: Language
+) -> BasicReverseEntities:
+    """Load the basic entities of a reverse ID tree and link them bottom-up.
+
+    Each level is fetched with one HMGET per Redis table and an entity shared by
+    several nodes of the tree is only built once.
+    """
+    entities = BasicReverseEntities()
+
+    svtExtras = await pydantic_object.fetch_id_many(
+        redis,
+        region,
+        MstSvtExtra,
+        get_reverse_values(
+            reverse_ids,
+            RedisReverse.ACTIVE_SKILL_TO_SVT,
+            RedisReverse.PASSIVE_SKILL_TO_SVT,
+            RedisReverse.TD_TO_SVT,
+        ),
+    )
+    for svt_id, svtExtra in svtExtras.items():
+        entities.servants[svt_id] = await get_basic_servant(
+            redis, region, svt_id, lang=lang, svtExtra=svtExtra
+        )
+
+    mstEquips = await pydantic_object.fetch_id_many(
+        redis,
+        region,
+        MstEquip,
+        get_reverse_values(reverse_ids, RedisReverse.SKILL_TO_MC),
+    )
+    entities.mcs = {
+        mc_id: get_basic_mc_from_raw(region, mstEquip, lang)
+        for mc_id, mstEquip in mstEquips.items()
+    }
+
+    mstCommandCodes = await pydantic_object.fetch_id_many(
+        redis,
+        region,
+        MstCommandCode,
+        get_reverse_values(reverse_ids, RedisReverse.SKILL_TO_CC),
+    )
+    entities.ccs = {
+        cc_id: get_basic_cc_from_raw(region, mstCommandCode, lang)
+        for cc_id, mstCommandCode in mstCommandCodes.items()
+    }
+
+    mstSkills = await pydantic_object.fetch_id_many(
+        redis,
+        region,
+        MstSkill,
+        get_reverse_values(reverse_ids, RedisReverse.FUNC_TO_SKILL),
+    )
+    skill_svt_reverse = reverse_ids.get(RedisReverse.ACTIVE_SKILL_TO_SVT, {})
+    for skill_id, mstSkill in mstSkills.items():
+        basic_skill = get_basic_skill_no_reverse(region, mstSkill, lang)
+        if skill_id in skill_svt_reverse:
+            basic_skill.reverse = BasicReversedSkillTdType(
+                basic=get_basic_skill_reverse(entities, reverse_ids, skill_id)
+            )
+        entities.skills[skill_id] = basic_skill
+
+    mstTreasureDevices = await pydantic_object.fetch_id_many(
+        redis,
+        region,
+        MstTreasureDevice,
+        get_reverse_values(reverse_ids, RedisReverse.FUNC_TO_TD),
+    )
+    td_svt_reverse = reverse_ids.get(RedisReverse.TD_TO_SVT, {})
+    for td_id, mstTreasureDevice in mstTreasureDevices.items():
+        basic_td = get_basic_td_no_reverse(mstTreasureDevice, lang)
+        if td_id in td_svt_reverse:
+            basic_td.reverse = BasicReversedSkillTdType(
+                basic=get_basic_td_reverse(entities, reverse_ids, td_id)
+            )
+        entities.tds[td_id] = basic_td
+
+    mstFuncs = await pydantic_object.fetch_id_many(
+        redis,
+        region,
+        MstFunc,
+        get_reverse_values(reverse_ids, RedisReverse.BUFF_TO_FUNC),
+    )
+    mstBuffs = await pydantic_object.fetch_id_many(
+        redis, region, MstBuff, get_func_buff_ids(mstFuncs.values())
+    )
+    func_skill_reverse = reverse_ids.get(RedisReverse.FUNC_TO_SKILL, {})
+    for func_id, mstFunc in mstFuncs.items():
+        basic_func = get_basic_function_no_reverse(region, mstFunc, lang, mstBuffs)
+        if func_id in func_skill_reverse:
+            basic_func.reverse = BasicReversedFunctionType(
+                basic=get_basic_func_reverse(entities, reverse_ids, func_id)
+            )
+        entities.functions[func_id] = basic_func
+
+    return entities
+
+
 def select_mstSvtLimit(
     limits: list[MstSvtLimit],
     svt_limit: Optional[int] = None,
@@ -490,8 +660,10 @@ async def get_basic_svt(
     image_svt_id: int | None = None,
     lang: Optional[Language] = None,
     mstSvt: Optional[MstSvt] = None,
+    svtExtra: Optional[MstSvtExtra] = None,
 ) -> dict[str, Any]:
-    svtExtra = await pydantic_object.fetch_id(redis, region, MstSvtExtra, svt_id)
+    if not svtExtra:
+        svtExtra = await pydantic_object.fetch_id(redis, region, MstSvtExtra, svt_id)
 
     if not svtExtra:  # pragma: no cover
         raise HTTPException(
@@ -618,10 +790,19 @@ async def get_basic_servant(
     image_svt_id: int | None = None,
     lang: Optional[Language] = None,
     mstSvt: Optional[MstSvt] = None,
+    svtExtra: Optional[MstSvtExtra] = None,
 ) -> BasicServant:
     return BasicServant.parse_obj(
         await get_basic_svt(
-            redis, region, item_id, svt_limit, disp_limit, image_svt_id, lang, mstSvt
+            redis,
+            region,
+            item_id,
+            svt_limit,
+            disp_limit,
+            image_svt_id,
+            lang,
+            mstSvt,
+            svtExtra,
         )
     )
 
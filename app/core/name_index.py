@@ -0,0 +1,310 @@
+import asyncio
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from enum import StrEnum
+from itertools import combinations, compress
+from typing import Any, Callable, Iterable, NamedTuple, Optional
+
+from fuzzywuzzy import utils
+from Levenshtein import ratio
+from sqlalchemy import Table
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from ..db.helpers.utils import get_table_columns, get_table_oid
+from ..models.raw import mstBuff, mstItem, mstSkill, mstSvt, mstTreasureDevice
+from ..schemas.common import Language, Region
+from .utils import get_np_name, get_translation
+
+accent_from = "àáâäèéëíðñóöùúāēīŋōšαβḗḫ"
+accent_to__ = "aaaaeeeidnoouuaeinosabeh"
+translation_table = {ord(k): v for k, v in zip(accent_from, accent_to__, strict=True)}
+
+
+SPECIAL_REPLACE = {"artoria": "altria"}
+
+
+NAME_MATCH_THRESHOLD = 0.8
+
+
+class SearchName(NamedTuple):
+    text: str
+    tokens: frozenset[str]
+    sorted_tokens: str
+
+
+def process_name(name: str) -> Optional[SearchName]:
+    """Normalize the name for matching. Return None if nothing is left to match."""
+    text = utils.full_process(name).translate(translation_table)
+
+    for k, v in SPECIAL_REPLACE.items():
+        text = text.replace(k, v)
+
+    if not utils.validate_string(text):
+        return None
+
+    tokens = frozenset(text.split())
+    return SearchName(text, tokens, " ".join(sorted(tokens)))
+
+
+def match_search_name(search_param: SearchName, name: SearchName) -> bool:
+    """Modified from fuzzywuzzy.token_set_ratio"""
+    p1 = search_param.text
+    p2 = name.text
+
+    # Doesn't seem to be needed now but might be useful in the future
+    # ALTERNATIVE_DIVIDER = ["-", "="]
+    # for divider in ALTERNATIVE_DIVIDER:
+    #     p1 = p1.replace(divider, " ")
+    #     p2 = p2.replace(divider, " ")
+
+    if p1 in p2:
+        return True
+
+    # pull tokens
+    tokens1 = search_param.tokens
+    tokens2 = name.tokens
+
+    intersection = tokens1.intersection(tokens2)
+    diff1to2 = tokens1.difference(tokens2)
+    diff2to1 = tokens2.difference(tokens1)
+
+    sorted_sect = " ".join(sorted(intersection))
+    sorted_1to2 = " ".join(sorted(diff1to2))
+    sorted_2to1 = " ".join(sorted(diff2to1))
+
+    combined_1to2 = sorted_sect + " " + sorted_1to2
+    combined_2to1 = sorted_sect + " " + sorted_2to1
+
+    # strip
+    sorted_sect = sorted_sect.strip()
+    combined_1to2 = combined_1to2.strip()
+    combined_2to1 = combined_2to1.strip()
+
+    # Use sorted_sect first so "Okita Souji (Alter)" works as expected
+    # This way "a b c" search_param will match to "a b c d e" but not vice versa
+    if sorted_sect:
+        return float(ratio(sorted_sect, combined_1to2)) > NAME_MATCH_THRESHOLD
+    else:
+        return float(ratio(combined_2to1, combined_1to2)) > NAME_MATCH_THRESHOLD
+
+
+def get_trigrams(text: str) -> set[str]:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+# Above this many tokens in a search, all names sharing a token with the search
+# are checked instead of working out which token subsets can match
+MAX_TOKEN_SUBSET_SIZE = 8
+
+
+class NameIndex:
+    """Inverted index of the processed names of a table.
+
+    A name matches a search in match_search_name if:
+    - it contains the search string: the name has all trigrams of the search.
+    - they share tokens and the shared tokens cover enough of the search: this
+      only depends on which search tokens are shared so the token subsets that
+      pass are worked out first and only names with all tokens of such a subset
+      are candidates.
+    - they don't share tokens and the ratio of their sorted tokens is above the
+      threshold: only computed for names of a close enough length.
+    The candidates are then checked with match_search_name so the results are
+    the same as matching every name.
+    """
+
+    def __init__(self, items: Iterable[tuple[int, Iterable[str]]]) -> None:
+        self.names: dict[str, SearchName] = {}
+        self.name_ids: dict[str, set[int]] = defaultdict(set)
+        self.token_names: dict[str, set[str]] = defaultdict(set)
+        self.trigram_names: dict[str, set[str]] = defaultdict(set)
+
+        for item_id, item_names in items:
+            for item_name in item_names:
+                if not item_name:
+                    continue
+                search_name = process_name(item_name)
+                if search_name is None:
+                    continue
+
+                self.name_ids[search_name.text].add(item_id)
+                if search_name.text in self.names:
+                    continue
+
+                self.names[search_name.text] = search_name
+                for token in search_name.tokens:
+                    self.token_names[token].add(search_name.text)
+                for trigram in get_trigrams(search_name.text):
+                    self.trigram_names[trigram].add(search_name.text)
+
+        sorted_names = sorted(
+            self.names.values(), key=lambda name: len(name.sorted_tokens)
+        )
+        self.sorted_lengths = [len(name.sorted_tokens) for name in sorted_names]
+        self.sorted_tokens = [name.sorted_tokens for name in sorted_names]
+        self.sorted_texts = [name.text for name in sorted_names]
+
+    def get_names_with_all(
+        self, postings: dict[str, set[str]], keys: Iterable[str]
+    ) -> set[str]:
+        key_names = sorted((postings.get(key, set()) for key in keys), key=len)
+        return key_names[0].intersection(*key_names[1:])
+
+    def get_substring_candidates(self, search_param: SearchName) -> set[str]:
+        trigrams = get_trigrams(search_param.text)
+        if not trigrams:
+            return {text for text in self.names if search_param.text in text}
+        return self.get_names_with_all(self.trigram_names, trigrams)
+
+    def get_token_candidates(self, search_param: SearchName) -> set[str]:
+        tokens = sorted(search_param.tokens)
+        if len(tokens) > MAX_TOKEN_SUBSET_SIZE:
+            return set().union(
+                *(self.token_names.get(token, set()) for token in tokens)
+            )
+
+        candidates: set[str] = set()
+        matching_subsets: list[set[str]] = []
+        for subset_size in range(1, len(tokens) + 1):
+            for subset in combinations(tokens, subset_size):
+                # Names with all tokens of a superset are already candidates
+                if any(matching <= set(subset) for matching in matching_subsets):
+                    continue
+
+                sorted_sect = " ".join(subset)
+                not_shared = " ".join(token for token in tokens if token not in subset)
+                combined_1to2 = (sorted_sect + " " + not_shared).strip()
+                if float(ratio(sorted_sect, combined_1to2)) > NAME_MATCH_THRESHOLD:
+                    matching_subsets.append(set(subset))
+                    candidates |= self.get_names_with_all(self.token_names, subset)
+
+        return candidates
+
+    def get_ratio_candidates(self, search_param: SearchName) -> list[str]:
+        # ratio(a, b) <= 2 * min(len) / (len(a) + len(b)) so names outside of
+        # 2/3 to 3/2 of the search length can't be above the threshold
+        search_tokens = search_param.sorted_tokens
+        start = bisect_left(self.sorted_lengths, len(search_tokens) * 2 // 3)
+        end = bisect_right(self.sorted_lengths, len(search_tokens) * 3 // 2 + 1)
+        return list(
+            compress(
+                self.sorted_texts[start:end],
+                [
+                    ratio(sorted_tokens, search_tokens) > NAME_MATCH_THRESHOLD
+                    for sorted_tokens in self.sorted_tokens[start:end]
+                ],
+            )
+        )
+
+    def get_candidates(self, search_param: SearchName) -> set[str]:
+        candidates = self.get_substring_candidates(search_param)
+        candidates |= self.get_token_candidates(search_param)
+        candidates.update(self.get_ratio_candidates(search_param))
+        return candidates
+
+    def search(self, search_name: str) -> set[int]:
+        search_param = process_name(search_name)
+        if search_param is None:
+            return set()
+
+        return {
+            item_id
+            for name_text in self.get_candidates(search_param)
+            if match_search_name(search_param, self.names[name_text])
+            for item_id in self.name_ids[name_text]
+        }
+
+
+class NameIndexType(StrEnum):
+    SVT = "svt"
+    SKILL = "skill"
+    TD = "td"
+    BUFF = "buff"
+    ITEM = "item"
+
+
+class NameIndexSource(NamedTuple):
+    table: Table
+    columns: tuple[str, ...]
+    get_names: Callable[[Any], list[str]]
+
+
+NAME_INDEX_SOURCES = {
+    NameIndexType.SVT: NameIndexSource(
+        mstSvt,
+        ("id", "name", "ruby"),
+        lambda svt: [svt.name, svt.ruby, get_translation(Language.en, svt.name)],
+    ),
+    NameIndexType.SKILL: NameIndexSource(
+        mstSkill,
+        ("id", "name", "ruby"),
+        lambda skill: [
+            skill.name,
+            skill.ruby,
+            get_translation(Language.en, skill.name),
+        ],
+    ),
+    NameIndexType.TD: NameIndexSource(
+        mstTreasureDevice,
+        ("id", "name", "ruby"),
+        lambda td: [td.name, td.ruby, get_np_name(td.name, td.ruby, Language.en)],
+    ),
+    NameIndexType.BUFF: NameIndexSource(
+        mstBuff,
+        ("id", "name", "detail"),
+        lambda buff: [buff.name, buff.detail, get_translation(Language.en, buff.name)],
+    ),
+    NameIndexType.ITEM: NameIndexSource(
+        mstItem,
+        ("id", "name"),
+        lambda item: [item.name, get_translation(Language.en, item.name)],
+    ),
+}
+
+
+class NameIndexes:
+    """Per-worker name indexes of each region.
+
+    db/load replaces a table with a new one when it's reloaded so an index is
+    rebuilt when the OID of its table changes.
+    """
+
+    def __init__(self) -> None:
+        self.indexes: dict[tuple[Region, NameIndexType], tuple[int, NameIndex]] = {}
+        self.locks: dict[tuple[Region, NameIndexType], asyncio.Lock] = defaultdict(
+            asyncio.Lock
+        )
+
+    async def get(
+        self, conn: AsyncConnection, region: Region, index_type: NameIndexType
+    ) -> NameIndex:
+        source = NAME_INDEX_SOURCES[index_type]
+        table_oid = await get_table_oid(conn, source.table)
+
+        async with self.locks[(region, index_type)]:
+            cached = self.indexes.get((region, index_type))
+            if cached is not None and cached[0] == table_oid:
+                return cached[1]
+
+            rows = await get_table_columns(conn, source.table, source.columns)
+            items = [(row.id, source.get_names(row)) for row in rows]
+            # Building takes a while for the big tables, don't block the event loop
+            name_index = await asyncio.to_thread(NameIndex, items)
+            self.indexes[(region, index_type)] = (table_oid, name_index)
+            return name_index
+
+    async def search(
+        self,
+        conn: AsyncConnection,
+        region: Region,
+        index_type: NameIndexType,
+        search_name: str,
+    ) -> set[int]:
+        name_index = await self.get(conn, region, index_type)
+        return name_index.search(search_name)
+
+    async def build_all(self, conn: AsyncConnection, region: Region) -> None:
+        for index_type in NameIndexType:
+            await self.get(conn, region, index_type)
+
+
+name_indexes = NameIndexes()
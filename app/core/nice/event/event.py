@@ -1,4 +1,5 @@
 from collections import defaultdict
+from typing import Optional
 
 from sqlalchemy.ext.asyncio import AsyncConnection
 
@@ -23,7 +24,7 @@ from ....schemas.nice import (
     NiceVoiceCond,
     NiceVoiceGroup,
 )
-from ....schemas.raw import MstEventAdd, MstEventDetail
+from ....schemas.raw import EventEntity, MstEventAdd, MstEventDetail
 from ... import raw
 from ...utils import fmt_url, get_flags, get_translation
 from ..bgm import get_nice_bgm_entity_from_raw
@@ -115,9 +116,14 @@ def get_nice_event_detail(detail: MstEventDetail) -> NiceEventDetail:
 
 
 async def get_nice_event(
-    conn: AsyncConnection, region: Region, event_id: int, lang: Language
+    conn: AsyncConnection,
+    region: Region,
+    event_id: int,
+    lang: Language,
+    raw_event: Optional[EventEntity] = None,
 ) -> NiceEvent:
-    raw_event = await raw.get_event_entity(conn, event_id)
+    if raw_event is None:
+        raw_event = await raw.get_event_entity(conn, event_id)
 
     nice_skills = [
         await get_nice_skill_from_raw(conn, region, skill, NiceSkill, lang)
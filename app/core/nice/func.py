@@ -1,4 +1,5 @@
 import re
+from functools import lru_cache
 from typing import Any, Optional
 
 from fastapi import HTTPException
@@ -126,9 +127,18 @@ DataValType = dict[
 ]
 
 
-async def parse_dataVals(
-    conn: AsyncConnection, region: Region, datavals: str, functype: int, lang: Language
-) -> DataValType:
+DATAVALS_SPLIT_REGEX = re.compile(r",\s*(?![^\[\]]*])")
+DATAVAL_KEY_SPLIT_REGEX = re.compile(r":\s*(?![^\[\]]*])")
+
+
+@lru_cache(maxsize=settings.datavals_cache_size)
+def parse_raw_dataVals(datavals: str, functype: int) -> DataValType:
+    """Parse the datavals string of a function type.
+
+    The result only depends on the arguments so it's cached in each worker and
+    must not be modified. DependFuncVals is left as the raw string since it
+    needs the depend function from the DB, see parse_dataVals.
+    """
     error_message = f"Can't parse datavals: {datavals}"
     exception = HTTPException(status_code=500, detail=error_message)
     INITIAL_VALUE = -98765
@@ -148,7 +158,7 @@ async def parse_dataVals(
     output: DataValType = {}
     if datavals != "[]":
         datavals = remove_brackets(datavals)
-        array = re.split(r",\s*(?![^\[\]]*])", datavals)
+        array = DATAVALS_SPLIT_REGEX.split(datavals)
         for i, arrayi in enumerate(array):
             if arrayi == "":
                 continue
@@ -260,7 +270,7 @@ async def parse_dataVals(
                     elif i == 2:
                         text = "Target"
             except ValueError:
-                array2 = re.split(r":\s*(?![^\[\]]*])", arrayi)
+                array2 = DATAVAL_KEY_SPLIT_REGEX.split(arrayi)
                 if len(array2) > 1:
                     if array2[0] == "DependFuncId1":
                         output["DependFuncId"] = int(remove_brackets(array2[1]))
@@ -274,21 +284,7 @@ async def parse_dataVals(
                             )
                             raise exception from None
 
-                        depend_func_entity = await get_func_entity_no_reverse(
-                            conn,
-                            int(output["DependFuncId"]),  # type: ignore[arg-type]
-                        )
-
-                        output["DependFunc"] = await get_nice_function(
-                            conn, region, depend_func_entity, lang
-                        )
-                        output["DependFuncVals"] = await parse_dataVals(
-                            conn,
-                            region,
-                            array2[1],
-                            depend_func_entity.mstFunc.funcType,
-                            lang,
-                        )
+                        output["DependFuncVals"] = array2[1]
                     elif array2[0] in LIST_DATAVALS:
                         try:
                             output[array2[0]] = [
@@ -403,7 +399,59 @@ async def parse_dataVals(
         elif output[prefix_0] == 2:
             output["RateCount"] = output[prefix_1]
 
-    await logger.complete()
+    return output
+
+
+async def parse_dataVals(
+    conn: AsyncConnection,
+    region: Region,
+    datavals: str,
+    functype: int,
+    lang: Language,
+    depend_funcs: Optional[dict[int, tuple[int, dict[str, Any]]]] = None,
+) -> DataValType:
+    """Parse the datavals string and resolve the depend function if there's one.
+
+    `depend_funcs` maps depend function IDs to their type and nice function so
+    they are only fetched once when parsing the svals of all levels.
+    """
+    misses = parse_raw_dataVals.cache_info().misses
+    parsed = parse_raw_dataVals(datavals, functype)
+    if parse_raw_dataVals.cache_info().misses != misses:
+        # Only a new parse can log something
+        await logger.complete()
+
+    if "DependFuncVals" not in parsed:
+        return dict(parsed)
+
+    if depend_funcs is None:
+        depend_funcs = {}
+
+    output: DataValType = {}
+    for key, value in parsed.items():
+        if key == "DependFuncVals":
+            depend_func_id = int(parsed["DependFuncId"])  # type: ignore[arg-type]
+            if depend_func_id not in depend_funcs:
+                depend_func_entity = await get_func_entity_no_reverse(
+                    conn, depend_func_id
+                )
+                depend_funcs[depend_func_id] = (
+                    depend_func_entity.mstFunc.funcType,
+                    await get_nice_function(conn, region, depend_func_entity, lang),
+                )
+            depend_func_type, depend_func = depend_funcs[depend_func_id]
+
+            output["DependFunc"] = depend_func
+            output["DependFuncVals"] = await parse_dataVals(
+                conn,
+                region,
+                value,  # type: ignore[arg-type]
+                depend_func_type,
+                lang,
+                depend_funcs,
+            )
+        else:
+            output[key] = value
 
     return output
 
@@ -494,6 +542,7 @@ async def get_nice_function(
             base_url=settings.asset_url, region=region, item_id=funcPopupIconId
         )
 
+    depend_funcs: dict[int, tuple[int, dict[str, Any]]] = {}
     for field, argument in [
         ("svals", svals),
         ("svals2", svals2),
@@ -505,7 +554,7 @@ async def get_nice_function(
         if argument:
             nice_func[field] = [
                 await parse_dataVals(
-                    conn, region, sval, function.mstFunc.funcType, lang
+                    conn, region, sval, function.mstFunc.funcType, lang, depend_funcs
                 )
                 for sval in argument
             ]
@@ -5,10 +5,16 @@ from sqlalchemy.ext.asyncio import AsyncConnection
 
 from ...config import Settings
 from ...redis import Redis
-from ...redis.helpers.reverse import RedisReverse, get_reverse_ids
+from ...redis.helpers.reverse import (
+    BUFF_REVERSE_TYPES,
+    FUNC_REVERSE_TYPES,
+    SKILL_REVERSE_TYPES,
+    RedisReverse,
+    ReverseIds,
+    get_reverse_id_tree,
+    lookup_reverse_ids,
+)
 from ...schemas.basic import (
-    BasicReversedBuff,
-    BasicReversedFunction,
     BasicReversedSkillTd,
 )
 from ...schemas.common import Language, Region, ReverseData, ReverseDepth
@@ -29,12 +35,11 @@ from ...schemas.nice import (
 from ...schemas.raw import MstBuff, MstFunc, MstSvt, ServantEntity
 from .. import raw
 from ..basic import (
-    get_basic_cc,
-    get_basic_function,
-    get_basic_mc,
+    get_basic_buff_reverse,
+    get_basic_func_reverse,
+    get_basic_reverse_entities,
     get_basic_servant,
-    get_basic_skill,
-    get_basic_td,
+    get_basic_skill_reverse,
 )
 from .buff import get_nice_buff
 from .cc import get_nice_command_code
@@ -85,28 +90,35 @@ async def get_nice_buff_with_reverse(
     reverseDepth: ReverseDepth = ReverseDepth.function,
     reverseData: ReverseData = ReverseData.nice,
     mstBuff: Optional[MstBuff] = None,
+    reverse_ids: Optional[ReverseIds] = None,
 ) -> NiceBuffReverse:
     raw_buff = await raw.get_buff_entity_no_reverse(conn, buff_id, mstBuff)
     nice_buff = NiceBuffReverse.parse_obj(get_nice_buff(raw_buff, region, lang))
     if reverse and reverseDepth >= ReverseDepth.function:
-        func_ids = await get_reverse_ids(
-            redis, region, RedisReverse.BUFF_TO_FUNC, buff_id
-        )
+        if reverse_ids is None:
+            reverse_ids = await get_reverse_id_tree(
+                redis, region, BUFF_REVERSE_TYPES, buff_id, reverseDepth
+            )
+        func_ids = lookup_reverse_ids(reverse_ids, RedisReverse.BUFF_TO_FUNC, buff_id)
         if reverseData == ReverseData.basic:
-            basic_buff_reverse = BasicReversedBuff(
-                function=[
-                    await get_basic_function(
-                        redis, region, func_id, lang, reverse, reverseDepth
-                    )
-                    for func_id in func_ids
-                ]
+            entities = await get_basic_reverse_entities(
+                redis, region, reverse_ids, lang
+            )
+            nice_buff.reverse = NiceReversedBuffType(
+                basic=get_basic_buff_reverse(entities, reverse_ids, buff_id)
             )
-            nice_buff.reverse = NiceReversedBuffType(basic=basic_buff_reverse)
         else:
             buff_reverse = NiceReversedBuff(
                 function=[
                     await get_nice_func_with_reverse(
-                        conn, redis, region, func_id, lang, reverse, reverseDepth
+                        conn,
+                        redis,
+                        region,
+                        func_id,
+                        lang,
+                        reverse,
+                        reverseDepth,
+                        reverse_ids=reverse_ids,
                     )
                     for func_id in func_ids
                 ]
@@ -125,6 +137,7 @@ async def get_nice_func_with_reverse(
     reverseDepth: ReverseDepth = ReverseDepth.skillNp,
     reverseData: ReverseData = ReverseData.nice,
     mstFunc: Optional[MstFunc] = None,
+    reverse_ids: Optional[ReverseIds] = None,
 ) -> NiceBaseFunctionReverse:
     raw_func = await raw.get_func_entity_no_reverse(conn, func_id, True, mstFunc)
     nice_func = NiceBaseFunctionReverse.parse_obj(
@@ -132,31 +145,31 @@ async def get_nice_func_with_reverse(
     )
 
     if reverse and reverseDepth >= ReverseDepth.skillNp:
-        skill_ids = await get_reverse_ids(
-            redis, region, RedisReverse.FUNC_TO_SKILL, func_id
-        )
-        td_ids = await get_reverse_ids(redis, region, RedisReverse.FUNC_TO_TD, func_id)
+        if reverse_ids is None:
+            reverse_ids = await get_reverse_id_tree(
+                redis, region, FUNC_REVERSE_TYPES, func_id, reverseDepth
+            )
+        skill_ids = lookup_reverse_ids(reverse_ids, RedisReverse.FUNC_TO_SKILL, func_id)
+        td_ids = lookup_reverse_ids(reverse_ids, RedisReverse.FUNC_TO_TD, func_id)
         if reverseData == ReverseData.basic:
-            basic_func_reverse = BasicReversedFunction(
-                skill=[
-                    await get_basic_skill(
-                        redis, region, skill_id, lang, reverse, reverseDepth
-                    )
-                    for skill_id in skill_ids
-                ],
-                NP=[
-                    await get_basic_td(
-                        redis, region, td_id, lang, reverse, reverseDepth
-                    )
-                    for td_id in td_ids
-                ],
+            entities = await get_basic_reverse_entities(
+                redis, region, reverse_ids, lang
+            )
+            nice_func.reverse = NiceReversedFunctionType(
+                basic=get_basic_func_reverse(entities, reverse_ids, func_id)
             )
-            nice_func.reverse = NiceReversedFunctionType(basic=basic_func_reverse)
         else:
             func_reverse = NiceReversedFunction(
                 skill=[
                     await get_nice_skill_with_reverse(
-                        conn, redis, region, skill_id, lang, reverse, reverseDepth
+                        conn,
+                        redis,
+                        region,
+                        skill_id,
+                        lang,
+                        reverse,
+                        reverseDepth,
+                        reverse_ids=reverse_ids,
                     )
                     for skill_id in skill_ids
                 ],
@@ -180,6 +193,7 @@ async def get_nice_skill_with_reverse(
     reverse: bool = False,
     reverseDepth: ReverseDepth = ReverseDepth.servant,
     reverseData: ReverseData = ReverseData.nice,
+    reverse_ids: Optional[ReverseIds] = None,
 ) -> NiceSkillReverse:
     raw_skill = await raw.get_skill_entity_no_reverse(conn, skill_id, expand=True)
     if raw_skill is None:
@@ -189,34 +203,27 @@ async def get_nice_skill_with_reverse(
     )
 
     if reverse and reverseDepth >= ReverseDepth.servant:
-        activeSkills = set(
-            await get_reverse_ids(
-                redis, region, RedisReverse.ACTIVE_SKILL_TO_SVT, skill_id
+        if reverse_ids is None:
+            reverse_ids = await get_reverse_id_tree(
+                redis, region, SKILL_REVERSE_TYPES, skill_id, reverseDepth
             )
+        activeSkills = set(
+            lookup_reverse_ids(reverse_ids, RedisReverse.ACTIVE_SKILL_TO_SVT, skill_id)
         )
         passiveSkills = set(
-            await get_reverse_ids(
-                redis, region, RedisReverse.PASSIVE_SKILL_TO_SVT, skill_id
-            )
+            lookup_reverse_ids(reverse_ids, RedisReverse.PASSIVE_SKILL_TO_SVT, skill_id)
         )
 
-        mc_ids = await get_reverse_ids(
-            redis, region, RedisReverse.SKILL_TO_MC, skill_id
-        )
-        cc_ids = await get_reverse_ids(
-            redis, region, RedisReverse.SKILL_TO_CC, skill_id
-        )
+        mc_ids = lookup_reverse_ids(reverse_ids, RedisReverse.SKILL_TO_MC, skill_id)
+        cc_ids = lookup_reverse_ids(reverse_ids, RedisReverse.SKILL_TO_CC, skill_id)
 
         if reverseData == ReverseData.basic:
-            basic_skill_reverse = BasicReversedSkillTd(
-                servant=[
-                    await get_basic_servant(redis, region, svt_id, lang=lang)
-                    for svt_id in sorted(activeSkills | passiveSkills)
-                ],
-                MC=[await get_basic_mc(redis, region, mc_id, lang) for mc_id in mc_ids],
-                CC=[await get_basic_cc(redis, region, cc_id, lang) for cc_id in cc_ids],
+            entities = await get_basic_reverse_entities(
+                redis, region, reverse_ids, lang
+            )
+            nice_skill.reverse = NiceReversedSkillTdType(
+                basic=get_basic_skill_reverse(entities, reverse_ids, skill_id)
             )
-            nice_skill.reverse = NiceReversedSkillTdType(basic=basic_skill_reverse)
         else:
             skill_reverse = NiceReversedSkillTd(
                 servant=[
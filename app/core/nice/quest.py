@@ -81,7 +81,7 @@ from ...schemas.raw import (
     ScriptFile,
 )
 from .. import raw
-from ..rayshift import get_quest_enemy_hash
+from ..rayshift import get_quest_enemy_hash, get_rayshift_min_query_id
 from ..utils import fmt_url, get_flags, get_nice_trait, get_traits_list, get_translation
 from .base_script import get_nice_script_link
 from .bgm import get_nice_bgm
@@ -637,20 +637,9 @@ async def get_nice_quest_phase(
                     if questSelectScriptId == quest_id
                 ]
 
-        min_query_id: int | None = None
-        if (
-            db_data.raw.mstQuest.type in (QuestType.MAIN, QuestType.FREE)
-            and db_data.nice.warId < 1000
-        ):
-            if region == Region.JP:
-                min_query_id = 154613  # 2021-08-01 10:00:00 UTC
-            elif region == Region.NA:
-                min_query_id = 1062363  # 2022-07-04 09:00:00 UTC
-        elif db_data.nice.warId == 1002:
-            if region == Region.JP:
-                min_query_id = 499538  # 2022-01-02 00:00:00 UTC
-            elif region == Region.NA:
-                min_query_id = 6481638  # 2024-01-02 00:00:00 UTC
+        min_query_id = get_rayshift_min_query_id(
+            region, db_data.raw.mstQuest.type, db_data.nice.warId
+        )
 
         rayshift_query_questHash = (
             None if db_data.raw.mstQuest.type == QuestType.WAR_BOARD else questHash
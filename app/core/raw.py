@@ -1,7 +1,10 @@
+from collections import defaultdict
+from dataclasses import dataclass, field
 from typing import Any, Iterable, Optional
 
 import orjson
 from fastapi import HTTPException
+from loguru import logger
 from sqlalchemy.ext.asyncio import AsyncConnection
 
 from ..data.custom_mappings import EXTRA_CHARAFIGURES
@@ -20,7 +23,16 @@ from ..db.helpers import (
     war,
 )
 from ..redis import Redis
-from ..redis.helpers.reverse import RedisReverse, get_reverse_ids
+from ..redis.helpers.reverse import (
+    BUFF_REVERSE_TYPES,
+    FUNC_REVERSE_TYPES,
+    SKILL_REVERSE_TYPES,
+    RedisReverse,
+    ReverseIds,
+    get_reverse_id_tree,
+    get_reverse_values,
+    lookup_reverse_ids,
+)
 from ..schemas.common import Region, ReverseDepth
 from ..schemas.enums import FUNC_VALS_NOT_BUFF, DetailMissionCondType
 from ..schemas.gameenums import (
@@ -76,18 +88,12 @@ from ..schemas.raw import (
     MstClassBoardLock,
     MstClassBoardSquare,
     MstClosedMessage,
-    MstCombineAppendPassiveSkill,
-    MstCombineCostume,
-    MstCombineLimit,
-    MstCombineMaterial,
-    MstCombineSkill,
     MstCommandCode,
     MstCommandCodeComment,
     MstCommandCodeSkill,
     MstCommonConsume,
     MstCommonRelease,
     MstCompleteMission,
-    MstCv,
     MstEnemyMaster,
     MstEnemyMasterBattle,
     MstEquip,
@@ -130,8 +136,6 @@ from ..schemas.raw import (
     MstEventTradeGoods,
     MstEventTradePickup,
     MstEventVoicePlay,
-    MstFriendship,
-    MstFriendshipSvt,
     MstFunc,
     MstFuncGroup,
     MstGift,
@@ -140,7 +144,6 @@ from ..schemas.raw import (
     MstGrandGraphDetail,
     MstHeelPortrait,
     MstIllustrator,
-    MstImagePartsGroup,
     MstItem,
     MstMap,
     MstMapGimmick,
@@ -154,27 +157,9 @@ from ..schemas.raw import (
     MstSpotAdd,
     MstSpotRoad,
     MstSvt,
-    MstSvtAdd,
-    MstSvtAppendPassiveSkill,
-    MstSvtAppendPassiveSkillUnlock,
     MstSvtBattlePoint,
-    MstSvtCard,
-    MstSvtCardAdd,
-    MstSvtChange,
-    MstSvtCoin,
-    MstSvtComment,
-    MstSvtCommentAdd,
-    MstSvtCostume,
-    MstSvtExp,
     MstSvtExtra,
     MstSvtGroup,
-    MstSvtIndividuality,
-    MstSvtLimit,
-    MstSvtLimitAdd,
-    MstSvtLimitImage,
-    MstSvtMultiPortrait,
-    MstSvtOverwrite,
-    MstSvtPassiveSkill,
     MstSvtScript,
     MstSvtVoice,
     MstSvtVoiceRelation,
@@ -209,6 +194,7 @@ from ..schemas.raw import (
     TdEntityNoReverse,
     WarEntity,
 )
+from .utils import RowIndex, get_values_by_keys
 
 
 async def get_buff_entity_no_reverse(
@@ -234,16 +220,15 @@ async def get_buff_entity(
         await get_buff_entity_no_reverse(conn, buff_id, mstBuff)
     )
     if reverse and reverseDepth >= ReverseDepth.function:
-        func_ids = await get_reverse_ids(
-            redis, region, RedisReverse.BUFF_TO_FUNC, buff_id
+        reverse_ids = await get_reverse_id_tree(
+            redis, region, BUFF_REVERSE_TYPES, buff_id, reverseDepth
         )
+        entities = await get_reverse_entities(conn, reverse_ids)
         buff_reverse = ReversedBuff(
-            function=[
-                await get_func_entity(
-                    conn, redis, region, func_id, reverse, reverseDepth
-                )
-                for func_id in func_ids
-            ]
+            function=get_values_by_keys(
+                entities.functions,
+                lookup_reverse_ids(reverse_ids, RedisReverse.BUFF_TO_FUNC, buff_id),
+            )
         )
         buff_entity.reverse = ReversedBuffType(raw=buff_reverse)
     return buff_entity
@@ -274,6 +259,20 @@ async def get_func_entity_no_reverse(
     return func_entity
 
 
+async def get_func_entity_no_reverse_many(
+    conn: AsyncConnection, func_ids: Iterable[int]
+) -> list[FunctionEntityNoReverse]:
+    mstFuncGroups: dict[int, list[MstFuncGroup]] = defaultdict(list)
+    for mstFuncGroup in await fetch.get_all_multiple(conn, MstFuncGroup, func_ids):
+        mstFuncGroups[mstFuncGroup.funcId].append(mstFuncGroup)
+    return [
+        FunctionEntityNoReverse(
+            mstFunc=mstFunc, mstFuncGroup=mstFuncGroups.get(mstFunc.id, [])
+        )
+        for mstFunc in await fetch.get_all_multiple(conn, MstFunc, func_ids)
+    ]
+
+
 async def get_func_entity(
     conn: AsyncConnection,
     redis: Redis,
@@ -288,23 +287,13 @@ async def get_func_entity(
         await get_func_entity_no_reverse(conn, func_id, expand, mstFunc)
     )
     if reverse and reverseDepth >= ReverseDepth.skillNp:
-        skill_ids = await get_reverse_ids(
-            redis, region, RedisReverse.FUNC_TO_SKILL, func_id
+        reverse_ids = await get_reverse_id_tree(
+            redis, region, FUNC_REVERSE_TYPES, func_id, reverseDepth
         )
-        td_ids = await get_reverse_ids(redis, region, RedisReverse.FUNC_TO_TD, func_id)
-        func_reverse = ReversedFunction(
-            skill=[
-                await get_skill_entity(
-                    conn, redis, region, skill_id, reverse, reverseDepth
-                )
-                for skill_id in skill_ids
-            ],
-            NP=[
-                await get_td_entity(conn, td_id, reverse, reverseDepth)
-                for td_id in td_ids
-            ],
+        entities = await get_reverse_entities(conn, reverse_ids)
+        func_entity.reverse = ReversedFunctionType(
+            raw=get_func_reverse(entities, reverse_ids, func_id)
         )
-        func_entity.reverse = ReversedFunctionType(raw=func_reverse)
     return func_entity
 
 
@@ -316,12 +305,8 @@ async def get_skill_entity_no_reverse_many(
 ) -> list[SkillEntityNoReverse]:
     if not skill_ids:
         return []
-    skill_entities = await skill.get_skillEntity(conn, skill_ids)
+    skill_entities = await skill.get_skillEntity(conn, skill_ids, expand)
     if skill_entities:
-        if not expand:
-            for skill_entity in skill_entities:
-                for skillLv in skill_entity.mstSkillLv:
-                    skillLv.expandedFuncId = None
         return skill_entities
     elif error_if_not_found:
         raise HTTPException(status_code=404, detail=f"Skills not found: {skill_ids}")
@@ -358,50 +343,31 @@ async def get_skill_entity(
     )
 
     if reverse and reverseDepth >= ReverseDepth.servant:
-        activeSkills = set(
-            await get_reverse_ids(
-                redis, region, RedisReverse.ACTIVE_SKILL_TO_SVT, skill_id
-            )
-        )
-        passiveSkills = set(
-            await get_reverse_ids(
-                redis, region, RedisReverse.PASSIVE_SKILL_TO_SVT, skill_id
-            )
+        reverse_ids = await get_reverse_id_tree(
+            redis, region, SKILL_REVERSE_TYPES, skill_id, reverseDepth
         )
-
-        mc_ids = await get_reverse_ids(
-            redis, region, RedisReverse.SKILL_TO_MC, skill_id
-        )
-        cc_ids = await get_reverse_ids(
-            redis, region, RedisReverse.SKILL_TO_CC, skill_id
-        )
-
-        skill_reverse = ReversedSkillTd(
-            servant=[
-                await get_servant_entity(conn, svt_id)
-                for svt_id in sorted(activeSkills | passiveSkills)
-            ],
-            MC=[await get_mystic_code_entity(conn, mc_id) for mc_id in mc_ids],
-            CC=[await get_command_code_entity(conn, cc_id) for cc_id in cc_ids],
+        entities = await get_reverse_entities(conn, reverse_ids)
+        skill_entity.reverse = ReversedSkillTdType(
+            raw=get_skill_reverse(entities, reverse_ids, skill_id)
         )
-        skill_entity.reverse = ReversedSkillTdType(raw=skill_reverse)
     return skill_entity
 
 
 async def get_td_entity_no_reverse_many(
-    conn: AsyncConnection, td_ids: Iterable[int], expand: bool = False
+    conn: AsyncConnection,
+    td_ids: Iterable[int],
+    expand: bool = False,
+    error_if_not_found: bool = True,
 ) -> list[TdEntityNoReverse]:
     if not td_ids:
         return []
-    td_entities = await td.get_tdEntity(conn, td_ids)
+    td_entities = await td.get_tdEntity(conn, td_ids, expand)
     if td_entities:
-        if not expand:
-            for td_entity in td_entities:
-                for tdLv in td_entity.mstTreasureDeviceLv:
-                    tdLv.expandedFuncId = None
         return td_entities
-    else:
+    elif error_if_not_found:
         raise HTTPException(status_code=404, detail="NP not found")
+    else:
+        return []
 
 
 async def get_td_entity_no_reverse(
@@ -420,16 +386,152 @@ async def get_td_entity(
     td_entity = TdEntity.parse_obj(await get_td_entity_no_reverse(conn, td_id, expand))
 
     if reverse and reverseDepth >= ReverseDepth.servant:
-        td_reverse = ReversedSkillTd(
-            servant=[
-                await get_servant_entity(conn, svt_id.svtId)
-                for svt_id in td_entity.mstSvtTreasureDevice
-            ]
+        svt_ids = {svt_td.svtId for svt_td in td_entity.mstSvtTreasureDevice}
+        entities = ReverseEntities(
+            servants={
+                svt_entity.mstSvt.id: svt_entity
+                for svt_entity in await get_servant_entities_many(conn, svt_ids)
+            }
         )
-        td_entity.reverse = ReversedSkillTdType(raw=td_reverse)
+        td_entity.reverse = ReversedSkillTdType(raw=get_td_reverse(entities, td_entity))
     return td_entity
 
 
+@dataclass
+class ReverseEntities:
+    """Entities of a reverse ID tree, each loaded only once"""
+
+    servants: dict[int, ServantEntity] = field(default_factory=dict)
+    mcs: dict[int, MysticCodeEntity] = field(default_factory=dict)
+    ccs: dict[int, CommandCodeEntity] = field(default_factory=dict)
+    skills: dict[int, SkillEntity] = field(default_factory=dict)
+    tds: dict[int, TdEntity] = field(default_factory=dict)
+    functions: dict[int, FunctionEntity] = field(default_factory=dict)
+
+
+def get_skill_reverse(
+    entities: ReverseEntities, reverse_ids: ReverseIds, skill_id: int
+) -> ReversedSkillTd:
+    svt_ids = set(
+        lookup_reverse_ids(reverse_ids, RedisReverse.ACTIVE_SKILL_TO_SVT, skill_id)
+    ) | set(
+        lookup_reverse_ids(reverse_ids, RedisReverse.PASSIVE_SKILL_TO_SVT, skill_id)
+    )
+    return ReversedSkillTd(
+        servant=get_values_by_keys(entities.servants, sorted(svt_ids)),
+        MC=get_values_by_keys(
+            entities.mcs,
+            lookup_reverse_ids(reverse_ids, RedisReverse.SKILL_TO_MC, skill_id),
+        ),
+        CC=get_values_by_keys(
+            entities.ccs,
+            lookup_reverse_ids(reverse_ids, RedisReverse.SKILL_TO_CC, skill_id),
+        ),
+    )
+
+
+def get_td_reverse(
+    entities: ReverseEntities, td_entity: TdEntityNoReverse
+) -> ReversedSkillTd:
+    return ReversedSkillTd(
+        servant=get_values_by_keys(
+            entities.servants,
+            [svt_td.svtId for svt_td in td_entity.mstSvtTreasureDevice],
+        )
+    )
+
+
+def get_func_reverse(
+    entities: ReverseEntities, reverse_ids: ReverseIds, func_id: int
+) -> ReversedFunction:
+    return ReversedFunction(
+        skill=get_values_by_keys(
+            entities.skills,
+            lookup_reverse_ids(reverse_ids, RedisReverse.FUNC_TO_SKILL, func_id),
+        ),
+        NP=get_values_by_keys(
+            entities.tds,
+            lookup_reverse_ids(reverse_ids, RedisReverse.FUNC_TO_TD, func_id),
+        ),
+    )
+
+
+async def get_reverse_entities(
+    conn: AsyncConnection, reverse_ids: ReverseIds
+) -> ReverseEntities:
+    """Load the entities of a reverse ID tree and link them bottom-up.
+
+    Each level is bulk loaded with `IN` queries and an entity shared by several
+    nodes of the tree is only loaded once.
+    """
+    entities = ReverseEntities()
+
+    raw_skills = await get_skill_entity_no_reverse_many(
+        conn,
+        get_reverse_values(reverse_ids, RedisReverse.FUNC_TO_SKILL),
+        error_if_not_found=False,
+    )
+    raw_tds = await get_td_entity_no_reverse_many(
+        conn, get_reverse_values(reverse_ids, RedisReverse.FUNC_TO_TD)
+    )
+
+    td_svt_reverse = reverse_ids.get(RedisReverse.TD_TO_SVT, {})
+    svt_ids = get_reverse_values(
+        reverse_ids,
+        RedisReverse.ACTIVE_SKILL_TO_SVT,
+        RedisReverse.PASSIVE_SKILL_TO_SVT,
+    ) | {
+        svt_td.svtId
+        for raw_td in raw_tds
+        if raw_td.mstTreasureDevice.id in td_svt_reverse
+        for svt_td in raw_td.mstSvtTreasureDevice
+    }
+    entities.servants = {
+        svt_entity.mstSvt.id: svt_entity
+        for svt_entity in await get_servant_entities_many(conn, svt_ids)
+    }
+    entities.mcs = {
+        mc_id: await get_mystic_code_entity(conn, mc_id)
+        for mc_id in get_reverse_values(reverse_ids, RedisReverse.SKILL_TO_MC)
+    }
+    entities.ccs = {
+        cc_id: await get_command_code_entity(conn, cc_id)
+        for cc_id in get_reverse_values(reverse_ids, RedisReverse.SKILL_TO_CC)
+    }
+
+    skill_svt_reverse = reverse_ids.get(RedisReverse.ACTIVE_SKILL_TO_SVT, {})
+    for raw_skill in raw_skills:
+        skill_id = raw_skill.mstSkill.id
+        skill_entity = SkillEntity.parse_obj(raw_skill)
+        if skill_id in skill_svt_reverse:
+            skill_entity.reverse = ReversedSkillTdType(
+                raw=get_skill_reverse(entities, reverse_ids, skill_id)
+            )
+        entities.skills[skill_id] = skill_entity
+
+    for raw_td in raw_tds:
+        td_entity = TdEntity.parse_obj(raw_td)
+        if raw_td.mstTreasureDevice.id in td_svt_reverse:
+            td_entity.reverse = ReversedSkillTdType(
+                raw=get_td_reverse(entities, td_entity)
+            )
+        entities.tds[raw_td.mstTreasureDevice.id] = td_entity
+
+    func_skill_reverse = reverse_ids.get(RedisReverse.FUNC_TO_SKILL, {})
+    for raw_func in await get_func_entity_no_reverse_many(
+        conn, get_reverse_values(reverse_ids, RedisReverse.BUFF_TO_FUNC)
+    ):
+        func_id = raw_func.mstFunc.id
+        func_entity = FunctionEntity.parse_obj(raw_func)
+        if func_id in func_skill_reverse:
+            func_entity.reverse = ReversedFunctionType(
+                raw=get_func_reverse(entities, reverse_ids, func_id)
+            )
+        entities.functions[func_id] = func_entity
+
+    return entities
+
+
 def fix_script_extend_data(data: dict[str, Any]) -> dict[str, Any]:
     if isinstance(data.get("faceSize"), list):
         data["faceSizeRect"] = data["faceSize"]
@@ -461,23 +563,18 @@ async def get_event_allout(
     return await fetch.get_all_multiple(conn, MstEventAlloutBattle, event_ids)
 
 
-async def get_voice_from_svtVoice(
-    conn: AsyncConnection, mstSvtVoices: list[MstSvtVoice]
-) -> list[MstVoice]:
-    base_voice_ids = {
+def get_voice_ids_from_svtVoice(mstSvtVoices: Iterable[MstSvtVoice]) -> set[str]:
+    return {
         info.get_voice_id()
         for svt_voice in mstSvtVoices
         for script_json in svt_voice.scriptJson
         if script_json is not None
         for info in script_json.infos
     }
-    return await fetch.get_all_multiple(conn, MstVoice, base_voice_ids)
 
 
-async def get_voice_group_from_svtVoice(
-    conn: AsyncConnection, mstSvtVoices: list[MstSvtVoice]
-) -> list[MstSvtGroup]:
-    group_ids = {
+def get_voice_group_ids_from_svtVoice(mstSvtVoices: Iterable[MstSvtVoice]) -> set[int]:
+    return {
         cond.value
         for svt_voice in mstSvtVoices
         for script_json in svt_voice.scriptJson
@@ -485,121 +582,65 @@ async def get_voice_group_from_svtVoice(
         for cond in (script_json.conds if script_json.conds is not None else [])
         if cond.condType == VoiceCondType.SVT_GROUP
     }
-    return await fetch.get_all_multiple(conn, MstSvtGroup, group_ids)
 
 
-async def get_servant_entity(
-    conn: AsyncConnection,
-    servant_id: int,
-    expand: bool = False,
-    lore: bool = False,
-    mstSvt: Optional[MstSvt] = None,
-) -> ServantEntity:
-    svt_db = mstSvt if mstSvt else await fetch.get_one(conn, MstSvt, servant_id)
-    if not svt_db:
-        raise HTTPException(status_code=404, detail="Svt not found")
+async def get_voice_from_svtVoice(
+    conn: AsyncConnection, mstSvtVoices: list[MstSvtVoice]
+) -> list[MstVoice]:
+    base_voice_ids = get_voice_ids_from_svtVoice(mstSvtVoices)
+    return await fetch.get_all_multiple(conn, MstVoice, base_voice_ids)
 
-    mstSvtIndividuality = await fetch.get_all(conn, MstSvtIndividuality, servant_id)
-    mstSvtCard = await fetch.get_all(conn, MstSvtCard, servant_id)
-    mstSvtCardAdd = await fetch.get_all(conn, MstSvtCardAdd, servant_id)
-    mstSvtLimit = await fetch.get_all(conn, MstSvtLimit, servant_id)
-    mstCombineSkill = await fetch.get_all(conn, MstCombineSkill, svt_db.combineSkillId)
-    mstCombineLimit = await fetch.get_all(conn, MstCombineLimit, svt_db.combineLimitId)
-    mstCombineCostume = await fetch.get_all(conn, MstCombineCostume, servant_id)
-    mstSvtLimitAdd = await fetch.get_all(conn, MstSvtLimitAdd, servant_id)
-    mstSvtLimitImage = await fetch.get_all(conn, MstSvtLimitImage, servant_id)
-    mstSvtChange = await fetch.get_all(conn, MstSvtChange, servant_id)
-    mstSvtCostume = await fetch.get_all(conn, MstSvtCostume, servant_id)
-    mstSvtExp = await fetch.get_all(conn, MstSvtExp, svt_db.expType)
-    mstFriendship = await fetch.get_all(conn, MstFriendship, svt_db.friendshipId)
-    mstFriendshipSvt = await fetch.get_all(conn, MstFriendshipSvt, servant_id)
-    mstCombineMaterial = await fetch.get_all(
-        conn, MstCombineMaterial, svt_db.combineMaterialId
-    )
-    mstSvtPassiveSkill = await fetch.get_all(conn, MstSvtPassiveSkill, servant_id)
-    mstSvtExtra = await fetch.get_one(conn, MstSvtExtra, servant_id)
-    mstSvtAppendPassiveSkill = await fetch.get_all(
-        conn, MstSvtAppendPassiveSkill, servant_id
-    )
-    mstSvtAppendPassiveSkillUnlock = await fetch.get_all(
-        conn, MstSvtAppendPassiveSkillUnlock, servant_id
-    )
-    mstCombineAppendPassiveSkill = await fetch.get_all(
-        conn, MstCombineAppendPassiveSkill, servant_id
-    )
-    mstSvtCoin = await fetch.get_one(conn, MstSvtCoin, servant_id)
-    mstSvtAdd = await fetch.get_one(conn, MstSvtAdd, servant_id)
-    mstSvtMultiPortrait = await fetch.get_all(conn, MstSvtMultiPortrait, servant_id)
-    mstSvtOverwrite = await fetch.get_all(conn, MstSvtOverwrite, servant_id)
-
-    costume_chara_ids = [limit.battleCharaId for limit in mstSvtLimitAdd]
-    mstSvtScript = await svt.get_svt_script(
-        conn, {servant_id, *costume_chara_ids, *EXTRA_CHARAFIGURES.get(servant_id, [])}
-    )
-
-    mstSvtBattlePoint = await fetch.get_all_multiple(
-        conn, MstSvtBattlePoint, [servant_id]
-    )
-    battle_point_ids = {bp.battlePointId for bp in mstSvtBattlePoint}
-    mstBattlePoint = await fetch.get_all_multiple(
-        conn, MstBattlePoint, battle_point_ids
-    )
-    mstBattlePointPhase = await fetch.get_all_multiple(
-        conn, MstBattlePointPhase, battle_point_ids
-    )
-
-    if "imagePartsGroupId" in svt_db.script:
-        mstImagePartsGroup = await fetch.get_all_multiple(
-            conn, MstImagePartsGroup, [int(svt_db.script["imagePartsGroupId"])]
-        )
-    else:
-        mstImagePartsGroup = []
 
-    skill_ids = [
-        skill.skillId for skill in await skill.get_mstSvtSkill(conn, svt_id=servant_id)
-    ]
-    mstSkill = await get_skill_entity_no_reverse_many(conn, skill_ids, expand)
+async def get_voice_group_from_svtVoice(
+    conn: AsyncConnection, mstSvtVoices: list[MstSvtVoice]
+) -> list[MstSvtGroup]:
+    group_ids = get_voice_group_ids_from_svtVoice(mstSvtVoices)
+    return await fetch.get_all_multiple(conn, MstSvtGroup, group_ids)
 
-    td_ids = {
-        td.treasureDeviceId
-        for td in await td.get_mstSvtTreasureDevice(conn, svt_id=servant_id)
-        if td.treasureDeviceId != EXTRA_ATTACK_TD_ID
+
+def get_svt_td_ids(svt_tables: svt.ServantEntityTables) -> set[int]:
+    return {
+        svt_td.treasureDeviceId
+        for svt_td in svt_tables.mstSvtTreasureDevice
+        if svt_td.treasureDeviceId != EXTRA_ATTACK_TD_ID
     } | {
         int(overwrite.overwriteValue["overwriteTreasureDeviceId"])
-        for overwrite in mstSvtOverwrite
+        for overwrite in svt_tables.mstSvtOverwrite
         if overwrite.type == ServantOverwriteType.TREASURE_DEVICE
     }
-    mstTreasureDevice = await get_td_entity_no_reverse_many(conn, td_ids, expand)
 
-    extra_td_ids = {
+
+def get_extra_td_ids(mstTreasureDevice: Iterable[TdEntityNoReverse]) -> set[int]:
+    return {
         int(v)
         for td in mstTreasureDevice
         for k, v in td.mstTreasureDevice.script.items()
         if k.startswith("tdChangeByBattlePoint")
     }
 
-    mstTreasureDevice += await get_td_entity_no_reverse_many(conn, extra_td_ids, expand)
 
+def get_svt_item_ids(svt_tables: svt.ServantEntityTables) -> set[int]:
     item_ids: set[int] = set()
     for combine in (
-        mstCombineLimit
-        + mstCombineSkill
-        + mstCombineAppendPassiveSkill
-        + mstCombineCostume
-        + mstSvtAppendPassiveSkillUnlock
+        svt_tables.mstCombineLimit
+        + svt_tables.mstCombineSkill
+        + svt_tables.mstCombineAppendPassiveSkill
+        + svt_tables.mstCombineCostume
+        + svt_tables.mstSvtAppendPassiveSkillUnlock
     ):
         item_ids.update(combine.itemIds)
-    if mstSvtCoin is not None:
-        item_ids.add(mstSvtCoin.itemId)
+    if svt_tables.mstSvtCoin is not None:
+        item_ids.add(svt_tables.mstSvtCoin.itemId)
+    return item_ids
 
-    mstItem = await get_multiple_items(conn, item_ids)
 
+def get_svt_common_release_ids(svt_tables: svt.ServantEntityTables) -> set[int]:
     common_release_ids = {
         skill.commonReleaseId
-        for skill in mstSvtPassiveSkill
+        for skill in svt_tables.mstSvtPassiveSkill
         if skill.commonReleaseId is not None
     }
-    for limit in mstSvtLimit:
+    for limit in svt_tables.mstSvtLimit:
         try:
             strParam = orjson.loads(limit.strParam)
             for field_name in (
@@ -610,149 +651,315 @@ async def get_servant_entity(
                     common_release_ids.add(strParam[field_name])
         except orjson.JSONDecodeError:  # pragma: no cover
             pass
+    mstSvtAdd = svt_tables.mstSvtAdd
     if mstSvtAdd and "overwriteClassImageId" in mstSvtAdd.script:
         overwrite_infos: list[list[int]] = mstSvtAdd.script["overwriteClassImageId"]
         for overwrite_info in overwrite_infos:
             if len(overwrite_info) > 1:
                 common_release_ids.add(overwrite_info[1])
+    return common_release_ids
 
-    mstCommonRelease = await fetch.get_all_multiple(
-        conn, MstCommonRelease, common_release_ids
-    )
 
-    gift_ids = {friendshipSvt.giftId for friendshipSvt in mstFriendshipSvt}
+def get_svt_voice_ids(svt_entity: ServantEntity) -> list[int]:
+    servant_id = svt_entity.mstSvt.id
 
-    gift_adds = await fetch.get_all_multiple(conn, MstGiftAdd, gift_ids)
-    replacement_gift_ids = {gift.priorGiftId for gift in gift_adds}
+    # Try to match order in the voice tab in game
+    voice_ids = []
 
-    gifts = await fetch.get_all_multiple(conn, MstGift, gift_ids | replacement_gift_ids)
+    for change in svt_entity.mstSvtChange:
+        voice_ids.append(change.svtVoiceId)
 
-    svt_entity = ServantEntity(
-        mstSvt=svt_db,
-        mstSvtIndividuality=mstSvtIndividuality,
-        mstSvtCard=mstSvtCard,
-        mstSvtCardAdd=mstSvtCardAdd,
-        mstSvtLimit=mstSvtLimit,
-        mstCombineSkill=mstCombineSkill,
-        mstCombineLimit=mstCombineLimit,
-        mstCombineCostume=mstCombineCostume,
-        mstCombineMaterial=mstCombineMaterial,
-        mstSvtLimitAdd=mstSvtLimitAdd,
-        mstSvtLimitImage=mstSvtLimitImage,
-        mstSvtChange=mstSvtChange,
-        mstSvtPassiveSkill=mstSvtPassiveSkill,
-        mstSvtAppendPassiveSkill=mstSvtAppendPassiveSkill,
-        mstSvtAppendPassiveSkillUnlock=mstSvtAppendPassiveSkillUnlock,
-        mstCombineAppendPassiveSkill=mstCombineAppendPassiveSkill,
-        mstSvtCoin=mstSvtCoin,
-        mstSvtAdd=mstSvtAdd,
-        mstSvtOverwrite=mstSvtOverwrite,
-        mstImagePartsGroup=mstImagePartsGroup,
-        # needed costume to get the nice limits and costume ids
-        mstSvtCostume=mstSvtCostume,
-        # needed this to get CharaFigure available forms
-        mstSvtScript=mstSvtScript,
-        mstSvtExp=mstSvtExp,
-        mstFriendship=mstFriendship,
-        mstFriendshipSvt=mstFriendshipSvt,
-        mstGift=gifts,
-        mstGiftAdd=gift_adds,
-        mstSvtBattlePoint=mstSvtBattlePoint,
-        mstBattlePoint=mstBattlePoint,
-        mstBattlePointPhase=mstBattlePointPhase,
-        mstSkill=mstSkill,
-        mstTreasureDevice=mstTreasureDevice,
-        mstSvtExtra=mstSvtExtra,
-        mstItem=mstItem,
-        mstSvtMultiPortrait=mstSvtMultiPortrait,
-        mstCommonRelease=mstCommonRelease,
+    voice_ids.append(servant_id)
+
+    for main_id, sub_id in (
+        (600700, 600710),  # Jekyll/Hyde
+        (800100, 800101),  # Mash
+    ):
+        if servant_id == main_id:
+            voice_ids.append(sub_id)
+
+    return voice_ids
+
+
+async def add_servant_voices_many(
+    conn: AsyncConnection, svt_entities: list[ServantEntity]
+) -> None:
+    voice_ids = {
+        svt_entity.mstSvt.id: get_svt_voice_ids(svt_entity)
+        for svt_entity in svt_entities
+    }
+
+    # Moriarty deadheat summer lines use his hidden name svt_id
+    relation_svt_ids = {
+        svt_entity.mstSvt.id: {
+            *(change.svtVoiceId for change in svt_entity.mstSvtChange),
+            svt_entity.mstSvt.id,
+        }
+        for svt_entity in svt_entities
+    }
+    voiceRelations = await fetch.get_all_multiple(
+        conn,
+        MstSvtVoiceRelation,
+        {svt_id for svt_ids in relation_svt_ids.values() for svt_id in svt_ids},
     )
+    relation_index = RowIndex(voiceRelations, lambda relation: relation.svtId)
+    for svt_id, svt_voice_ids in voice_ids.items():
+        for voiceRelation in relation_index.get_all(relation_svt_ids[svt_id]):
+            svt_voice_ids.append(voiceRelation.relationSvtId)
 
-    if expand:
-        extra_passive_ids = {
-            skill.skillId: 1 for skill in mstSvtPassiveSkill
-        }  # to preserve list order
-        append_passive_ids = {skill.skillId for skill in mstSvtAppendPassiveSkill}
-        expand_skill_ids = (
-            set(svt_entity.mstSvt.classPassive)
-            | set(extra_passive_ids.keys())
-            | append_passive_ids
-        )
-        expand_skills = {
-            skill.mstSkill.id: skill
-            for skill in await get_skill_entity_no_reverse_many(
-                conn, expand_skill_ids, expand
-            )
+    all_voice_ids = {
+        voice_id for svt_voice_ids in voice_ids.values() for voice_id in svt_voice_ids
+    }
+    all_svt_voices = await svt.get_mstSvtVoice(conn, all_voice_ids)
+    all_subtitles = await svt.get_mstSubtitle(conn, all_voice_ids)
+    all_voice_play_conds = await svt.get_mstVoicePlayCond(conn, all_voice_ids)
+    all_voices = await fetch.get_all_multiple(
+        conn, MstVoice, get_voice_ids_from_svtVoice(all_svt_voices)
+    )
+    all_svt_groups = await fetch.get_all_multiple(
+        conn, MstSvtGroup, get_voice_group_ids_from_svtVoice(all_svt_voices)
+    )
+
+    svt_voice_index = RowIndex(all_svt_voices, lambda voice: voice.id)
+    subtitle_index = RowIndex(all_subtitles, lambda sub: sub.get_svtId())
+    play_cond_index = RowIndex(all_voice_play_conds, lambda cond: cond.svtId)
+    voice_index = RowIndex(all_voices, lambda voice: voice.id)
+    svt_group_index = RowIndex(all_svt_groups, lambda group: group.id)
+
+    for svt_entity in svt_entities:
+        order = {
+            voice_id: i for i, voice_id in enumerate(voice_ids[svt_entity.mstSvt.id])
         }
-        svt_entity.mstSvt.expandedClassPassive = [
-            expand_skills[skill_id]
-            for skill_id in svt_entity.mstSvt.classPassive
-            if skill_id in expand_skills
-        ]
-        svt_entity.expandedExtraPassive = [
-            expand_skills[skillId]
-            for skillId in extra_passive_ids
-            if skillId in expand_skills
-        ]
-        svt_entity.expandedAppendPassive = [
-            expand_skills[skill.skillId]
-            for skill in mstSvtAppendPassiveSkill
-            if skill.skillId in expand_skills
-        ]
+        mstSvtVoice = svt_voice_index.get_all(order)
 
-    if lore:
-        svt_entity.mstCv = await fetch.get_one(conn, MstCv, svt_db.cvId)
-        svt_entity.mstIllustrator = await fetch.get_one(
-            conn, MstIllustrator, svt_db.illustratorId
+        svt_entity.mstVoice = voice_index.get_all(
+            get_voice_ids_from_svtVoice(mstSvtVoice)
         )
-        svt_entity.mstSvtComment = await fetch.get_all(conn, MstSvtComment, servant_id)
-        svt_entity.mstSvtCommentAdd = await fetch.get_all(
-            conn, MstSvtCommentAdd, servant_id
+        svt_entity.mstSvtGroup = svt_group_index.get_all(
+            get_voice_group_ids_from_svtVoice(mstSvtVoice)
+        )
+        svt_entity.mstSvtVoice = sorted(mstSvtVoice, key=lambda voice: order[voice.id])
+        svt_entity.mstVoicePlayCond = sorted(
+            play_cond_index.get_all(order), key=lambda voice: order[voice.svtId]
+        )
+        svt_entity.mstSubtitle = sorted(
+            subtitle_index.get_all(order), key=lambda sub: order[sub.get_svtId()]
         )
 
-        # Try to match order in the voice tab in game
-        voice_ids = []
 
-        for change in svt_entity.mstSvtChange:
-            voice_ids.append(change.svtVoiceId)
+async def get_servant_entities_many(
+    conn: AsyncConnection,
+    servant_ids: Iterable[int],
+    expand: bool = False,
+    lore: bool = False,
+    mstSvts: Iterable[MstSvt] = (),
+) -> list[ServantEntity]:
+    """Get the raw servant entities of multiple servants.
+
+    Every child table is loaded once for all servants with `IN` queries and the
+    rows are split per servant in memory. Servants that are not found are skipped.
+    """
+    servant_ids = list(dict.fromkeys(servant_ids))
+    if not servant_ids:
+        return []
 
-        voice_ids.append(servant_id)
+    all_svt_tables = await svt.get_svt_entity_tables(conn, servant_ids, lore)
+    svt_tables_list = [
+        all_svt_tables[svt_id] for svt_id in servant_ids if svt_id in all_svt_tables
+    ]
+    for mstSvt in mstSvts:
+        if mstSvt.id in all_svt_tables:
+            all_svt_tables[mstSvt.id].mstSvt = mstSvt
+
+    chara_ids = {
+        svt_tables.mstSvt.id: {
+            svt_tables.mstSvt.id,
+            *(limit.battleCharaId for limit in svt_tables.mstSvtLimitAdd),
+            *EXTRA_CHARAFIGURES.get(svt_tables.mstSvt.id, []),
+        }
+        for svt_tables in svt_tables_list
+    }
+    all_svt_scripts = await svt.get_svt_script(
+        conn, {chara_id for ids in chara_ids.values() for chara_id in ids}
+    )
 
-        for main_id, sub_id in (
-            (600700, 600710),  # Jekyll/Hyde
-            (800100, 800101),  # Mash
+    # Same order as skill.get_skillEntity: by the last position of the skill ID
+    skill_ids = {
+        svt_tables.mstSvt.id: list(
+            dict.fromkeys(
+                svt_skill.skillId for svt_skill in reversed(svt_tables.mstSvtSkill)
+            )
+        )[::-1]
+        for svt_tables in svt_tables_list
+    }
+    td_ids = {
+        svt_tables.mstSvt.id: get_svt_td_ids(svt_tables)
+        for svt_tables in svt_tables_list
+    }
+    all_skill_ids = {
+        skill_id for svt_skill_ids in skill_ids.values() for skill_id in svt_skill_ids
+    }
+    all_td_ids = {td_id for svt_td_ids in td_ids.values() for td_id in svt_td_ids}
+    all_skills = {
+        skill.mstSkill.id: skill
+        for skill in await get_skill_entity_no_reverse_many(
+            conn, all_skill_ids, expand, error_if_not_found=False
+        )
+    }
+    all_tds = {
+        td.mstTreasureDevice.id: td
+        for td in await get_td_entity_no_reverse_many(
+            conn, all_td_ids, expand, error_if_not_found=False
+        )
+    }
+
+    extra_td_ids = {
+        svt_id: get_extra_td_ids(
+            all_tds[td_id] for td_id in svt_td_ids if td_id in all_tds
+        )
+        for svt_id, svt_td_ids in td_ids.items()
+    }
+    all_extra_td_ids = {
+        td_id for svt_td_ids in extra_td_ids.values() for td_id in svt_td_ids
+    }
+    all_extra_tds = {
+        td.mstTreasureDevice.id: td
+        for td in await get_td_entity_no_reverse_many(
+            conn, all_extra_td_ids, expand, error_if_not_found=False
+        )
+    }
+
+    item_ids = {
+        svt_tables.mstSvt.id: get_svt_item_ids(svt_tables)
+        for svt_tables in svt_tables_list
+    }
+    all_items = {
+        item.id: item
+        for item in await fetch.get_all_multiple(
+            conn,
+            MstItem,
+            {item_id for svt_item_ids in item_ids.values() for item_id in svt_item_ids},
+        )
+    }
+
+    common_release_ids = {
+        svt_tables.mstSvt.id: get_svt_common_release_ids(svt_tables)
+        for svt_tables in svt_tables_list
+    }
+    all_common_releases = await fetch.get_all_multiple(
+        conn,
+        MstCommonRelease,
+        {cr_id for cr_ids in common_release_ids.values() for cr_id in cr_ids},
+    )
+
+    # A script of the chara ID c has the ID c or c * 10 + form
+    script_index = RowIndex(all_svt_scripts, lambda script: script.id // 10)
+    common_release_index = RowIndex(all_common_releases, lambda release: release.id)
+
+    svt_entities: list[ServantEntity] = []
+    for svt_tables in svt_tables_list:
+        svt_id = svt_tables.mstSvt.id
+        # A servant whose skills or NPs are all missing can't be loaded, only
+        # that servant is left out of the batch
+        if any(
+            entity_ids and not any(entity_id in found for entity_id in entity_ids)
+            for entity_ids, found in (
+                (skill_ids[svt_id], all_skills),
+                (td_ids[svt_id], all_tds),
+                (extra_td_ids[svt_id], all_extra_tds),
+            )
         ):
-            if servant_id == main_id:
-                voice_ids.append(sub_id)
-
-        # Moriarty deadheat summer lines use his hidden name svt_id
-        relation_svt_ids = [change.svtVoiceId for change in svt_entity.mstSvtChange] + [
-            servant_id
-        ]
-        voiceRelations = await fetch.get_all_multiple(
-            conn, MstSvtVoiceRelation, relation_svt_ids
+            logger.warning(f"Skills or NPs of svt {svt_id} not found")
+            continue
+        svt_chara_ids = chara_ids[svt_id]
+        # Child tables not in ServantEntity such as mstSvtSkill are ignored
+        svt_entity = ServantEntity(
+            **dict(svt_tables),
+            # needed this to get CharaFigure available forms
+            mstSvtScript=[
+                script
+                for script in script_index.get_all(
+                    svt_chara_ids | {chara_id // 10 for chara_id in svt_chara_ids}
+                )
+                if script.id // 10 in svt_chara_ids or script.id in svt_chara_ids
+            ],
+            mstSkill=[
+                all_skills[skill_id]
+                for skill_id in skill_ids[svt_id]
+                if skill_id in all_skills
+            ],
+            mstTreasureDevice=[
+                all_tds[td_id] for td_id in td_ids[svt_id] if td_id in all_tds
+            ]
+            + [
+                all_extra_tds[td_id]
+                for td_id in extra_td_ids[svt_id]
+                if td_id in all_extra_tds
+            ],
+            mstItem=[
+                all_items[item_id]
+                for item_id in item_ids[svt_id]
+                if item_id in all_items
+            ],
+            mstCommonRelease=common_release_index.get_all(common_release_ids[svt_id]),
         )
-        for voiceRelation in voiceRelations:
-            voice_ids.append(voiceRelation.relationSvtId)
+        svt_entities.append(svt_entity)
 
-        order = {voice_id: i for i, voice_id in enumerate(voice_ids)}
-        mstSvtVoice = await svt.get_mstSvtVoice(conn, voice_ids)
-        mstSubtitle = await svt.get_mstSubtitle(conn, voice_ids)
-        mstVoicePlayCond = await svt.get_mstVoicePlayCond(conn, voice_ids)
+    if expand:
+        expand_skill_ids = {
+            skill_id
+            for svt_entity in svt_entities
+            for skill_id in (
+                svt_entity.mstSvt.classPassive
+                + [skill.skillId for skill in svt_entity.mstSvtPassiveSkill]
+                + [skill.skillId for skill in svt_entity.mstSvtAppendPassiveSkill]
+            )
+        }
+        expand_skills = {
+            skill.mstSkill.id: skill
+            for skill in await get_skill_entity_no_reverse_many(
+                conn, expand_skill_ids, expand, error_if_not_found=False
+            )
+        }
+        for svt_entity in svt_entities:
+            extra_passive_ids = {
+                skill.skillId: 1 for skill in svt_entity.mstSvtPassiveSkill
+            }  # to preserve list order
+            svt_entity.mstSvt.expandedClassPassive = [
+                expand_skills[skill_id]
+                for skill_id in svt_entity.mstSvt.classPassive
+                if skill_id in expand_skills
+            ]
+            svt_entity.expandedExtraPassive = [
+                expand_skills[skillId]
+                for skillId in extra_passive_ids
+                if skillId in expand_skills
+            ]
+            svt_entity.expandedAppendPassive = [
+                expand_skills[skill.skillId]
+                for skill in svt_entity.mstSvtAppendPassiveSkill
+                if skill.skillId in expand_skills
+            ]
 
-        svt_entity.mstVoice = await get_voice_from_svtVoice(conn, mstSvtVoice)
+    if lore:
+        await add_servant_voices_many(conn, svt_entities)
 
-        svt_entity.mstSvtGroup = await get_voice_group_from_svtVoice(conn, mstSvtVoice)
+    return svt_entities
 
-        svt_entity.mstSvtVoice = sorted(mstSvtVoice, key=lambda voice: order[voice.id])
-        svt_entity.mstVoicePlayCond = sorted(
-            mstVoicePlayCond, key=lambda voice: order[voice.svtId]
-        )
-        svt_entity.mstSubtitle = sorted(
-            mstSubtitle, key=lambda sub: order[sub.get_svtId()]
-        )
 
-    return svt_entity
+async def get_servant_entity(
+    conn: AsyncConnection,
+    servant_id: int,
+    expand: bool = False,
+    lore: bool = False,
+    mstSvt: Optional[MstSvt] = None,
+) -> ServantEntity:
+    svt_entities = await get_servant_entities_many(
+        conn, [servant_id], expand, lore, [mstSvt] if mstSvt else []
+    )
+    if not svt_entities:
+        raise HTTPException(status_code=404, detail="Svt not found")
+    return svt_entities[0]
 
 
 async def get_mystic_code_entity(
@@ -1477,35 +1684,19 @@ async def get_script_entity(conn: AsyncConnection, script_id: str) -> ScriptEnti
     return raw_script
 
 
-async def get_ai_entities(
-    conn: AsyncConnection, ai_id: int, field: bool = False, throw_error: bool = True
+def get_related_ais(
+    ai_entities: dict[int, list[AiEntity]], ai_id: int
 ) -> list[AiEntity]:
-    if field:
-        ais = await ai.get_field_ai_entity(conn, ai_id)
-    else:
-        ais = await ai.get_svt_ai_entity(conn, ai_id)
-
-    if not ais and throw_error:
-        raise HTTPException(status_code=404, detail="AI not found")
-
-    return ais
-
-
-async def get_ai_collection(
-    conn: AsyncConnection, ai_id: int, field: bool = False
-) -> AiCollection:
-    main_ais = await get_ai_entities(conn, ai_id, field)
+    """The AIs linked from ai_id through avals[0], level by level"""
     retreived_ais = {ai_id}
 
     to_be_retrieved_ais = {
-        ai.mstAi.avals[0] for ai in main_ais if ai.mstAi.avals[0] > 0
+        ai.mstAi.avals[0] for ai in ai_entities[ai_id] if ai.mstAi.avals[0] > 0
     }
     related_ais: list[AiEntity] = []
     while to_be_retrieved_ais:
         for related_ai_id in to_be_retrieved_ais:
-            related_ais += await get_ai_entities(
-                conn, related_ai_id, field, throw_error=False
-            )
+            related_ais += ai_entities.get(related_ai_id, [])
 
         retreived_ais |= to_be_retrieved_ais
         to_be_retrieved_ais = {
@@ -1514,11 +1705,42 @@ async def get_ai_collection(
             if ai.mstAi.avals[0] > 0 and ai.mstAi.avals[0] not in retreived_ais
         }
 
-    return AiCollection(
-        mainAis=main_ais,
-        relatedAis=related_ais,
-        relatedQuests=await quest.get_quest_from_ai(conn, ai_id) if field else [],
-    )
+    return related_ais
+
+
+async def get_ai_collections(
+    conn: AsyncConnection, ai_ids: Iterable[int], field: bool = False
+) -> dict[int, AiCollection]:
+    """Get the AI collections of several AIs with one query, e.g. for the
+    enemies of a quest. relatedQuests isn't filled. AIs not found are left out.
+    """
+    ai_ids = set(ai_ids)
+    if field:
+        ai_entities = await ai.get_field_ai_trees(conn, ai_ids)
+    else:
+        ai_entities = await ai.get_svt_ai_trees(conn, ai_ids)
+
+    return {
+        ai_id: AiCollection(
+            mainAis=ai_entities[ai_id],
+            relatedAis=get_related_ais(ai_entities, ai_id),
+            relatedQuests=[],
+        )
+        for ai_id in ai_ids
+        if ai_id in ai_entities
+    }
+
+
+async def get_ai_collection(
+    conn: AsyncConnection, ai_id: int, field: bool = False
+) -> AiCollection:
+    ai_collection = (await get_ai_collections(conn, [ai_id], field)).get(ai_id)
+    if ai_collection is None:
+        raise HTTPException(status_code=404, detail="AI not found")
+
+    if field:
+        ai_collection.relatedQuests = await quest.get_quest_from_ai(conn, ai_id)
+    return ai_collection
 
 
 async def get_bgm_entity(conn: AsyncConnection, bgm_id: int) -> BgmEntity:
@@ -1567,19 +1789,15 @@ async def get_all_bgm_entities(
     mstItems = await get_multiple_items(conn, item_ids)
     mstItem_map = {mstItem.id: mstItem for mstItem in mstItems}
 
+    release_index = RowIndex(mstBgmReleases, lambda release: release.bgmId)
+    closed_message_index = RowIndex(mstClosedMessages, lambda message: message.id)
+
     out_entities: list[BgmEntity] = []
     for mstBgm in mstBgms:
-        mstBgmRelease = [
-            mstBgmRelease
-            for mstBgmRelease in mstBgmReleases
-            if mstBgmRelease.bgmId == mstBgm.id
-        ]
-        closed_message_ids = [release.closedMessageId for release in mstBgmRelease]
-        mstClosedMessage = [
-            mstClosedMessage
-            for mstClosedMessage in mstClosedMessages
-            if mstClosedMessage.id in closed_message_ids
-        ]
+        mstBgmRelease = release_index.get(mstBgm.id)
+        mstClosedMessage = closed_message_index.get_all(
+            release.closedMessageId for release in mstBgmRelease
+        )
         bgm_entity = BgmEntity(
             mstBgm=mstBgm,
             mstBgmRelease=mstBgmRelease,
@@ -1654,11 +1872,18 @@ async def get_shop_entities(
         conn, MstGift, all_gift_ids | replacement_gift_ids
     )
 
+    release_index = RowIndex(shop_releases, lambda release: release.shopId)
+    common_consume_index = RowIndex(common_consumes, lambda consume: consume.id)
+    common_release_index = RowIndex(common_releases, lambda release: release.id)
+    set_item_index = RowIndex(all_set_items, lambda set_item: set_item.id)
+    gift_add_index = RowIndex(all_gift_adds, lambda gift_add: gift_add.giftId)
+    gift_index = RowIndex(all_gifts, lambda gift: gift.id)
+
     entities: list[ShopEntity] = []
     for shop in shops:
         item_id = get_shop_cost_item_id(shop)
         set_items = (
-            [set_item for set_item in all_set_items if set_item.id in shop.targetIds]
+            set_item_index.get_all(shop.targetIds)
             if shop.purchaseType == PurchaseType.SET_ITEM
             else []
         )
@@ -1668,34 +1893,26 @@ async def get_shop_entities(
         for set_item in set_items:
             if set_item.purchaseType == PurchaseType.GIFT:
                 gift_ids.add(set_item.targetId)
-        gift_adds = [
-            gift_add for gift_add in all_gift_adds if gift_add.giftId in gift_ids
-        ]
+        gift_adds = gift_add_index.get_all(gift_ids)
         gift_ids |= {gift.priorGiftId for gift in gift_adds}
-        gifts = [gift for gift in all_gifts if gift.id in gift_ids]
+        gifts = gift_index.get_all(gift_ids)
         entities.append(
             ShopEntity(
                 mstShop=shop,
                 mstSetItem=set_items,
-                mstShopRelease=[
-                    release for release in shop_releases if release.shopId == shop.id
-                ],
+                mstShopRelease=release_index.get(shop.id),
                 mstShopScript=shop_script_map.get(shop.id),
                 mstItem=[item_map[item_id]] if item_id in item_map else [],
                 mstCommonConsume=(
-                    [
-                        consume
-                        for consume in common_consumes
-                        if consume.id in shop.itemIds
-                    ]
+                    common_consume_index.get_all(shop.itemIds)
                     if shop.payType == PayType.COMMON_CONSUME
                     else []
                 ),
-                mstCommonRelease=[
-                    release
-                    for release in common_releases
-                    if release.id == shop.freeShopCondId
-                ],
+                mstCommonRelease=(
+                    common_release_index.get(shop.freeShopCondId)
+                    if shop.freeShopCondId
+                    else []
+                ),
                 mstGift=gifts,
                 mstGiftAdd=gift_adds,
             )
@@ -2,8 +2,38 @@ from hashlib import sha1
 
 import orjson
 
+from ..schemas.common import Region
+from ..schemas.gameenums import QuestType
 from ..schemas.rayshift import Deck, QuestDetail
 
+# Drops of main story free quests only count the runs from these query IDs
+MAIN_FREE_MIN_QUERY_IDS = {
+    Region.JP: 154613,  # 2021-08-01 10:00:00 UTC
+    Region.NA: 1062363,  # 2022-07-04 09:00:00 UTC
+}
+# Same for the quests of war 1002
+WAR_1002_MIN_QUERY_IDS = {
+    Region.JP: 499538,  # 2022-01-02 00:00:00 UTC
+    Region.NA: 6481638,  # 2024-01-02 00:00:00 UTC
+}
+
+# The drop stats are kept per range of query IDs starting at these values so
+# any of the min query IDs above can be answered from them
+DROP_STATS_QUERY_ID_FROM = (
+    0,
+    *sorted({*MAIN_FREE_MIN_QUERY_IDS.values(), *WAR_1002_MIN_QUERY_IDS.values()}),
+)
+
+
+def get_rayshift_min_query_id(
+    region: Region, quest_type: int, war_id: int
+) -> int | None:
+    if quest_type in (QuestType.MAIN, QuestType.FREE) and war_id < 1000:
+        return MAIN_FREE_MIN_QUERY_IDS.get(region)
+    elif war_id == 1002:
+        return WAR_1002_MIN_QUERY_IDS.get(region)
+    return None
+
 
 def get_deck_hash_data(decks: list[Deck]) -> list[list[int]]:
     return [[svt.npcId for svt in deck.svts] for deck in decks]
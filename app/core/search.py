@@ -1,8 +1,6 @@
 from typing import Iterable, Optional, Union
 
 from fastapi import HTTPException
-from fuzzywuzzy import utils
-from Levenshtein import ratio
 from sqlalchemy.ext.asyncio import AsyncConnection
 
 from ..data.custom_mappings import CV_EN_TO_JP, ILLUSTRATOR_EN_TO_JP
@@ -65,7 +63,13 @@ from ..schemas.search import (
     SvtSearchQueryParams,
     TdSearchParams,
 )
-from .utils import get_np_name, get_translation
+from .name_index import (
+    NameIndexType,
+    match_search_name,
+    name_indexes,
+    process_name,
+)
+from .utils import get_translation
 
 INSUFFICIENT_QUERY = (
     "Insufficient query. Please check the docs for the required parameters."
@@ -84,65 +88,26 @@ def reverse_traits(traits: Iterable[Union[Trait, int]]) -> set[int]:
     return out_ints
 
 
-accent_from = "àáâäèéëíðñóöùúāēīŋōšαβḗḫ"
-accent_to__ = "aaaaeeeidnoouuaeinosabeh"
-translation_table = {ord(k): v for k, v in zip(accent_from, accent_to__, strict=True)}
-
-
-SPECIAL_REPLACE = {"artoria": "altria"}
-
-
 def match_name(search_param: str, name: str) -> bool:
-    """Modified from fuzzywuzzy.token_set_ratio"""
-    p1 = utils.full_process(search_param).translate(translation_table)
-    p2 = utils.full_process(name).translate(translation_table)
-
-    for k, v in SPECIAL_REPLACE.items():
-        p1 = p1.replace(k, v)
-        p2 = p2.replace(k, v)
-
-    if not utils.validate_string(p1):
-        return False
-    if not utils.validate_string(p2):
+    processed_search_param = process_name(search_param)
+    processed_name = process_name(name)
+    if processed_search_param is None or processed_name is None:
         return False
 
-    # Doesn't seem to be needed now but might be useful in the future
-    # ALTERNATIVE_DIVIDER = ["-", "="]
-    # for divider in ALTERNATIVE_DIVIDER:
-    #     p1 = p1.replace(divider, " ")
-    #     p2 = p2.replace(divider, " ")
-
-    if p1 in p2:
-        return True
-
-    # pull tokens
-    tokens1 = set(p1.split())
-    tokens2 = set(p2.split())
-
-    intersection = tokens1.intersection(tokens2)
-    diff1to2 = tokens1.difference(tokens2)
-    diff2to1 = tokens2.difference(tokens1)
+    return match_search_name(processed_search_param, processed_name)
 
-    sorted_sect = " ".join(sorted(intersection))
-    sorted_1to2 = " ".join(sorted(diff1to2))
-    sorted_2to1 = " ".join(sorted(diff2to1))
 
-    combined_1to2 = sorted_sect + " " + sorted_1to2
-    combined_2to1 = sorted_sect + " " + sorted_2to1
-
-    # strip
-    sorted_sect = sorted_sect.strip()
-    combined_1to2 = combined_1to2.strip()
-    combined_2to1 = combined_2to1.strip()
+async def search_names(
+    conn: AsyncConnection,
+    region: Region,
+    index_type: NameIndexType,
+    search_name: Optional[str],
+) -> Optional[set[int]]:
+    """IDs with a name matching search_name or None if there's no name search"""
+    if not search_name:
+        return None
 
-    NAME_MATCH_THRESHOLD = 0.8
-
-    # Use sorted_sect first so "Okita Souji (Alter)" works as expected
-    # This way "a b c" search_param will match to "a b c d e" but not vice versa
-    if sorted_sect:
-        return float(ratio(sorted_sect, combined_1to2)) > NAME_MATCH_THRESHOLD
-    else:
-        return float(ratio(combined_2to1, combined_1to2)) > NAME_MATCH_THRESHOLD
+    return await name_indexes.search(conn, region, index_type, search_name)
 
 
 async def search_servant(
@@ -202,17 +167,11 @@ async def search_servant(
         illustrator=illustrator,
         cv=cv,
         profile_contains=search_param.profileContains,
+        ids=await search_names(
+            conn, search_param.region, NameIndexType.SVT, search_param.name
+        ),
     )
 
-    if search_param.name:
-        matches = [
-            svt
-            for svt in matches
-            if match_name(search_param.name, svt.name)
-            or match_name(search_param.name, svt.ruby)
-            or match_name(search_param.name, get_translation(Language.en, svt.name))
-        ]
-
     if len(matches) > limit:
         raise HTTPException(status_code=403, detail=TOO_MANY_RESULTS.format(limit))
 
@@ -236,17 +195,11 @@ async def search_equip(
         excludeCollectionNo=search_param.excludeCollectionNo,
         rarity_ints=rarity,
         illustrator=search_param.illustrator,
+        ids=await search_names(
+            conn, search_param.region, NameIndexType.SVT, search_param.name
+        ),
     )
 
-    if search_param.name:
-        matches = [
-            svt
-            for svt in matches
-            if match_name(search_param.name, svt.name)
-            or match_name(search_param.name, svt.ruby)
-            or match_name(search_param.name, get_translation(Language.en, svt.name))
-        ]
-
     if len(matches) > limit:
         raise HTTPException(status_code=403, detail=TOO_MANY_RESULTS.format(limit))
 
@@ -275,17 +228,11 @@ async def search_skill(
         search_param.numFunctions,
         search_param.svalsContain,
         search_param.triggerSkillId,
+        await search_names(
+            conn, search_param.region, NameIndexType.SKILL, search_param.name
+        ),
     )
 
-    if search_param.name:
-        matches = [
-            skill
-            for skill in matches
-            if match_name(search_param.name, skill.name)
-            or match_name(search_param.name, skill.ruby)
-            or match_name(search_param.name, get_translation(Language.en, skill.name))
-        ]
-
     if len(matches) > limit:
         raise HTTPException(status_code=403, detail=TOO_MANY_RESULTS.format(limit))
 
@@ -314,17 +261,11 @@ async def search_td(
         search_param.maxNpNpGain,
         search_param.svalsContain,
         search_param.triggerSkillId,
+        await search_names(
+            conn, search_param.region, NameIndexType.TD, search_param.name
+        ),
     )
 
-    if search_param.name:
-        matches = [
-            td
-            for td in matches
-            if match_name(search_param.name, td.name)
-            or match_name(search_param.name, td.ruby)
-            or match_name(search_param.name, get_np_name(td.name, td.ruby, Language.en))
-        ]
-
     if len(matches) > limit:
         raise HTTPException(status_code=403, detail=TOO_MANY_RESULTS.format(limit))
 
@@ -344,18 +285,18 @@ async def search_buff(
     ckOpIndv = reverse_traits(search_param.ckOpIndv)
 
     matches = await get_buff_search(
-        conn, buff_types, search_param.buffGroup, vals, tvals, ckSelfIndv, ckOpIndv
+        conn,
+        buff_types,
+        search_param.buffGroup,
+        vals,
+        tvals,
+        ckSelfIndv,
+        ckOpIndv,
+        await search_names(
+            conn, search_param.region, NameIndexType.BUFF, search_param.name
+        ),
     )
 
-    if search_param.name:
-        matches = [
-            buff
-            for buff in matches
-            if match_name(search_param.name, buff.name)
-            or match_name(search_param.name, buff.detail)
-            or match_name(search_param.name, get_translation(Language.en, buff.name))
-        ]
-
     if len(matches) > limit:
         raise HTTPException(status_code=403, detail=TOO_MANY_RESULTS.format(limit))
 
@@ -422,16 +363,11 @@ async def search_item(
         item_type,
         bg_type,
         search_param.use,
+        await search_names(
+            conn, search_param.region, NameIndexType.ITEM, search_param.name
+        ),
     )
 
-    if search_param.name:
-        matches = [
-            item
-            for item in matches
-            if match_name(search_param.name, item.name)
-            or match_name(search_param.name, get_translation(Language.en, item.name))
-        ]
-
     return sorted(matches, key=lambda item: item.id)
 
 
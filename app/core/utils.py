@@ -1,7 +1,19 @@
 import re
 import string
+from collections import defaultdict
 from enum import Enum
-from typing import Any, Iterable, Literal, Optional, TypeVar, Union
+from operator import itemgetter
+from typing import (
+    Any,
+    Callable,
+    Generic,
+    Iterable,
+    Literal,
+    Mapping,
+    Optional,
+    TypeVar,
+    Union,
+)
 
 from pydantic import HttpUrl
 
@@ -134,3 +146,35 @@ TFlagEnum = TypeVar("TFlagEnum", bound=Enum)
 
 def get_flags(flag: int, flag_enums: dict[int, TFlagEnum]) -> list[TFlagEnum]:
     return [flag_value for flag_id, flag_value in flag_enums.items() if flag_id & flag]
+
+
+def get_values_by_keys(
+    mapping: Mapping[TLookup, TValue], keys: Iterable[TLookup]
+) -> list[TValue]:
+    """Values of `keys` in order, skipping keys not in `mapping`"""
+    return [mapping[key] for key in keys if key in mapping]
+
+
+class RowIndex(Generic[TLookup, TValue]):
+    """Rows grouped by a key.
+
+    Lookups return the matching rows in the order of `rows`, same as filtering
+    `rows` with `key(row) in keys`, without going through all the rows.
+    """
+
+    def __init__(
+        self, rows: Iterable[TValue], key: Callable[[TValue], TLookup]
+    ) -> None:
+        self.positions: defaultdict[TLookup, list[tuple[int, TValue]]] = defaultdict(
+            list
+        )
+        for position, row in enumerate(rows):
+            self.positions[key(row)].append((position, row))
+
+    def get(self, key: TLookup) -> list[TValue]:
+        return [row for _, row in self.positions.get(key, [])]
+
+    def get_all(self, keys: Iterable[TLookup]) -> list[TValue]:
+        matches = [match for key in set(keys) for match in self.positions.get(key, [])]
+        matches.sort(key=itemgetter(0))
+        return [row for _, row in matches]
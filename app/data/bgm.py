@@ -1,13 +1,11 @@
-from pydantic import DirectoryPath
-
 from ..schemas.raw import AssetStorageLine, MstBgm
-from .utils import load_master_data
+from .utils import MasterDataStore
 
 
 def get_bgms(
-    gamedata_path: DirectoryPath, asset_lines: list[AssetStorageLine]
+    master_data: MasterDataStore, asset_lines: list[AssetStorageLine]
 ) -> list[MstBgm]:
-    mstBgms = load_master_data(gamedata_path, MstBgm)
+    mstBgms = master_data.load(MstBgm)
 
     audio_locations = {
         asset_detail.fileName: asset_detail.path for asset_detail in asset_lines
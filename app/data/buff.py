@@ -1,16 +1,12 @@
-from pydantic import DirectoryPath
-
 from ..schemas.gameenums import BuffConvertType
 from ..schemas.raw import MstBuff, MstBuffConvert, MstClassRelationOverwrite
-from .utils import load_master_data
+from .utils import MasterDataStore
 
 
-def get_buff_with_classrelation(gamedata_path: DirectoryPath) -> dict[int, MstBuff]:
-    mstBuffs = {buff.id: buff for buff in load_master_data(gamedata_path, MstBuff)}
-    mstClassRelationOverwrites = load_master_data(
-        gamedata_path, MstClassRelationOverwrite
-    )
-    mstBuffConvert = load_master_data(gamedata_path, MstBuffConvert)
+def get_buff_with_classrelation(master_data: MasterDataStore) -> dict[int, MstBuff]:
+    mstBuffs = {buff.id: buff for buff in master_data.load(MstBuff)}
+    mstClassRelationOverwrites = master_data.get(MstClassRelationOverwrite)
+    mstBuffConvert = master_data.get(MstBuffConvert)
 
     for buff in mstBuffs.values():
         if "relationId" in buff.script:
@@ -2,10 +2,8 @@ from collections import defaultdict
 from dataclasses import dataclass
 from typing import DefaultDict
 
-from pydantic import DirectoryPath
-
 from ..schemas.raw import MstEvent, MstWar
-from .utils import load_master_data
+from .utils import MasterDataStore
 
 
 @dataclass
@@ -14,9 +12,9 @@ class EventWar:
     mstWars: list[MstWar]
 
 
-def get_event_with_warIds(gamedata_path: DirectoryPath) -> EventWar:
-    mstEvents = load_master_data(gamedata_path, MstEvent)
-    mstWars = load_master_data(gamedata_path, MstWar)
+def get_event_with_warIds(master_data: MasterDataStore) -> EventWar:
+    mstEvents = master_data.load(MstEvent)
+    mstWars = master_data.load(MstWar)
 
     event_names = {event.id: event.name for event in mstEvents if event.name != ""}
 
@@ -1,7 +1,5 @@
 from collections import defaultdict
 
-from pydantic import DirectoryPath
-
 from ..core.nice.base_script import get_script_url
 from ..schemas.common import NiceCostume, NiceValentineScript, Region
 from ..schemas.gameenums import CondType, PurchaseType, SvtType
@@ -19,7 +17,7 @@ from ..schemas.raw import (
     MstSvtLimitAdd,
     MstSvtSkill,
 )
-from .utils import load_master_data
+from .utils import MasterDataStore
 
 VALENTINE_NAME = {
     Region.NA: "Valentine",
@@ -44,19 +42,19 @@ def is_Mash_Valentine_equip(region: Region, comment: str) -> bool:
 
 
 def get_extra_svt_data(
-    region: Region, gamedata_path: DirectoryPath
+    region: Region, master_data: MasterDataStore
 ) -> list[MstSvtExtra]:
-    mstSvts = load_master_data(gamedata_path, MstSvt)
-    mstSvtLimitAdds = load_master_data(gamedata_path, MstSvtLimitAdd)
-    mstSvtLimits = load_master_data(gamedata_path, MstSvtLimit)
-    mstSkills = load_master_data(gamedata_path, MstSkill)
-    mstSvtSkills = load_master_data(gamedata_path, MstSvtSkill)
-    mstEvents = load_master_data(gamedata_path, MstEvent)
-    mstShops = load_master_data(gamedata_path, MstShop)
-    mstShopScripts = load_master_data(gamedata_path, MstShopScript)
-    mstShopReleases = load_master_data(gamedata_path, MstShopRelease)
-    mstSvtComments = load_master_data(gamedata_path, MstSvtComment)
-    mstSvtCostumes = load_master_data(gamedata_path, MstSvtCostume)
+    mstSvts = master_data.get(MstSvt)
+    mstSvtLimitAdds = master_data.get(MstSvtLimitAdd)
+    mstSvtLimits = master_data.get(MstSvtLimit)
+    mstSkills = master_data.get(MstSkill)
+    mstSvtSkills = master_data.get(MstSvtSkill)
+    mstEvents = master_data.get(MstEvent)
+    mstShops = master_data.get(MstShop)
+    mstShopScripts = master_data.get(MstShopScript)
+    mstShopReleases = master_data.get(MstShopRelease)
+    mstSvtComments = master_data.get(MstSvtComment)
+    mstSvtCostumes = master_data.get(MstSvtCostume)
 
     mstSkillId = {mstSkill.id: mstSkill for mstSkill in mstSkills}
     mstSvtId = {mstSvt.id: mstSvt for mstSvt in mstSvts}
@@ -1,11 +1,9 @@
-from pydantic import DirectoryPath
-
 from ..schemas.raw import MstGift
-from .utils import load_master_data
+from .utils import MasterDataStore
 
 
-def get_gift_with_index(gamedata_path: DirectoryPath) -> list[MstGift]:
-    mstGift = load_master_data(gamedata_path, MstGift)
+def get_gift_with_index(master_data: MasterDataStore) -> list[MstGift]:
+    mstGift = master_data.load(MstGift)
     gift_index: dict[tuple[int, int, int, int], int] = {}
 
     for gift in mstGift:
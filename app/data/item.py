@@ -1,7 +1,5 @@
 from collections import defaultdict
 
-from pydantic import DirectoryPath
-
 from ..schemas.gameenums import ItemType
 from ..schemas.raw import (
     BAD_COMBINE_SVT_LIMIT,
@@ -14,20 +12,18 @@ from ..schemas.raw import (
     MstItem,
     MstItemSelect,
 )
-from .utils import load_master_data
+from .utils import MasterDataStore
 
 
-def get_item_with_use(gamedata_path: DirectoryPath) -> list[MstItem]:
-    mstItem = load_master_data(gamedata_path, MstItem)
-    mstItemSelect = load_master_data(gamedata_path, MstItemSelect)
-    mstGift = load_master_data(gamedata_path, MstGift)
-    mstGiftAdd = load_master_data(gamedata_path, MstGiftAdd)
-    mstCombineSkill = load_master_data(gamedata_path, MstCombineSkill)
-    mstCombineAppendPassiveSkill = load_master_data(
-        gamedata_path, MstCombineAppendPassiveSkill
-    )
-    mstCombineLimit = load_master_data(gamedata_path, MstCombineLimit)
-    mstCombineCostume = load_master_data(gamedata_path, MstCombineCostume)
+def get_item_with_use(master_data: MasterDataStore) -> list[MstItem]:
+    mstItem = master_data.load(MstItem)
+    mstItemSelect = master_data.get(MstItemSelect)
+    mstGift = master_data.get(MstGift)
+    mstGiftAdd = master_data.get(MstGiftAdd)
+    mstCombineSkill = master_data.get(MstCombineSkill)
+    mstCombineAppendPassiveSkill = master_data.get(MstCombineAppendPassiveSkill)
+    mstCombineLimit = master_data.get(MstCombineLimit)
+    mstCombineCostume = master_data.get(MstCombineCostume)
 
     skill_items = {
         item_id for combine in mstCombineSkill for item_id in combine.itemIds
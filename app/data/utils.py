@@ -1,4 +1,4 @@
-from typing import Type, TypeVar
+from typing import Any, Callable, Type, TypeVar, cast
 
 import orjson
 from pydantic import DirectoryPath
@@ -50,6 +50,7 @@ from ..schemas.raw import (
 )
 
 PydanticModel = TypeVar("PydanticModel", bound=BaseModelORJson)
+T = TypeVar("T")
 
 
 MODEL_FILE_NAME: dict[Type[BaseModelORJson], str] = {
@@ -98,15 +99,52 @@ MODEL_FILE_NAME: dict[Type[BaseModelORJson], str] = {
 }
 
 
+class MasterDataStore:
+    """Master data of a gamedata repo, read once for all the loaders of a data load.
+
+    get_raw returns the items of a master file as they are in the JSON file,
+    which is enough and much faster for loaders that only read a few fields.
+    get validates them into the model once. Both are shared between the
+    loaders and must not be modified, use load to get models that can be.
+    """
+
+    def __init__(self, gamedata_path: DirectoryPath) -> None:
+        self.gamedata_path = gamedata_path
+        self.raw_data: dict[str, list[dict[str, Any]]] = {}
+        self.model_data: dict[Type[BaseModelORJson], list[BaseModelORJson]] = {}
+        self.derived_data: dict[Callable[[MasterDataStore], Any], Any] = {}
+
+    def get_raw(self, file_name: str) -> list[dict[str, Any]]:
+        if file_name not in self.raw_data:
+            file_loc = self.gamedata_path / "master" / f"{file_name}.json"
+            if file_loc.exists():
+                with open(file_loc, "rb") as fp:
+                    self.raw_data[file_name] = orjson.loads(fp.read())
+            else:
+                self.raw_data[file_name] = []
+
+        return self.raw_data[file_name]
+
+    def load(self, model: Type[PydanticModel]) -> list[PydanticModel]:
+        return [
+            model.model_validate(item) for item in self.get_raw(MODEL_FILE_NAME[model])
+        ]
+
+    def get(self, model: Type[PydanticModel]) -> list[PydanticModel]:
+        if model not in self.model_data:
+            self.model_data[model] = self.load(model)
+
+        return cast(list[PydanticModel], self.model_data[model])
+
+    def get_derived(self, func: Callable[["MasterDataStore"], T]) -> T:
+        """Result of func on the master data, computed once"""
+        if func not in self.derived_data:
+            self.derived_data[func] = func(self)
+
+        return cast(T, self.derived_data[func])
+
+
 def load_master_data(
     gamedata_path: DirectoryPath, model: Type[PydanticModel]
 ) -> list[PydanticModel]:
-    file_name = MODEL_FILE_NAME[model]
-    file_loc = gamedata_path / "master" / f"{file_name}.json"
-
-    if not file_loc.exists():
-        return []
-
-    with open(file_loc, "rb") as fp:
-        data = orjson.loads(fp.read())
-    return [model.model_validate(item) for item in data]
+    return MasterDataStore(gamedata_path).load(model)
@@ -1,34 +1,42 @@
+from collections import defaultdict
+from typing import Any, Iterable
+
 from sqlalchemy import Integer, Table
 from sqlalchemy.dialects.postgresql import ARRAY, array, array_agg
 from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncConnection
-from sqlalchemy.sql import cast, func, select
+from sqlalchemy.sql import Select, cast, func, literal, select
 
 from ...models.raw import mstAi, mstAiAct, mstAiField
 from ...schemas.raw import AiEntity
 
+INT4_MIN = -(2**31)
+INT4_MAX = 2**31 - 1
+
 
-async def get_ai_entity(
-    conn: AsyncConnection, ai_table: Table, ai_id: int
-) -> list[AiEntity]:
-    parent_ai = (
+def select_ai_entities(ai_table: Table, ai_ids: Any) -> Select[Any]:
+    """Select the AI entities of ai_ids, a list of IDs or a select of IDs"""
+    parent_table = ai_table.alias("parent_ai")
+    parent_ais = (
         select(
-            func.jsonb_build_object(
-                "svt" if ai_table is mstAi else "field",
-                func.coalesce(
-                    func.array_remove(array_agg(ai_table.c.id.distinct()), None),  # type: ignore[no-untyped-call]
-                    [],
-                ),
-                "field" if ai_table is mstAi else "svt",
-                cast(array([]), ARRAY(Integer)),
-            )
+            parent_table.c.avals[1].label("childId"),
+            array_agg(parent_table.c.id.distinct()).label("parentIds"),  # type: ignore[no-untyped-call]
         )
-        .select_from(ai_table)
-        .where(ai_table.c.avals[1] == ai_id)
-        .scalar_subquery()
+        .where(parent_table.c.avals[1].in_(ai_ids))
+        .group_by(parent_table.c.avals[1])
+        .cte("parent_ais")
+    )
+
+    parent_ai = func.jsonb_build_object(
+        "svt" if ai_table is mstAi else "field",
+        func.coalesce(parent_ais.c.parentIds, cast(array([]), ARRAY(Integer))),
+        "field" if ai_table is mstAi else "svt",
+        cast(array([]), ARRAY(Integer)),
     )
 
-    JOINED_AI_TABLES = ai_table.outerjoin(mstAiAct, ai_table.c.aiActId == mstAiAct.c.id)
+    JOINED_AI_TABLES = ai_table.outerjoin(
+        mstAiAct, ai_table.c.aiActId == mstAiAct.c.id
+    ).outerjoin(parent_ais, ai_table.c.id == parent_ais.c.childId)
 
     SELECT_AI_ENTITY = [
         ai_table.c.id,
@@ -38,24 +46,62 @@ async def get_ai_entity(
         parent_ai.label("parentAis"),
     ]
 
-    stmt = (
+    return (
         select(*SELECT_AI_ENTITY)
         .select_from(JOINED_AI_TABLES)
-        .where(ai_table.c.id == ai_id)
+        .where(ai_table.c.id.in_(ai_ids))
         .order_by(ai_table.c.id, ai_table.c.idx)
     )
+
+
+def select_ai_tree_ids(ai_table: Table, root_ids: list[int]) -> Select[Any]:
+    """Select the root AI IDs and the IDs linked from them through avals[0].
+
+    UNION drops the IDs already found so the recursion stops on cycles.
+    """
+    ai_ids = select(func.unnest(literal(root_ids, ARRAY(Integer))).label("id")).cte(
+        "ai_ids", recursive=True
+    )
+    linked_ai_ids = (
+        select(ai_table.c.avals[1])
+        .select_from(ai_table.join(ai_ids, ai_table.c.id == ai_ids.c.id))
+        .where(ai_table.c.avals[1] > 0)
+    )
+    ai_ids = ai_ids.union(linked_ai_ids)
+    return select(ai_ids.c.id)
+
+
+async def get_ai_tree_entities(
+    conn: AsyncConnection, ai_table: Table, root_ids: Iterable[int]
+) -> dict[int, list[AiEntity]]:
+    """Get the AI entities of the roots and of all the AIs they link to.
+
+    The AI trees of all the roots are fetched in one query. Returns the
+    entities by AI ID.
+    """
+    root_ids = sorted({ai_id for ai_id in root_ids if INT4_MIN <= ai_id <= INT4_MAX})
+    if not root_ids:
+        return {}
+
+    stmt = select_ai_entities(ai_table, select_ai_tree_ids(ai_table, root_ids))
     try:
-        return [
-            AiEntity.from_orm(ai_entity)
-            for ai_entity in (await conn.execute(stmt)).fetchall()
-        ]
+        rows = (await conn.execute(stmt)).fetchall()
     except DBAPIError:
-        return []
+        return {}
+
+    ai_entities: dict[int, list[AiEntity]] = defaultdict(list)
+    for row in rows:
+        ai_entities[row.id].append(AiEntity.from_orm(row))
+    return dict(ai_entities)
 
 
-async def get_svt_ai_entity(conn: AsyncConnection, ai_id: int) -> list[AiEntity]:
-    return await get_ai_entity(conn, mstAi, ai_id)
+async def get_svt_ai_trees(
+    conn: AsyncConnection, root_ids: Iterable[int]
+) -> dict[int, list[AiEntity]]:
+    return await get_ai_tree_entities(conn, mstAi, root_ids)
 
 
-async def get_field_ai_entity(conn: AsyncConnection, ai_id: int) -> list[AiEntity]:
-    return await get_ai_entity(conn, mstAiField, ai_id)
+async def get_field_ai_trees(
+    conn: AsyncConnection, root_ids: Iterable[int]
+) -> dict[int, list[AiEntity]]:
+    return await get_ai_tree_entities(conn, mstAiField, root_ids)
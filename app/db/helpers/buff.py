@@ -16,8 +16,11 @@ async def get_buff_search(
     tvals: Optional[Iterable[int]],
     ckSelfIndv: Optional[Iterable[int]],
     ckOpIndv: Optional[Iterable[int]],
+    ids: Optional[Iterable[int]] = None,
 ) -> list[MstBuff]:
     where_clause: list[_ColumnExpressionArgument[bool]] = [true()]
+    if ids is not None:
+        where_clause.append(mstBuff.c.id.in_(ids))
     if buff_types:
         where_clause.append(mstBuff.c.type.in_(buff_types))
     if buffGroup:
@@ -850,6 +850,12 @@ schema_table_fetch_all_multiple: dict[  # type:ignore
         mstImagePartsGroup.c.id,
         [mstImagePartsGroup.c.id, mstImagePartsGroup.c.idx],
     ),
+    MstFunc: (mstFunc, mstFunc.c.id, [mstFunc.c.id]),
+    MstFuncGroup: (
+        mstFuncGroup,
+        mstFuncGroup.c.funcId,
+        [mstFuncGroup.c.funcId, mstFuncGroup.c.eventId],
+    ),
 }
 
 TFetchAllMultiple = TypeVar("TFetchAllMultiple", bound=BaseModelORJson)
@@ -29,8 +29,11 @@ async def get_item_search(
     item_type: Optional[Iterable[int]],
     bg_type: Optional[Iterable[int]],
     uses: Optional[list[NiceItemUse]],
+    ids: Optional[Iterable[int]] = None,
 ) -> list[MstItem]:
     where_clause: list[_ColumnExpressionArgument[bool]] = [true()]
+    if ids is not None:
+        where_clause.append(mstItem.c.id.in_(ids))
     if individuality:
         where_clause.append(mstItem.c.individuality.contains(individuality))
     if item_type:
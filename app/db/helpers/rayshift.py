@@ -1,32 +1,32 @@
+from collections import Counter
 from dataclasses import dataclass
-from typing import Any, Optional
+from typing import Any, Iterable, Mapping, NamedTuple, Optional
 from typing import cast as typing_cast
 
-from sqlalchemy import BIGINT, ColumnElement, Integer, Table
+from sqlalchemy import BIGINT, ColumnElement, Executable, Integer, Table, delete
 from sqlalchemy.dialects.postgresql import JSONB, insert
 from sqlalchemy.engine import Connection
 from sqlalchemy.ext.asyncio import AsyncConnection
-from sqlalchemy.sql import Join, and_, case, cast, false, func, or_, select
+from sqlalchemy.sql import Join, and_, case, cast, func, select
 from sqlalchemy.sql._typing import _ColumnExpressionArgument
 from sqlalchemy.sql.elements import literal_column
 from sqlalchemy.sql.expression import text
 
-from ...core.rayshift import get_quest_enemy_hash
-from ...models.rayshift import rayshiftQuest, rayshiftQuestHash
+from ...core.rayshift import DROP_STATS_QUERY_ID_FROM, get_quest_enemy_hash
+from ...models.rayshift import (
+    rayshiftCutinDrop,
+    rayshiftDropStats,
+    rayshiftQuest,
+    rayshiftQuestHash,
+    rayshiftRun,
+    rayshiftRunStats,
+    rayshiftStageCutin,
+    rayshiftStatsQuery,
+)
 from ...schemas.rayshift import CutInSkill, QuestDetail, QuestDrop, QuestList, UserSvt
 from .utils import fetch_one
 
 
-def quest_select_or(questSelect: list[int]) -> ColumnElement[bool]:
-    return or_(
-        false(),
-        *[
-            rayshiftQuest.c.questDetail.contains({"questSelect": questSelectId})
-            for questSelectId in questSelect
-        ],
-    )
-
-
 async def get_rayshift_quest_db(
     conn: AsyncConnection,
     quest_id: int,
@@ -35,12 +35,11 @@ async def get_rayshift_quest_db(
     questHash: str | None = None,
 ) -> list[QuestDetail]:
     where_conds = [
-        rayshiftQuest.c.questId == quest_id,
-        rayshiftQuest.c.phase == phase,
-        rayshiftQuest.c.questDetail.isnot(None),
+        rayshiftRun.c.questId == quest_id,
+        rayshiftRun.c.phase == phase,
     ]
 
-    order_by = [rayshiftQuest.c.queryId.desc()]
+    order_by = [rayshiftRun.c.queryId.desc()]
 
     if questHash:
         where_conds.append(rayshiftQuestHash.c.questHash == questHash)
@@ -48,15 +47,15 @@ async def get_rayshift_quest_db(
         order_by = [rayshiftQuestHash.c.questHash.desc(), *order_by]
 
     if questSelect:
-        where_conds.append(quest_select_or(questSelect))
+        where_conds.append(rayshiftRun.c.questSelect.in_(questSelect))
 
     stmt = (
         select(rayshiftQuest.c.questDetail)
         .select_from(
-            rayshiftQuest.join(
+            rayshiftRun.join(
                 rayshiftQuestHash,
-                rayshiftQuest.c.queryId == rayshiftQuestHash.c.queryId,
-            )
+                rayshiftRun.c.queryId == rayshiftQuestHash.c.queryId,
+            ).join(rayshiftQuest, rayshiftRun.c.queryId == rayshiftQuest.c.queryId)
         )
         .where(and_(*where_conds))
     )
@@ -99,19 +98,19 @@ async def get_all_quest_hashes(
     conn: AsyncConnection, quest_id: int, phase: int, questSelect: list[int]
 ) -> list[str]:
     where_conds = [
-        rayshiftQuest.c.questId == quest_id,
-        rayshiftQuest.c.phase == phase,
+        rayshiftRun.c.questId == quest_id,
+        rayshiftRun.c.phase == phase,
     ]
 
     if questSelect:
-        where_conds.append(quest_select_or(questSelect))
+        where_conds.append(rayshiftRun.c.questSelect.in_(questSelect))
 
     stmt = (
         select(rayshiftQuestHash.c.questHash.distinct())
         .select_from(
             rayshiftQuestHash.join(
-                rayshiftQuest,
-                rayshiftQuestHash.c.queryId == rayshiftQuest.c.queryId,
+                rayshiftRun,
+                rayshiftQuestHash.c.queryId == rayshiftRun.c.queryId,
             )
         )
         .where(and_(*where_conds))
@@ -135,28 +134,36 @@ def get_rayshift_select(
     questSelect: list[int],
     questHash: str | None = None,
     min_query_id: int | None = None,
+    with_detail: bool = False,
 ) -> RayshiftSelect:
-    select_from: Table | Join = rayshiftQuest
+    """Select the runs with a quest detail from rayshiftRun.
+
+    Join rayshiftQuest with `with_detail` to read the quest details.
+    """
+    select_from: Table | Join = rayshiftRun
     where_conds: list[_ColumnExpressionArgument[bool]] = [
-        rayshiftQuest.c.questId == quest_id,
-        rayshiftQuest.c.phase == phase,
-        rayshiftQuest.c.questDetail.isnot(None),
+        rayshiftRun.c.questId == quest_id,
+        rayshiftRun.c.phase == phase,
     ]
 
+    if with_detail:
+        select_from = select_from.join(
+            rayshiftQuest, rayshiftRun.c.queryId == rayshiftQuest.c.queryId
+        )
     if min_query_id is not None:
-        where_conds.append(rayshiftQuest.c.queryId >= min_query_id)
+        where_conds.append(rayshiftRun.c.queryId >= min_query_id)
     if questHash:
         select_from = select_from.join(
-            rayshiftQuestHash, rayshiftQuest.c.queryId == rayshiftQuestHash.c.queryId
+            rayshiftQuestHash, rayshiftRun.c.queryId == rayshiftQuestHash.c.queryId
         )
         where_conds.append(rayshiftQuestHash.c.questHash == questHash)
     if questSelect:
-        where_conds.append(quest_select_or(questSelect))
+        where_conds.append(rayshiftRun.c.questSelect.in_(questSelect))
 
     return RayshiftSelect(select_from=select_from, where_conds=where_conds)
 
 
-async def get_rayshift_drops(
+async def get_rayshift_drops_from_details(
     conn: AsyncConnection,
     quest_id: int,
     phase: int,
@@ -170,6 +177,7 @@ async def get_rayshift_drops(
         questSelect=questSelect,
         questHash=questHash,
         min_query_id=min_query_id,
+        with_detail=True,
     )
     select_from = select_detail.select_from
     where_conds = select_detail.where_conds
@@ -354,6 +362,109 @@ async def get_rayshift_drops(
     return [QuestDrop.from_orm(row) for row in results.fetchall()]
 
 
+def get_stats_where_conds(
+    table: Table,
+    quest_id: int,
+    phase: int,
+    questSelect: list[int],
+    questHash: str | None = None,
+    min_query_id: int | None = None,
+) -> list[_ColumnExpressionArgument[bool]]:
+    where_conds: list[_ColumnExpressionArgument[bool]] = [
+        table.c.questId == quest_id,
+        table.c.phase == phase,
+    ]
+    if questHash:
+        where_conds.append(table.c.questHash == questHash)
+    if questSelect:
+        where_conds.append(table.c.questSelect.in_(questSelect))
+    if min_query_id is not None:
+        where_conds.append(table.c.queryIdFrom >= min_query_id)
+    return where_conds
+
+
+async def get_rayshift_drop_stats(
+    conn: AsyncConnection,
+    quest_id: int,
+    phase: int,
+    questSelect: list[int],
+    questHash: str | None = None,
+    min_query_id: int | None = None,
+) -> list[QuestDrop]:
+    runs = (
+        select(cast(func.coalesce(func.sum(rayshiftRunStats.c.runs), 0), BIGINT))
+        .where(
+            and_(
+                *get_stats_where_conds(
+                    rayshiftRunStats,
+                    quest_id,
+                    phase,
+                    questSelect,
+                    questHash,
+                    min_query_id,
+                )
+            )
+        )
+        .scalar_subquery()
+    )
+
+    group_by = [
+        rayshiftDropStats.c.stage,
+        rayshiftDropStats.c.deckType,
+        rayshiftDropStats.c.deckId,
+        rayshiftDropStats.c.type,
+        rayshiftDropStats.c.objectId,
+        rayshiftDropStats.c.originalNum,
+    ]
+
+    stmt = (
+        select(
+            *group_by,
+            runs.label("runs"),
+            cast(func.sum(rayshiftDropStats.c.dropCount), BIGINT).label("dropCount"),
+            cast(func.sum(rayshiftDropStats.c.sumDropCountSquared), BIGINT).label(
+                "sumDropCountSquared"
+            ),
+        )
+        .where(
+            and_(
+                *get_stats_where_conds(
+                    rayshiftDropStats,
+                    quest_id,
+                    phase,
+                    questSelect,
+                    questHash,
+                    min_query_id,
+                )
+            )
+        )
+        .group_by(*group_by)
+        # The whole run drops come after the enemy drops
+        .order_by(rayshiftDropStats.c.stage == -1, *group_by)
+    )
+
+    results = await conn.execute(stmt)
+    return [QuestDrop.from_orm(row) for row in results.fetchall()]
+
+
+async def get_rayshift_drops(
+    conn: AsyncConnection,
+    quest_id: int,
+    phase: int,
+    questSelect: list[int],
+    questHash: str | None = None,
+    min_query_id: int | None = None,
+) -> list[QuestDrop]:
+    if min_query_id is None or min_query_id in DROP_STATS_QUERY_ID_FROM:
+        return await get_rayshift_drop_stats(
+            conn, quest_id, phase, questSelect, questHash, min_query_id
+        )
+
+    return await get_rayshift_drops_from_details(
+        conn, quest_id, phase, questSelect, questHash, min_query_id
+    )
+
+
 async def get_all_support_servants(
     conn: AsyncConnection,
     quest_id: int,
@@ -368,6 +479,7 @@ async def get_all_support_servants(
         questSelect=questSelect,
         questHash=questHash,
         min_query_id=min_query_id,
+        with_detail=True,
     )
 
     user_svt_cte = (
@@ -410,15 +522,12 @@ async def quest_has_cutins(
     )
 
     stmt = (
-        select(func.count(rayshiftQuest.c.queryId).label("query_count"))
+        select(func.count(rayshiftRun.c.queryId).label("query_count"))
         .select_from(select_detail.select_from)
         .where(
             and_(
                 *select_detail.where_conds,
-                rayshiftQuest.c.questDetail["stageCutins"].is_not(None),
-                rayshiftQuest.c.questDetail["stageCutins"]
-                != literal_column("'null'::jsonb"),
-                func.jsonb_array_length(rayshiftQuest.c.questDetail["stageCutins"]) > 0,
+                rayshiftRun.c.stageCutinCount > 0,
             )
         )
     )
@@ -446,36 +555,21 @@ async def get_cutin_skills(
         min_query_id=min_query_id,
     )
 
-    cutins = (
-        select(
-            cast(
-                func.jsonb_array_elements(rayshiftQuest.c.questDetail["stageCutins"]),
-                JSONB,
-            ).label("stage_cutin")
-        )
-        .select_from(select_detail.select_from)
-        .where(and_(*select_detail.where_conds))
-        .cte(name="cutins")
-    )
-
-    skill_list = (
-        select(
-            cast(cutins.c.stage_cutin["wave"], Integer).label("stage"),
-            cast(cutins.c.stage_cutin["skillId"], Integer).label("skill_id"),
-        )
-        .select_from(cutins)
-        .cte(name="skill_list")
-    )
-
     stmt = (
         select(
-            skill_list.c.stage,
-            skill_list.c.skill_id,
-            func.count(skill_list.c.stage).label("appear_count"),
+            rayshiftStageCutin.c.stage,
+            rayshiftStageCutin.c.skillId.label("skill_id"),
+            func.count(rayshiftStageCutin.c.stage).label("appear_count"),
         )
-        .select_from(skill_list)
-        .group_by(skill_list.c.stage, skill_list.c.skill_id)
-        .order_by(skill_list.c.stage, skill_list.c.skill_id)
+        .select_from(
+            select_detail.select_from.join(
+                rayshiftStageCutin,
+                rayshiftRun.c.queryId == rayshiftStageCutin.c.queryId,
+            )
+        )
+        .where(and_(*select_detail.where_conds))
+        .group_by(rayshiftStageCutin.c.stage, rayshiftStageCutin.c.skillId)
+        .order_by(rayshiftStageCutin.c.stage, rayshiftStageCutin.c.skillId)
     )
 
     rows = (await conn.execute(stmt)).fetchall()
@@ -499,90 +593,144 @@ async def get_cutin_drops(
         min_query_id=min_query_id,
     )
 
-    cutins = (
-        select(
-            rayshiftQuest.c.queryId,
-            cast(
-                func.jsonb_array_elements(rayshiftQuest.c.questDetail["stageCutins"]),
-                JSONB,
-            ).label("stage_cutin"),
-        )
-        .select_from(select_detail.select_from)
-        .where(and_(*select_detail.where_conds))
-        .cte(name="cutins")
-    )
-
-    drops = (
-        select(
-            cutins.c.queryId,
-            cast(cutins.c.stage_cutin["wave"], Integer).label("stage"),
-            cast(
-                func.jsonb_array_elements(cutins.c.stage_cutin["dropInfos"]), JSONB
-            ).label("drops"),
-        )
-        .select_from(cutins)
-        .cte(name="drop_infos")
-    )
-
-    all_drops = select(
-        drops.c.queryId,
-        drops.c.stage,
-        drops.c.drops["type"].label("type"),
-        drops.c.drops["objectId"].label("objectId"),
-        drops.c.drops["originalNum"].label("originalNum"),
-    ).cte(name="all_drops")
-
-    run_drop_items = (
-        select(
-            all_drops.c.queryId,
-            all_drops.c.stage,
-            all_drops.c.type,
-            all_drops.c.objectId,
-            all_drops.c.originalNum,
-            func.count(all_drops.c.objectId).label("dropCount"),
-        )
-        .group_by(
-            all_drops.c.queryId,
-            all_drops.c.stage,
-            all_drops.c.type,
-            all_drops.c.objectId,
-            all_drops.c.originalNum,
-        )
-        .cte(name="run_drop_items")
-    )
+    group_by = [
+        rayshiftCutinDrop.c.stage,
+        rayshiftCutinDrop.c.type,
+        rayshiftCutinDrop.c.objectId,
+        rayshiftCutinDrop.c.originalNum,
+    ]
 
     run_drops = (
         select(
-            run_drop_items.c.stage,
+            rayshiftCutinDrop.c.stage,
             literal_column("'enemy'").label("deckType"),
             literal_column("-2").label("deckId"),
-            run_drop_items.c.type,
-            run_drop_items.c.objectId,
-            run_drop_items.c.originalNum,
+            rayshiftCutinDrop.c.type,
+            rayshiftCutinDrop.c.objectId,
+            rayshiftCutinDrop.c.originalNum,
             literal_column(f"{runs if runs else -2}").label("runs"),
-            func.sum(run_drop_items.c.dropCount).label("dropCount"),
-            cast(func.sum(func.power(run_drop_items.c.dropCount, 2)), BIGINT).label(
+            func.sum(rayshiftCutinDrop.c.dropCount).label("dropCount"),
+            cast(func.sum(func.power(rayshiftCutinDrop.c.dropCount, 2)), BIGINT).label(
                 "sumDropCountSquared"
             ),
         )
-        .group_by(
-            run_drop_items.c.stage,
-            run_drop_items.c.type,
-            run_drop_items.c.objectId,
-            run_drop_items.c.originalNum,
-        )
-        .order_by(
-            run_drop_items.c.stage,
-            run_drop_items.c.type,
-            run_drop_items.c.objectId,
-            run_drop_items.c.originalNum,
+        .select_from(
+            select_detail.select_from.join(
+                rayshiftCutinDrop,
+                rayshiftRun.c.queryId == rayshiftCutinDrop.c.queryId,
+            )
         )
+        .where(and_(*select_detail.where_conds))
+        .group_by(*group_by)
+        .order_by(*group_by)
     )
 
     rows = (await conn.execute(run_drops)).fetchall()
     return [QuestDrop.from_orm(row) for row in rows]
 
 
+class RayshiftRunRows(NamedTuple):
+    runs: list[dict[str, Any]]
+    stage_cutins: list[dict[str, Any]]
+    cutin_drops: list[dict[str, Any]]
+
+
+def get_rayshift_run_rows(quest_rows: Iterable[Mapping[str, Any]]) -> RayshiftRunRows:
+    """Extract the rayshiftRun, rayshiftStageCutin and rayshiftCutinDrop rows.
+
+    quest_rows are rayshiftQuest rows with the questDetail JSON.
+    """
+    run_rows = RayshiftRunRows([], [], [])
+    for quest_row in quest_rows:
+        query_id = quest_row["queryId"]
+        quest_detail = quest_row["questDetail"]
+        stage_cutins = quest_detail.get("stageCutins") or []
+
+        run_rows.runs.append(
+            {
+                "queryId": query_id,
+                "questId": quest_row["questId"],
+                "phase": quest_row["phase"],
+                "questSelect": quest_detail["questSelect"],
+                "stageCutinCount": len(stage_cutins),
+            }
+        )
+
+        drop_counts: Counter[tuple[int, int, int, int]] = Counter()
+        for cutin_index, stage_cutin in enumerate(stage_cutins):
+            run_rows.stage_cutins.append(
+                {
+                    "queryId": query_id,
+                    "cutinIndex": cutin_index,
+                    "stage": stage_cutin["wave"],
+                    "skillId": stage_cutin["skillId"],
+                }
+            )
+            for drop in stage_cutin["dropInfos"]:
+                drop_counts[
+                    (
+                        stage_cutin["wave"],
+                        drop["type"],
+                        drop["objectId"],
+                        drop["originalNum"],
+                    )
+                ] += 1
+
+        run_rows.cutin_drops.extend(
+            [
+                {
+                    "queryId": query_id,
+                    "stage": stage,
+                    "type": drop_type,
+                    "objectId": object_id,
+                    "originalNum": original_num,
+                    "dropCount": drop_count,
+                }
+                for (
+                    stage,
+                    drop_type,
+                    object_id,
+                    original_num,
+                ), drop_count in drop_counts.items()
+            ]
+        )
+
+    return run_rows
+
+
+insert_run_stmt = insert(rayshiftRun)
+do_update_run_stmt = insert_run_stmt.on_conflict_do_update(
+    index_elements=[rayshiftRun.c.queryId],
+    set_={
+        column: insert_run_stmt.excluded[column.name]
+        for column in rayshiftRun.columns
+        if not column.primary_key
+    },
+)
+
+
+def get_update_run_stmts(
+    quest_rows: list[dict[str, Any]],
+) -> list[tuple[Executable, list[dict[str, Any]] | None]]:
+    """Statements to replace the extracted rows of the runs, with their data"""
+    run_rows = get_rayshift_run_rows(quest_rows)
+    query_ids = [run["queryId"] for run in run_rows.runs]
+
+    stmts: list[tuple[Executable, list[dict[str, Any]] | None]] = [
+        (delete(table).where(table.c.queryId.in_(query_ids)), None)
+        for table in (rayshiftStageCutin, rayshiftCutinDrop)
+    ]
+    for stmt, data in (
+        (do_update_run_stmt, run_rows.runs),
+        (insert(rayshiftStageCutin), run_rows.stage_cutins),
+        (insert(rayshiftCutinDrop), run_rows.cutin_drops),
+    ):
+        if data:
+            stmts.append((stmt, data))
+
+    return stmts
+
+
 insert_quest_stmt = insert(rayshiftQuest)
 do_update_quest_stmt = insert_quest_stmt.on_conflict_do_update(
     index_elements=[rayshiftQuest.c.queryId],
@@ -613,6 +761,8 @@ async def insert_rayshift_quest_db(
 ) -> None:
     data = get_insert_rayshift_quest_data(quest_details)
     await conn.execute(do_update_quest_stmt, data)
+    for stmt, run_data in get_update_run_stmts(data):
+        await conn.execute(stmt, run_data)
 
 
 def insert_rayshift_quest_db_sync(
@@ -620,6 +770,8 @@ def insert_rayshift_quest_db_sync(
 ) -> None:
     data = get_insert_rayshift_quest_data(quest_details)
     conn.execute(do_update_quest_stmt, data)
+    for stmt, run_data in get_update_run_stmts(data):
+        conn.execute(stmt, run_data)
 
 
 def get_insert_rayshift_quest_hash_data(
@@ -646,6 +798,7 @@ async def insert_rayshift_quest_hash_db(
 ) -> None:
     data = get_insert_rayshift_quest_hash_data(quest_details)
     await conn.execute(do_update_quest_hash_stmt, data)
+    await update_rayshift_stats(conn, list(quest_details))
 
 
 def insert_rayshift_quest_hash_db_sync(
@@ -653,6 +806,275 @@ def insert_rayshift_quest_hash_db_sync(
 ) -> None:
     data = get_insert_rayshift_quest_hash_data(quest_details)
     conn.execute(do_update_quest_hash_stmt, data)
+    update_rayshift_stats_sync(conn, list(quest_details))
+
+
+def get_query_id_from(query_id: ColumnElement[int]) -> ColumnElement[int]:
+    return case(
+        *[
+            (query_id >= query_id_from, query_id_from)
+            for query_id_from in reversed(DROP_STATS_QUERY_ID_FROM[1:])
+        ],
+        else_=DROP_STATS_QUERY_ID_FROM[0],
+    )
+
+
+def get_stats_key_columns() -> list[ColumnElement[Any]]:
+    return [
+        rayshiftQuest.c.questId,
+        rayshiftQuest.c.phase,
+        rayshiftQuestHash.c.questHash,
+        rayshiftQuest.c.questDetail["questSelect"].as_integer().label("questSelect"),
+        get_query_id_from(rayshiftQuest.c.queryId).label("queryIdFrom"),
+    ]
+
+
+STATS_KEYS = ["questId", "phase", "questHash", "questSelect", "queryIdFrom"]
+DROP_KEYS = ["stage", "deckType", "deckId", "type", "objectId", "originalNum"]
+
+
+def get_count_stats_query_stmt(query_ids: list[int]) -> Any:
+    """Mark the runs as counted and return those that weren't counted yet"""
+    runs = (
+        select(rayshiftQuest.c.queryId)
+        .select_from(
+            rayshiftQuest.join(
+                rayshiftQuestHash,
+                rayshiftQuest.c.queryId == rayshiftQuestHash.c.queryId,
+            )
+        )
+        .where(
+            and_(
+                rayshiftQuest.c.queryId.in_(query_ids),
+                rayshiftQuest.c.questDetail.isnot(None),
+            )
+        )
+    )
+    return (
+        insert(rayshiftStatsQuery)
+        .from_select(["queryId"], runs)
+        .on_conflict_do_nothing(index_elements=[rayshiftStatsQuery.c.queryId])
+        .returning(rayshiftStatsQuery.c.queryId)
+    )
+
+
+def get_upsert_run_stats_stmt(query_ids: list[int]) -> Any:
+    key_columns = get_stats_key_columns()
+    runs = (
+        select(*key_columns, func.count(rayshiftQuest.c.queryId).label("runs"))
+        .select_from(
+            rayshiftQuest.join(
+                rayshiftQuestHash,
+                rayshiftQuest.c.queryId == rayshiftQuestHash.c.queryId,
+            )
+        )
+        .where(rayshiftQuest.c.queryId.in_(query_ids))
+        .group_by(*key_columns)
+    )
+    insert_stmt = insert(rayshiftRunStats).from_select([*STATS_KEYS, "runs"], runs)
+    return insert_stmt.on_conflict_do_update(
+        index_elements=STATS_KEYS,
+        set_={
+            rayshiftRunStats.c.runs: rayshiftRunStats.c.runs + insert_stmt.excluded.runs
+        },
+    )
+
+
+def get_upsert_drop_stats_stmt(query_ids: list[int]) -> Any:
+    key_columns = get_stats_key_columns()
+    select_from = rayshiftQuest.join(
+        rayshiftQuestHash, rayshiftQuest.c.queryId == rayshiftQuestHash.c.queryId
+    )
+
+    deck_svts = [
+        select(
+            *key_columns,
+            rayshiftQuest.c.queryId,
+            literal_column(f"'{deck_type}'").label("deckType"),
+            func.jsonb_array_elements(
+                literal_column("d.deck->'svts'"), type_=JSONB
+            ).label("deck_svt"),
+            literal_column("d.stage").label("stage"),
+        )
+        .select_from(
+            select_from,
+            text(
+                f'jsonb_array_elements("rayshiftQuest"."questDetail"->\'{deck}\') '
+                "with ordinality as d(deck, stage)"
+            ),
+        )
+        .where(rayshiftQuest.c.queryId.in_(query_ids))
+        for deck_type, deck in (("enemy", "enemyDeck"), ("shift", "shiftDeck"))
+    ]
+    deck_svt = deck_svts[0].union_all(deck_svts[1]).cte(name="deck_svt")
+
+    drops = (
+        select(
+            *[deck_svt.c[key] for key in STATS_KEYS],
+            deck_svt.c.queryId,
+            deck_svt.c.deckType,
+            deck_svt.c.stage,
+            cast(deck_svt.c.deck_svt["id"].astext, Integer).label("deckId"),
+            func.jsonb_array_elements(
+                deck_svt.c.deck_svt["dropInfos"], type_=JSONB
+            ).label("drops"),
+        )
+        .where(literal_column("deck_svt.deck_svt->'dropInfos' != 'null'::JSONB"))
+        .cte(name="drops")
+    )
+
+    all_drops = (
+        select(
+            *[drops.c[key] for key in STATS_KEYS],
+            drops.c.queryId,
+            drops.c.stage,
+            drops.c.deckType,
+            drops.c.deckId,
+            drops.c.drops["type"].as_integer().label("type"),
+            drops.c.drops["objectId"].as_integer().label("objectId"),
+            drops.c.drops["originalNum"].as_integer().label("originalNum"),
+        )
+        .where(drops.c.drops["isRateUp"] != literal_column("'true'::JSONB"))
+        .cte(name="all_drops")
+    )
+
+    def get_drop_stats(run_keys: list[str]) -> Any:
+        """Sum the drop counts of each run grouped by run_keys"""
+        run_group_by = [
+            *[all_drops.c[key] for key in STATS_KEYS],
+            all_drops.c.queryId,
+            *[all_drops.c[key] for key in run_keys],
+        ]
+        run_drops = (
+            select(*run_group_by, func.count().label("dropCount"))
+            .group_by(*run_group_by)
+            .subquery()
+        )
+        group_by = [
+            *[run_drops.c[key] for key in STATS_KEYS],
+            *[run_drops.c[key] for key in run_keys],
+        ]
+        drop_columns = {key: run_drops.c[key] for key in run_keys}
+        return select(
+            *[run_drops.c[key] for key in STATS_KEYS],
+            drop_columns.get("stage", literal_column("-1")).label("stage"),
+            drop_columns.get("deckType", literal_column("'enemy'")).label("deckType"),
+            drop_columns.get("deckId", literal_column("-1")).label("deckId"),
+            run_drops.c.type,
+            run_drops.c.objectId,
+            run_drops.c.originalNum,
+            cast(func.sum(run_drops.c.dropCount), BIGINT).label("dropCount"),
+            cast(func.sum(func.power(run_drops.c.dropCount, 2)), BIGINT).label(
+                "sumDropCountSquared"
+            ),
+        ).group_by(*group_by)
+
+    enemy_drops = get_drop_stats(DROP_KEYS)
+    run_drops = get_drop_stats(["type", "objectId", "originalNum"])
+
+    insert_stmt = insert(rayshiftDropStats).from_select(
+        [*STATS_KEYS, *DROP_KEYS, "dropCount", "sumDropCountSquared"],
+        enemy_drops.union_all(run_drops),
+    )
+    return insert_stmt.on_conflict_do_update(
+        index_elements=[*STATS_KEYS, *DROP_KEYS],
+        set_={
+            rayshiftDropStats.c.dropCount: rayshiftDropStats.c.dropCount
+            + insert_stmt.excluded.dropCount,
+            rayshiftDropStats.c.sumDropCountSquared: (
+                rayshiftDropStats.c.sumDropCountSquared
+                + insert_stmt.excluded.sumDropCountSquared
+            ),
+        },
+    )
+
+
+async def update_rayshift_stats(conn: AsyncConnection, query_ids: list[int]) -> None:
+    """Add the runs that have a quest detail and hash to the drop stats.
+
+    Runs already added are skipped so a run is only counted once.
+    """
+    if not query_ids:
+        return
+    res = await conn.execute(get_count_stats_query_stmt(query_ids))
+    new_query_ids = [row.queryId for row in res.fetchall()]
+    if new_query_ids:
+        await conn.execute(get_upsert_run_stats_stmt(new_query_ids))
+        await conn.execute(get_upsert_drop_stats_stmt(new_query_ids))
+
+
+def update_rayshift_stats_sync(conn: Connection, query_ids: list[int]) -> None:
+    if not query_ids:
+        return
+    res = conn.execute(get_count_stats_query_stmt(query_ids))
+    new_query_ids = [row.queryId for row in res.fetchall()]
+    if new_query_ids:
+        conn.execute(get_upsert_run_stats_stmt(new_query_ids))
+        conn.execute(get_upsert_drop_stats_stmt(new_query_ids))
+
+
+def update_rayshift_runs_sync(conn: Connection, query_ids: list[int]) -> None:
+    stmt = select(
+        rayshiftQuest.c.queryId,
+        rayshiftQuest.c.questId,
+        rayshiftQuest.c.phase,
+        rayshiftQuest.c.questDetail,
+    ).where(
+        and_(
+            rayshiftQuest.c.queryId.in_(query_ids),
+            rayshiftQuest.c.questDetail.is_not(None),
+        )
+    )
+    quest_rows = [row._asdict() for row in conn.execute(stmt).fetchall()]
+    for update_stmt, run_data in get_update_run_stmts(quest_rows):
+        conn.execute(update_stmt, run_data)
+
+
+def fetch_missing_run_query_ids(conn: Connection, limit: int) -> list[int]:
+    stmt = (
+        select(rayshiftQuest.c.queryId)
+        .select_from(
+            rayshiftQuest.join(
+                rayshiftRun,
+                rayshiftQuest.c.queryId == rayshiftRun.c.queryId,
+                isouter=True,
+            )
+        )
+        .where(
+            and_(
+                rayshiftRun.c.queryId.is_(None),
+                rayshiftQuest.c.questDetail.is_not(None),
+            )
+        )
+        .order_by(rayshiftQuest.c.queryId)
+        .limit(limit)
+    )
+    return [row.queryId for row in conn.execute(stmt).fetchall()]
+
+
+def fetch_uncounted_stats_query_ids(conn: Connection, limit: int) -> list[int]:
+    stmt = (
+        select(rayshiftQuest.c.queryId)
+        .select_from(
+            rayshiftQuest.join(
+                rayshiftQuestHash,
+                rayshiftQuest.c.queryId == rayshiftQuestHash.c.queryId,
+            ).join(
+                rayshiftStatsQuery,
+                rayshiftQuest.c.queryId == rayshiftStatsQuery.c.queryId,
+                isouter=True,
+            )
+        )
+        .where(
+            and_(
+                rayshiftStatsQuery.c.queryId.is_(None),
+                rayshiftQuest.c.questDetail.is_not(None),
+            )
+        )
+        .order_by(rayshiftQuest.c.queryId)
+        .limit(limit)
+    )
+    return [row.queryId for row in conn.execute(stmt).fetchall()]
 
 
 def insert_rayshift_quest_list(conn: Connection, quest_list: list[QuestList]) -> None:
@@ -4,7 +4,14 @@ from sqlalchemy.ext.asyncio import AsyncConnection
 from sqlalchemy.sql import and_, func, literal_column, select
 from sqlalchemy.sql._typing import _ColumnExpressionArgument
 
-from ...models.raw import ScriptFileList, mstMap, mstQuest, mstSpot, mstWar
+from ...models.raw import (
+    ScriptContent,
+    ScriptFileList,
+    mstMap,
+    mstQuest,
+    mstSpot,
+    mstWar,
+)
 from ...schemas.raw import ScriptEntity, ScriptSearchResult
 from .quest import get_quest_entity
 
@@ -12,9 +19,12 @@ from .quest import get_quest_entity
 async def get_script(conn: AsyncConnection, script_id: str) -> Optional[ScriptEntity]:
     stmt = select(
         ScriptFileList.c.scriptFileName,
-        func.octet_length(ScriptFileList.c.rawScript).label("scriptSizeBytes"),
+        func.octet_length(ScriptContent.c.rawScript).label("scriptSizeBytes"),
         ScriptFileList.c.questId,
-    ).where(ScriptFileList.c.scriptFileName == script_id)
+    ).where(
+        ScriptFileList.c.scriptFileName == script_id,
+        ScriptContent.c.rawScriptSHA1 == ScriptFileList.c.rawScriptSHA1,
+    )
 
     rows = (await conn.execute(stmt)).fetchall()
 
@@ -41,15 +51,18 @@ async def get_script_search(
     limit_result: int = 50,
 ) -> list[ScriptSearchResult]:
     if raw_script:
-        search_field = ScriptFileList.c.rawScript
+        search_field = ScriptContent.c.rawScript
     else:
-        search_field = ScriptFileList.c.textScript
+        search_field = ScriptContent.c.textScript
 
     where_conds: list[_ColumnExpressionArgument[bool]] = [
         search_field.op("&@~")(search_query)
     ]
 
-    score = func.pgroonga_score(literal_column("tableoid"), literal_column("ctid"))
+    score = func.pgroonga_score(
+        literal_column(f'"{ScriptContent.name}".tableoid'),
+        literal_column(f'"{ScriptContent.name}".ctid'),
+    )
     snippets = func.pgroonga_snippet_html(
         search_field, func.pgroonga_query_extract_keywords(search_query)
     )
@@ -77,6 +90,12 @@ async def get_script_search(
             score.label("score"),
             snippets.label("snippets"),
         )
+        .select_from(
+            ScriptContent.join(
+                ScriptFileList,
+                ScriptFileList.c.rawScriptSHA1 == ScriptContent.c.rawScriptSHA1,
+            )
+        )
         .where(and_(*where_conds))
         .order_by(score.desc())
         .limit(limit_result)
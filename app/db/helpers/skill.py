@@ -1,9 +1,9 @@
-from typing import Iterable, Optional
+from typing import Any, Iterable, Optional
 
 from sqlalchemy.dialects.postgresql import aggregate_order_by, array_agg
 from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncConnection
-from sqlalchemy.sql import and_, func, or_, select
+from sqlalchemy.sql import Select, and_, func, or_, select
 
 from ...models.raw import (
     mstAi,
@@ -21,21 +21,20 @@ from ...models.raw import (
     mstSvtSkillRelease,
 )
 from ...schemas.raw import MstSkill, MstSvtSkill, SkillEntityNoReverse
-from .utils import sql_jsonb_agg
+from .utils import get_lv_table, sql_jsonb_agg
 
 
-async def get_skillEntity(
-    conn: AsyncConnection, skill_ids: Iterable[int]
-) -> list[SkillEntityNoReverse]:
+def select_skill_entity(skill_ids: Iterable[int], expand: bool = True) -> Select[Any]:
+    skillLv = get_lv_table(mstSkillLv, expand)
     mstSkillLvJson = (
         select(
-            mstSkillLv.c.skillId,
+            skillLv.c.skillId,
             func.jsonb_agg(
-                aggregate_order_by(mstSkillLv.table_valued(), mstSkillLv.c.lv)
+                aggregate_order_by(skillLv.table_valued(), skillLv.c.lv)
             ).label(mstSkillLv.name),
         )
-        .where(mstSkillLv.c.skillId.in_(skill_ids))
-        .group_by(mstSkillLv.c.skillId)
+        .where(skillLv.c.skillId.in_(skill_ids))
+        .group_by(skillLv.c.skillId)
         .cte()
     )
 
@@ -114,7 +113,7 @@ async def get_skillEntity(
         aiIds.c.aiIds,
     ]
 
-    stmt = (
+    return (
         select(*SELECT_SKILL_ENTITY)
         .select_from(JOINED_SKILL_TABLES)
         .where(mstSkill.c.id.in_(skill_ids))
@@ -126,6 +125,11 @@ async def get_skillEntity(
         )
     )
 
+
+async def get_skillEntity(
+    conn: AsyncConnection, skill_ids: Iterable[int], expand: bool = True
+) -> list[SkillEntityNoReverse]:
+    stmt = select_skill_entity(skill_ids, expand)
     try:
         skill_entities = [
             SkillEntityNoReverse.from_orm(skill)
@@ -154,8 +158,11 @@ async def get_skill_search(
     numFunctions: Optional[Iterable[int]],
     svalsContain: str | None,
     triggerSkillId: Iterable[int] | None,
+    ids: Iterable[int] | None = None,
 ) -> list[MstSkill]:
     where_clause = [mstSkillLv.c.lv == 1]
+    if ids is not None:
+        where_clause.append(mstSkill.c.id.in_(ids))
     if skillType:
         where_clause.append(mstSkill.c.type.in_(skillType))
     if num:
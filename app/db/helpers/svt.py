@@ -1,32 +1,110 @@
 from dataclasses import dataclass
-from typing import Iterable, Optional, Union
+from typing import Any, Iterable, Optional, Union
 
-from sqlalchemy import Table
+from sqlalchemy import Integer, Table
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncConnection
-from sqlalchemy.sql import Join, and_, not_, or_, select, true
+from sqlalchemy.sql import (
+    ColumnElement,
+    Join,
+    Select,
+    and_,
+    cast,
+    func,
+    not_,
+    or_,
+    select,
+    true,
+)
 from sqlalchemy.sql._typing import _ColumnExpressionArgument
 
 from ...models.raw import (
+    mstBattlePoint,
+    mstBattlePointPhase,
+    mstCombineAppendPassiveSkill,
+    mstCombineCostume,
+    mstCombineLimit,
+    mstCombineMaterial,
+    mstCombineSkill,
     mstCv,
+    mstFriendship,
+    mstFriendshipSvt,
+    mstGift,
+    mstGiftAdd,
     mstIllustrator,
+    mstImagePartsGroup,
     mstSubtitle,
     mstSvt,
+    mstSvtAdd,
+    mstSvtAppendPassiveSkill,
+    mstSvtAppendPassiveSkillUnlock,
+    mstSvtBattlePoint,
+    mstSvtCard,
+    mstSvtCardAdd,
+    mstSvtChange,
+    mstSvtCoin,
     mstSvtComment,
+    mstSvtCommentAdd,
+    mstSvtCostume,
+    mstSvtExp,
+    mstSvtExtra,
     mstSvtGroup,
     mstSvtIndividuality,
     mstSvtLimit,
     mstSvtLimitAdd,
+    mstSvtLimitImage,
+    mstSvtMultiPortrait,
+    mstSvtOverwrite,
+    mstSvtPassiveSkill,
     mstSvtScript,
+    mstSvtSkill,
+    mstSvtTreasureDevice,
     mstSvtVoice,
     mstVoicePlayCond,
 )
+from ...schemas.base import BaseModelORJson
 from ...schemas.gameenums import CondType, SvtType, VoiceCondType
 from ...schemas.raw import (
     GlobalNewMstSubtitle,
+    MstBattlePoint,
+    MstBattlePointPhase,
+    MstCombineAppendPassiveSkill,
+    MstCombineCostume,
+    MstCombineLimit,
+    MstCombineMaterial,
+    MstCombineSkill,
+    MstCv,
+    MstFriendship,
+    MstFriendshipSvt,
+    MstGift,
+    MstGiftAdd,
+    MstIllustrator,
+    MstImagePartsGroup,
     MstSvt,
+    MstSvtAdd,
+    MstSvtAppendPassiveSkill,
+    MstSvtAppendPassiveSkillUnlock,
+    MstSvtBattlePoint,
+    MstSvtCard,
+    MstSvtCardAdd,
+    MstSvtChange,
+    MstSvtCoin,
+    MstSvtComment,
+    MstSvtCommentAdd,
+    MstSvtCostume,
+    MstSvtExp,
+    MstSvtExtra,
+    MstSvtIndividuality,
+    MstSvtLimit,
     MstSvtLimitAdd,
+    MstSvtLimitImage,
+    MstSvtMultiPortrait,
+    MstSvtOverwrite,
+    MstSvtPassiveSkill,
     MstSvtScript,
+    MstSvtSkill,
+    MstSvtTreasureDevice,
     MstSvtVoice,
     MstVoicePlayCond,
 )
@@ -113,6 +191,274 @@ async def get_svt_limit_add(
     ]
 
 
+svt_battle_point_ids = (
+    select(mstSvtBattlePoint.c.battlePointId)
+    .where(mstSvtBattlePoint.c.svtId == mstSvt.c.id)
+    .correlate(mstSvt)
+)
+svt_friendship_gift_ids = (
+    select(mstFriendshipSvt.c.giftId)
+    .where(mstFriendshipSvt.c.svtId == mstSvt.c.id)
+    .correlate(mstSvt)
+)
+svt_prior_gift_ids = select(mstGiftAdd.c.priorGiftId).where(
+    mstGiftAdd.c.giftId.in_(svt_friendship_gift_ids)
+)
+
+# table, where clause correlated with mstSvt, order by columns
+SVT_ENTITY_LIST_TABLES: list[
+    tuple[Table, ColumnElement[bool], list[ColumnElement[Any]]]
+] = [
+    (
+        mstSvtIndividuality,
+        mstSvtIndividuality.c.svtId == mstSvt.c.id,
+        [mstSvtIndividuality.c.idx],
+    ),
+    (mstSvtCard, mstSvtCard.c.svtId == mstSvt.c.id, [mstSvtCard.c.cardId]),
+    (mstSvtCardAdd, mstSvtCardAdd.c.svtId == mstSvt.c.id, [mstSvtCardAdd.c.cardId]),
+    (mstSvtLimit, mstSvtLimit.c.svtId == mstSvt.c.id, [mstSvtLimit.c.limitCount]),
+    (
+        mstCombineSkill,
+        mstCombineSkill.c.id == mstSvt.c.combineSkillId,
+        [mstCombineSkill.c.skillLv],
+    ),
+    (
+        mstCombineLimit,
+        mstCombineLimit.c.id == mstSvt.c.combineLimitId,
+        [mstCombineLimit.c.svtLimit],
+    ),
+    (
+        mstCombineCostume,
+        mstCombineCostume.c.svtId == mstSvt.c.id,
+        [mstCombineCostume.c.costumeId],
+    ),
+    (
+        mstCombineMaterial,
+        mstCombineMaterial.c.id == mstSvt.c.combineMaterialId,
+        [mstCombineMaterial.c.lv],
+    ),
+    (
+        mstSvtLimitAdd,
+        mstSvtLimitAdd.c.svtId == mstSvt.c.id,
+        [mstSvtLimitAdd.c.limitCount],
+    ),
+    (
+        mstSvtLimitImage,
+        mstSvtLimitImage.c.svtId == mstSvt.c.id,
+        [mstSvtLimitImage.c.limitCount],
+    ),
+    (mstSvtChange, mstSvtChange.c.svtId == mstSvt.c.id, [mstSvtChange.c.priority]),
+    (mstSvtCostume, mstSvtCostume.c.svtId == mstSvt.c.id, [mstSvtCostume.c.id]),
+    (mstSvtExp, mstSvtExp.c.type == mstSvt.c.expType, [mstSvtExp.c.lv]),
+    (
+        mstFriendship,
+        mstFriendship.c.id == mstSvt.c.friendshipId,
+        [mstFriendship.c.rank],
+    ),
+    (
+        mstFriendshipSvt,
+        mstFriendshipSvt.c.svtId == mstSvt.c.id,
+        [mstFriendshipSvt.c.rank],
+    ),
+    (
+        mstSvtPassiveSkill,
+        mstSvtPassiveSkill.c.svtId == mstSvt.c.id,
+        [mstSvtPassiveSkill.c.skillId],
+    ),
+    (
+        mstSvtAppendPassiveSkill,
+        mstSvtAppendPassiveSkill.c.svtId == mstSvt.c.id,
+        [mstSvtAppendPassiveSkill.c.num],
+    ),
+    (
+        mstSvtAppendPassiveSkillUnlock,
+        mstSvtAppendPassiveSkillUnlock.c.svtId == mstSvt.c.id,
+        [mstSvtAppendPassiveSkillUnlock.c.num],
+    ),
+    (
+        mstCombineAppendPassiveSkill,
+        mstCombineAppendPassiveSkill.c.svtId == mstSvt.c.id,
+        [mstCombineAppendPassiveSkill.c.skillLv],
+    ),
+    (
+        mstSvtMultiPortrait,
+        mstSvtMultiPortrait.c.svtId == mstSvt.c.id,
+        [mstSvtMultiPortrait.c.limitCount],
+    ),
+    (
+        mstSvtOverwrite,
+        mstSvtOverwrite.c.svtId == mstSvt.c.id,
+        [mstSvtOverwrite.c.priority],
+    ),
+    (
+        mstSvtBattlePoint,
+        mstSvtBattlePoint.c.svtId == mstSvt.c.id,
+        [mstSvtBattlePoint.c.battlePointId],
+    ),
+    (
+        mstBattlePoint,
+        mstBattlePoint.c.id.in_(svt_battle_point_ids),
+        [mstBattlePoint.c.id],
+    ),
+    (
+        mstBattlePointPhase,
+        mstBattlePointPhase.c.battlePointId.in_(svt_battle_point_ids),
+        [mstBattlePointPhase.c.battlePointId, mstBattlePointPhase.c.phase],
+    ),
+    (
+        mstImagePartsGroup,
+        mstImagePartsGroup.c.id
+        == cast(mstSvt.c.script["imagePartsGroupId"].astext, Integer),
+        [mstImagePartsGroup.c.id, mstImagePartsGroup.c.idx],
+    ),
+    (
+        mstGift,
+        or_(
+            mstGift.c.id.in_(svt_friendship_gift_ids),
+            mstGift.c.id.in_(svt_prior_gift_ids),
+        ),
+        [
+            mstGift.c.id,
+            mstGift.c.priority.desc(),
+            mstGift.c.type,
+            mstGift.c.objectId,
+            mstGift.c.sort_id,
+        ],
+    ),
+    (
+        mstGiftAdd,
+        mstGiftAdd.c.giftId.in_(svt_friendship_gift_ids),
+        [mstGiftAdd.c.giftId],
+    ),
+    # Keep the table order of mstSvtSkill and mstSvtTreasureDevice
+    (mstSvtSkill, mstSvtSkill.c.svtId == mstSvt.c.id, []),
+    (mstSvtTreasureDevice, mstSvtTreasureDevice.c.svtId == mstSvt.c.id, []),
+]
+
+SVT_ENTITY_ONE_TABLES: list[tuple[Table, ColumnElement[bool]]] = [
+    (mstSvtExtra, mstSvtExtra.c.svtId == mstSvt.c.id),
+    (mstSvtCoin, mstSvtCoin.c.svtId == mstSvt.c.id),
+    (mstSvtAdd, mstSvtAdd.c.svtId == mstSvt.c.id),
+]
+
+SVT_ENTITY_LORE_LIST_TABLES: list[
+    tuple[Table, ColumnElement[bool], list[ColumnElement[Any]]]
+] = [
+    (mstSvtComment, mstSvtComment.c.svtId == mstSvt.c.id, [mstSvtComment.c.id]),
+    (
+        mstSvtCommentAdd,
+        mstSvtCommentAdd.c.svtId == mstSvt.c.id,
+        [mstSvtCommentAdd.c.id],
+    ),
+]
+
+SVT_ENTITY_LORE_ONE_TABLES: list[tuple[Table, ColumnElement[bool]]] = [
+    (mstCv, mstCv.c.id == mstSvt.c.cvId),
+    (mstIllustrator, mstIllustrator.c.id == mstSvt.c.illustratorId),
+]
+
+
+def sql_svt_jsonb_list(
+    table: Table, where_clause: ColumnElement[bool], order_by: list[ColumnElement[Any]]
+) -> ColumnElement[Any]:
+    row = table.table_valued()
+    agg = func.jsonb_agg(aggregate_order_by(row, *order_by) if order_by else row)
+    return (
+        select(func.coalesce(agg, func.jsonb_build_array()))
+        .where(where_clause)
+        .scalar_subquery()
+        .label(table.name)
+    )
+
+
+def sql_svt_jsonb_one(
+    table: Table, where_clause: ColumnElement[bool]
+) -> ColumnElement[Any]:
+    return (
+        select(func.to_jsonb(table.table_valued()))
+        .where(where_clause)
+        .limit(1)
+        .scalar_subquery()
+        .label(table.name)
+    )
+
+
+class ServantEntityTables(BaseModelORJson):
+    """Servant child tables that can be fetched in one query, see `get_svt_entity_tables`"""
+
+    mstSvt: MstSvt
+    mstSvtIndividuality: list[MstSvtIndividuality]
+    mstSvtCard: list[MstSvtCard]
+    mstSvtCardAdd: list[MstSvtCardAdd]
+    mstSvtLimit: list[MstSvtLimit]
+    mstCombineSkill: list[MstCombineSkill]
+    mstCombineLimit: list[MstCombineLimit]
+    mstCombineCostume: list[MstCombineCostume]
+    mstCombineMaterial: list[MstCombineMaterial]
+    mstSvtLimitAdd: list[MstSvtLimitAdd]
+    mstSvtLimitImage: list[MstSvtLimitImage]
+    mstSvtChange: list[MstSvtChange]
+    mstSvtCostume: list[MstSvtCostume]
+    mstSvtExp: list[MstSvtExp]
+    mstFriendship: list[MstFriendship]
+    mstFriendshipSvt: list[MstFriendshipSvt]
+    mstSvtPassiveSkill: list[MstSvtPassiveSkill]
+    mstSvtAppendPassiveSkill: list[MstSvtAppendPassiveSkill]
+    mstSvtAppendPassiveSkillUnlock: list[MstSvtAppendPassiveSkillUnlock]
+    mstCombineAppendPassiveSkill: list[MstCombineAppendPassiveSkill]
+    mstSvtMultiPortrait: list[MstSvtMultiPortrait]
+    mstSvtOverwrite: list[MstSvtOverwrite]
+    mstSvtBattlePoint: list[MstSvtBattlePoint]
+    mstBattlePoint: list[MstBattlePoint]
+    mstBattlePointPhase: list[MstBattlePointPhase]
+    mstImagePartsGroup: list[MstImagePartsGroup]
+    mstGift: list[MstGift]
+    mstGiftAdd: list[MstGiftAdd]
+    mstSvtSkill: list[MstSvtSkill]
+    mstSvtTreasureDevice: list[MstSvtTreasureDevice]
+    mstSvtExtra: Optional[MstSvtExtra] = None
+    mstSvtCoin: Optional[MstSvtCoin] = None
+    mstSvtAdd: Optional[MstSvtAdd] = None
+    mstCv: Optional[MstCv] = None
+    mstIllustrator: Optional[MstIllustrator] = None
+    mstSvtComment: list[MstSvtComment] = []
+    mstSvtCommentAdd: list[MstSvtCommentAdd] = []
+
+
+def select_svt_entity_tables(svt_ids: Iterable[int], lore: bool = False) -> Select[Any]:
+    """Select mstSvt and its child tables, one row per servant.
+
+    Each child table is aggregated into a JSONB column by a subquery correlated
+    with mstSvt.
+    """
+    list_tables = SVT_ENTITY_LIST_TABLES
+    one_tables = SVT_ENTITY_ONE_TABLES
+    if lore:
+        list_tables = list_tables + SVT_ENTITY_LORE_LIST_TABLES
+        one_tables = one_tables + SVT_ENTITY_LORE_ONE_TABLES
+
+    return select(
+        mstSvt.c.id,
+        func.to_jsonb(mstSvt.table_valued()).label(mstSvt.name),
+        *[sql_svt_jsonb_list(*table) for table in list_tables],
+        *[sql_svt_jsonb_one(*table) for table in one_tables],
+    ).where(mstSvt.c.id.in_(svt_ids))
+
+
+async def get_svt_entity_tables(
+    conn: AsyncConnection, svt_ids: Iterable[int], lore: bool = False
+) -> dict[int, ServantEntityTables]:
+    """Get the servant child tables of multiple servants in one round trip"""
+    stmt = select_svt_entity_tables(svt_ids, lore)
+    try:
+        return {
+            svt.id: ServantEntityTables.from_orm(svt)
+            for svt in (await conn.execute(stmt)).fetchall()
+        }
+    except DBAPIError:
+        return {}
+
+
 async def get_svt_script(
     conn: AsyncConnection, svt_ids: Iterable[int]
 ) -> list[MstSvtScript]:
@@ -210,10 +556,13 @@ async def get_svt_search(
     illustrator: Optional[str] = None,
     cv: Optional[str] = None,
     profile_contains: Optional[str] = None,
+    ids: Optional[Iterable[int]] = None,
 ) -> list[MstSvt]:
     from_clause: Union[Join, Table] = mstSvt
     where_clause: list[_ColumnExpressionArgument[bool]] = [true()]
 
+    if ids is not None:
+        where_clause.append(mstSvt.c.id.in_(ids))
     if svt_type_ints:
         where_clause.append(mstSvt.c.type.in_(svt_type_ints))
     if svt_flag_ints:
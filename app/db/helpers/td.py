@@ -1,9 +1,9 @@
-from typing import Iterable, Optional
+from typing import Any, Iterable, Optional
 
 from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncConnection
-from sqlalchemy.sql import and_, func, or_, select
+from sqlalchemy.sql import Select, and_, func, or_, select
 
 from ...models.raw import (
     mstSvtTreasureDevice,
@@ -13,23 +13,20 @@ from ...models.raw import (
     mstTreasureDeviceLv,
 )
 from ...schemas.raw import MstSvtTreasureDevice, MstTreasureDevice, TdEntityNoReverse
-from .utils import sql_jsonb_agg
+from .utils import get_lv_table, sql_jsonb_agg
 
 
-async def get_tdEntity(
-    conn: AsyncConnection, td_ids: Iterable[int]
-) -> list[TdEntityNoReverse]:
+def select_td_entity(td_ids: Iterable[int], expand: bool = True) -> Select[Any]:
+    tdLv = get_lv_table(mstTreasureDeviceLv, expand)
     mstTreasureDeviceLvJson = (
         select(
-            mstTreasureDeviceLv.c.treaureDeviceId,
-            func.jsonb_agg(
-                aggregate_order_by(
-                    mstTreasureDeviceLv.table_valued(), mstTreasureDeviceLv.c.lv
-                )
-            ).label(mstTreasureDeviceLv.name),
+            tdLv.c.treaureDeviceId,
+            func.jsonb_agg(aggregate_order_by(tdLv.table_valued(), tdLv.c.lv)).label(
+                mstTreasureDeviceLv.name
+            ),
         )
-        .where(mstTreasureDeviceLv.c.treaureDeviceId.in_(td_ids))
-        .group_by(mstTreasureDeviceLv.c.treaureDeviceId)
+        .where(tdLv.c.treaureDeviceId.in_(td_ids))
+        .group_by(tdLv.c.treaureDeviceId)
         .cte()
     )
 
@@ -66,13 +63,18 @@ async def get_tdEntity(
         mstTreasureDeviceLvJson.c.mstTreasureDeviceLv,
     ]
 
-    stmt = (
+    return (
         select(*SELECT_TD_ENTITY)
         .select_from(JOINED_TD_TABLES)
         .where(mstTreasureDevice.c.id.in_(td_ids))
         .group_by(mstTreasureDevice.c.id, mstTreasureDeviceLvJson.c.mstTreasureDeviceLv)
     )
 
+
+async def get_tdEntity(
+    conn: AsyncConnection, td_ids: Iterable[int], expand: bool = True
+) -> list[TdEntityNoReverse]:
+    stmt = select_td_entity(td_ids, expand)
     try:
         td_entities = [
             TdEntityNoReverse.from_orm(td)
@@ -107,8 +109,11 @@ async def get_td_search(
     maxNpNpGain: Optional[int],
     svalsContain: str | None,
     triggerSkillId: Iterable[int] | None,
+    ids: Iterable[int] | None = None,
 ) -> list[MstTreasureDevice]:
     where_clause = [mstTreasureDeviceLv.c.lv == 1]
+    if ids is not None:
+        where_clause.append(mstTreasureDevice.c.id.in_(ids))
     if individuality:
         where_clause.append(mstTreasureDevice.c.individuality.contains(individuality))
     if card:
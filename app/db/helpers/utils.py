@@ -1,10 +1,10 @@
-from typing import Any, TypeVar
+from typing import Any, Iterable, Sequence, TypeVar
 
 from sqlalchemy import Table
-from sqlalchemy.dialects.postgresql import JSONB, array_agg
+from sqlalchemy.dialects.postgresql import JSONB, OID, REGCLASS, array_agg
 from sqlalchemy.engine import CursorResult, Row
 from sqlalchemy.ext.asyncio import AsyncConnection
-from sqlalchemy.sql import Select, func
+from sqlalchemy.sql import Select, func, literal, select
 from sqlalchemy.sql._typing import _ColumnsClauseArgument
 from sqlalchemy.sql.selectable import NamedFromClause
 
@@ -18,9 +18,36 @@ def sql_jsonb_agg(
     ).label(label if label else table.name)
 
 
+def get_lv_table(table: Table, expand: bool) -> Table | NamedFromClause:
+    """The skill/NP level table, without the expandedFuncId column if not expand.
+
+    expandedFuncId has the whole function and buff entities so leaving it out of
+    the subquery avoids reading and sending it when it's not used.
+    """
+    if expand:
+        return table
+    return select(
+        *(column for column in table.c if column.name != "expandedFuncId")
+    ).subquery(table.name)
+
+
 T = TypeVar("T", bound=tuple[Any, ...])
 
 
 async def fetch_one(conn: AsyncConnection, stmt: Select[T]) -> Row[T] | None:
     res: CursorResult[T] = await conn.execute(stmt.limit(1))
     return res.first()
+
+
+async def get_table_oid(conn: AsyncConnection, table: Table) -> int:
+    """OID of the table, which changes when db/load swaps in a reloaded table"""
+    table_name = conn.dialect.identifier_preparer.format_table(table)
+    stmt = select(literal(table_name).cast(REGCLASS).cast(OID))
+    return (await conn.execute(stmt)).scalar_one()
+
+
+async def get_table_columns(
+    conn: AsyncConnection, table: Table, column_names: Iterable[str]
+) -> Sequence[Row[Any]]:
+    stmt = select(*(table.c[column_name] for column_name in column_names))
+    return (await conn.execute(stmt)).fetchall()
@@ -1,16 +1,38 @@
 import hashlib
+import multiprocessing
 import time
 from collections import defaultdict
-from typing import Any, Optional, Sequence, Union
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import partial
+from itertools import batched
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    NamedTuple,
+    Optional,
+    Sequence,
+    TypeVar,
+    Union,
+)
 
 import orjson
 import sqlalchemy
 from loguru import logger
+from psycopg import sql
+from psycopg.types.json import Jsonb, set_json_dumps
 from pydantic import DirectoryPath
-from sqlalchemy import Table
+from sqlalchemy import ColumnDefault, MetaData, Table
+from sqlalchemy.dialects.postgresql import JSONB, insert
 from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import CreateSchema, CreateTable
 from sqlalchemy.sql import text
 
+from ..config import Settings, get_app_info
 from ..core.nice.func import ADD_BUFF_FUNCTIONS
 from ..data.bgm import get_bgms
 from ..data.buff import get_buff_with_classrelation
@@ -18,9 +40,12 @@ from ..data.event import get_event_with_warIds
 from ..data.gift import get_gift_with_index
 from ..data.item import get_item_with_use
 from ..data.script import get_script_path, get_script_text_only
+from ..data.utils import MasterDataStore
+from ..models.load import loadedSourceHash
 from ..models.raw import (
     TABLES_TO_BE_LOADED,
     AssetStorage,
+    ScriptContent,
     ScriptFileList,
     mstBgm,
     mstBuff,
@@ -37,29 +62,74 @@ from ..models.raw import (
     mstTreasureDeviceLv,
     mstWar,
 )
-from ..models.rayshift import rayshiftQuest, rayshiftQuestHash
+from ..models.rayshift import (
+    rayshiftCutinDrop,
+    rayshiftDropStats,
+    rayshiftQuest,
+    rayshiftQuestHash,
+    rayshiftRun,
+    rayshiftRunStats,
+    rayshiftStageCutin,
+    rayshiftStatsQuery,
+)
 from ..schemas.base import BaseModelORJson
 from ..schemas.common import Region
 from ..schemas.enums import FUNC_VALS_NOT_BUFF
 from ..schemas.gameenums import BuffType
-from ..schemas.raw import AssetStorageLine, get_subtitle_svtId
+from ..schemas.raw import AssetStorageLine, MstBuff, get_subtitle_svtId
 from ..schemas.rayshift import QuestDetail, QuestList
 from .engine import engines
 from .helpers.rayshift import (
     fetch_all_missing_quest_ids,
     fetch_missing_quest_ids,
+    fetch_missing_run_query_ids,
+    fetch_uncounted_stats_query_ids,
     insert_rayshift_quest_db_sync,
     insert_rayshift_quest_hash_db_sync,
     insert_rayshift_quest_list,
+    update_rayshift_runs_sync,
+    update_rayshift_stats_sync,
 )
 
+settings = Settings()
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+# Script files are sent to the load workers this many at a time
+SCRIPT_READ_CHUNK_SIZE = 64
+
+# Skill and NP level rows are expanded by the load workers this many at a time
+FUNC_ROWS_CHUNK_SIZE = 2000
+
+# Rayshift runs missing from the side tables are added this many per transaction
+RAYSHIFT_RUNS_BATCH_SIZE = 1000
+RAYSHIFT_STATS_BATCH_SIZE = 10000
+
+# Tables filled from rayshiftQuest when the runs are inserted
+RAYSHIFT_SIDE_TABLES = [
+    rayshiftRun,
+    rayshiftStageCutin,
+    rayshiftCutinDrop,
+    rayshiftDropStats,
+    rayshiftRunStats,
+    rayshiftStatsQuery,
+]
+
 
-def recreate_table(conn: Connection, table: Table) -> None:  # pragma: no cover
+def recreate_table(
+    conn: Connection, table: Table, create_indexes: bool = True
+) -> None:  # pragma: no cover
     logger.debug(f"Recreating table {table.name}")
     for _ in range(10):
         try:
             table.drop(conn, checkfirst=True)
-            table.create(conn, checkfirst=True)
+            if create_indexes:
+                table.create(conn, checkfirst=True)
+            else:
+                conn.execute(CreateTable(table))
             return
         except sqlalchemy.exc.OperationalError as e:
             logger.exception(e)
@@ -68,11 +138,136 @@ def recreate_table(conn: Connection, table: Table) -> None:  # pragma: no cover
     raise Exception(f"Failed to recreate table {table.name}")
 
 
-def insert_db(conn: Connection, table: Table, db_data: Any) -> None:  # pragma: no cover
-    recreate_table(conn, table)
-    logger.debug(f"Inserting into {table.name}")
-    if db_data:
-        conn.execute(table.insert(), db_data)
+# Tables are loaded into a copy in this schema and moved to the live schema once
+# they are ready so the API can read the old table in the meantime.
+SHADOW_SCHEMA = "load_shadow"
+# Keep the index names of the live tables, the default naming convention would
+# add the schema to the name.
+shadow_metadata = MetaData(
+    schema=SHADOW_SCHEMA,
+    naming_convention={"ix": "ix_%(table_name)s_%(column_0_name)s"},
+)
+SHADOW_TABLES_KEY = "shadow_tables"
+
+
+def get_shadow_table(table: Table) -> Table:
+    return table.to_metadata(shadow_metadata, schema=SHADOW_SCHEMA)
+
+
+def swap_shadow_tables(
+    conn: Connection, tables: Iterable[Table]
+) -> None:  # pragma: no cover
+    live_schema = conn.execute(text("SELECT current_schema()")).scalar_one()
+    preparer = conn.dialect.identifier_preparer
+    for table in tables:
+        logger.debug(f"Swapping in table {table.name}")
+        table.drop(conn, checkfirst=True)
+        shadow_table = preparer.format_table(get_shadow_table(table))
+        conn.execute(
+            text(
+                f"ALTER TABLE {shadow_table} "
+                f"SET SCHEMA {preparer.quote_schema(live_schema)}"
+            )
+        )
+
+
+@contextmanager
+def begin_load(engine: Engine) -> Iterator[Connection]:  # pragma: no cover
+    """Begin a transaction in which the tables loaded with insert_db replace
+    the live tables together when the transaction ends."""
+    with engine.begin() as conn:
+        conn.info[SHADOW_TABLES_KEY] = []
+        try:
+            yield conn
+            swap_shadow_tables(conn, conn.info[SHADOW_TABLES_KEY])
+        finally:
+            conn.info.pop(SHADOW_TABLES_KEY)
+
+
+def get_copy_rows(
+    table: Table, db_data: Iterable[dict[str, Any]]
+) -> Iterator[tuple[Any, ...]]:
+    """Rows of the table columns for COPY.
+
+    Keys that are not columns of the table are ignored and missing keys get
+    the column default, like table.insert() would do.
+    """
+    columns = [
+        (
+            column.name,
+            isinstance(column.type, JSONB),
+            (
+                column.default.arg
+                if isinstance(column.default, ColumnDefault)
+                and column.default.is_scalar
+                else None
+            ),
+        )
+        for column in table.columns
+    ]
+    for item in db_data:
+        yield tuple(
+            (Jsonb(item[name]) if is_json else item[name]) if name in item else default
+            for name, is_json, default in columns
+        )
+
+
+def copy_db(
+    conn: Connection, table: Table, db_data: Iterable[dict[str, Any]]
+) -> int:  # pragma: no cover
+    """Load the data with COPY FROM STDIN and return the number of rows"""
+    copy_stmt = sql.SQL("COPY {} ({}) FROM STDIN").format(
+        sql.Identifier(*table.fullname.split(".")),
+        sql.SQL(", ").join(sql.Identifier(column.name) for column in table.columns),
+    )
+
+    row_count = 0
+    with conn.connection.driver_connection.cursor() as cursor:  # type: ignore[union-attr]
+        set_json_dumps(orjson.dumps, context=cursor)
+        with cursor.copy(copy_stmt) as copy:
+            for row in get_copy_rows(table, db_data):
+                copy.write_row(row)
+                row_count += 1
+
+    return row_count
+
+
+def load_shadow_table(
+    conn: Connection, table: Table, db_data: Iterable[dict[str, Any]]
+) -> Table:  # pragma: no cover
+    """Load the data into the shadow table of table and return it.
+
+    The indexes are created after the data is loaded, which is faster than
+    updating them for every row.
+    """
+    conn.execute(CreateSchema(SHADOW_SCHEMA, if_not_exists=True))
+    shadow_table = get_shadow_table(table)
+    recreate_table(conn, shadow_table, create_indexes=False)
+
+    start_time = time.perf_counter()
+    row_count = copy_db(conn, shadow_table, db_data)
+    copy_time = time.perf_counter() - start_time
+
+    for index in shadow_table.indexes:
+        index.create(conn)
+    index_time = time.perf_counter() - start_time - copy_time
+
+    logger.debug(
+        f"Loaded {row_count} rows into {shadow_table.fullname} in "
+        f"{copy_time:.2f}s and created indexes in {index_time:.2f}s"
+    )
+    return shadow_table
+
+
+def insert_db(
+    conn: Connection, table: Table, db_data: Iterable[dict[str, Any]]
+) -> None:  # pragma: no cover
+    load_shadow_table(conn, table, db_data)
+
+    if SHADOW_TABLES_KEY in conn.info:
+        conn.info[SHADOW_TABLES_KEY].append(table)
+    else:
+        swap_shadow_tables(conn, [table])
 
 
 def diff_column_schemas(
@@ -82,13 +277,6 @@ def diff_column_schemas(
     return data[0].keys() - table_columns
 
 
-def remove_unknown_columns(
-    data: list[dict[str, Any]], table: Table
-) -> list[dict[str, Any]]:  # pragma: no cover
-    table_columns = {column.name for column in table.columns}
-    return [{k: v for k, v in item.items() if k in table_columns} for item in data]
-
-
 BUFF_TRIGGERING_SKILLS_VALUE = {
     BuffType.DELAY_FUNCTION,
     BuffType.DEAD_FUNCTION,
@@ -135,75 +323,85 @@ def get_SkillID_from_sval(sval: str) -> int:
         return -1
 
 
-def load_skill_td_lv(
-    conn: Connection, gamedata_path: DirectoryPath
-) -> None:  # pragma: no cover
-    master_folder = gamedata_path / "master"
-
-    mstBuffId = get_buff_with_classrelation(gamedata_path)
-
-    with open(master_folder / "mstFunc.json", "rb") as fp:
-        mstFunc_data = orjson.loads(fp.read())
-        mstFuncId = {func["id"]: func for func in mstFunc_data}
-
-    mstFuncGroupId = defaultdict(list)
-    with open(master_folder / "mstFuncGroup.json", "rb") as fp:
-        mstFuncGroup_data = orjson.loads(fp.read())
-        for funcGroup in mstFuncGroup_data:
-            mstFuncGroupId[funcGroup["funcId"]].append(funcGroup)
-
-    with open(master_folder / "mstSkillLv.json", "rb") as fp:
-        mstSkillLv_data = orjson.loads(fp.read())
-
-    group_overwrite_file = master_folder / "mstSkillGroupOverwrite.json"
-    if group_overwrite_file.exists():
-        with open(group_overwrite_file, "rb") as fp:
-            mstSkillGroupOverwrite_data = orjson.loads(fp.read())
-    else:
-        mstSkillGroupOverwrite_data = []
-
-    with open(master_folder / "mstTreasureDeviceLv.json", "rb") as fp:
-        mstTreasureDeviceLv_data = orjson.loads(fp.read())
-
-    board_cs_path = master_folder / "mstClassBoardCommandSpell.json"
-    if board_cs_path.exists():
-        with open(board_cs_path, "rb") as fp:
-            mstClassBoardCommandSpell_data = orjson.loads(fp.read())
-    else:
-        mstClassBoardCommandSpell_data = []
-
-    cs_path = master_folder / "mstCommandSpell.json"
-    if cs_path.exists():
-        with open(cs_path, "rb") as fp:
-            mstCommandSpell_data = orjson.loads(fp.read())
-    else:
-        mstCommandSpell_data = []
-
-    def get_func_entity(func_id: int) -> dict[Any, Any]:
-        func_entity = {
-            "mstFunc": mstFuncId[func_id],
-            "mstFuncGroup": mstFuncGroupId.get(func_id, []),
-        }
-
+@contextmanager
+def load_worker_pool(
+    initializer: Optional[Callable[..., None]] = None, initargs: tuple[Any, ...] = ()
+) -> Iterator[Optional[ProcessPoolExecutor]]:  # pragma: no cover
+    """Pool of `db_load_workers` processes, None to work in the app process"""
+    if settings.db_load_workers <= 0:
+        yield None
+        return
+
+    with ProcessPoolExecutor(
+        settings.db_load_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=initializer,
+        initargs=initargs,
+    ) as executor:
+        yield executor
+
+
+def map_in_load_workers(
+    executor: Optional[ProcessPoolExecutor],
+    func: Callable[[T], R],
+    items: Iterable[T],
+    chunksize: int = 1,
+) -> Iterator[R]:  # pragma: no cover
+    if executor is None:
+        return map(func, items)
+    return executor.map(func, items, chunksize=chunksize)
+
+
+class FuncRows(NamedTuple):
+    rows: list[dict[str, Any]]
+    func_field_name: str = "funcId"
+    related_skills: bool = True
+
+
+class FuncExpander:
+    """Add the expandedFuncId and relatedSkillIds columns to skill and NP levels.
+
+    The expanded function of a func ID is built once and shared by all rows
+    using it. expandedFuncId is returned as serialized JSON so the workers also
+    do the serialization, see get_expanded_rows.
+    """
+
+    def __init__(
+        self,
+        funcs: dict[int, dict[str, Any]],
+        func_groups: dict[int, list[dict[str, Any]]],
+        buffs: dict[int, MstBuff],
+    ) -> None:
+        self.funcs = funcs
+        self.func_groups = func_groups
+        self.buffs = buffs
+        self.func_entities: dict[int, dict[str, Any]] = {}
+
+    def get_func_entity(self, func_id: int) -> dict[str, Any]:
+        if func_id in self.func_entities:
+            return self.func_entities[func_id]
+
+        func = self.funcs[func_id]
         if (
-            func_entity["mstFunc"]["funcType"] not in FUNC_VALS_NOT_BUFF
-            and func_entity["mstFunc"]["vals"]
-            and func_entity["mstFunc"]["vals"][0] in mstBuffId
+            func["funcType"] not in FUNC_VALS_NOT_BUFF
+            and func["vals"]
+            and func["vals"][0] in self.buffs
         ):
-            func_entity["mstFunc"]["expandedVals"] = [
-                {
-                    "mstBuff": mstBuffId[func_entity["mstFunc"]["vals"][0]].model_dump(
-                        mode="json"
-                    )
-                }
+            expanded_vals = [
+                {"mstBuff": self.buffs[func["vals"][0]].model_dump(mode="json")}
             ]
         else:
-            func_entity["mstFunc"]["expandedVals"] = []
+            expanded_vals = []
 
+        func_entity = {
+            "mstFunc": {**func, "expandedVals": expanded_vals},
+            "mstFuncGroup": self.func_groups.get(func_id, []),
+        }
+        self.func_entities[func_id] = func_entity
         return func_entity
 
     def get_trigger_skill_ids(
-        entity_lv: dict[str, Any], func_field_name: str = "funcId"
+        self, entity_lv: dict[str, Any], func_field_name: str = "funcId"
     ) -> list[int]:
         skill_ids = set()
 
@@ -212,12 +410,12 @@ def load_skill_td_lv(
                 for func_id, sval in zip(
                     entity_lv[func_field_name], entity_lv[field_name], strict=False
                 ):
-                    if func_id in mstFuncId:
-                        func = mstFuncId[func_id]
+                    if func_id in self.funcs:
+                        func = self.funcs[func_id]
                         if func["funcType"] in ADD_BUFF_FUNCTIONS and func["vals"]:
                             buff_id = func["vals"][0]
-                            if buff_id in mstBuffId:
-                                buff = mstBuffId[buff_id]
+                            if buff_id in self.buffs:
+                                buff = self.buffs[buff_id]
                                 if buff.type in BUFF_TRIGGERING_SKILLS_VALUE:
                                     skill_ids.add(get_Value_from_sval(sval))
                                 elif buff.type in BUFF_TRIGGERING_SKILLS_SKILL_ID:
@@ -225,60 +423,123 @@ def load_skill_td_lv(
 
         return sorted(skill_ids)
 
-    for skillLv in mstSkillLv_data:
-        skillLv["expandedFuncId"] = [
-            get_func_entity(func_id)
-            for func_id in skillLv["funcId"]
-            if func_id in mstFuncId
-        ]
-        skillLv["relatedSkillIds"] = get_trigger_skill_ids(skillLv)
+    def expand_rows(self, func_rows: FuncRows) -> list[dict[str, Any]]:
+        """Copies of the rows with the expanded columns"""
+        expanded_rows: list[dict[str, Any]] = []
+        for row in func_rows.rows:
+            expanded_row = {
+                **row,
+                "expandedFuncId": orjson.dumps(
+                    [
+                        self.get_func_entity(func_id)
+                        for func_id in row[func_rows.func_field_name]
+                        if func_id in self.funcs
+                    ]
+                ),
+            }
+            if func_rows.related_skills:
+                expanded_row["relatedSkillIds"] = self.get_trigger_skill_ids(
+                    row, func_rows.func_field_name
+                )
+            expanded_rows.append(expanded_row)
+        return expanded_rows
 
-    for groupOverwrite in mstSkillGroupOverwrite_data:
-        groupOverwrite["expandedFuncId"] = [
-            get_func_entity(func_id)
-            for func_id in groupOverwrite["funcId"]
-            if func_id in mstFuncId
-        ]
 
-    for treasureDeviceLv in mstTreasureDeviceLv_data:
-        treasureDeviceLv["expandedFuncId"] = [
-            get_func_entity(func_id)
-            for func_id in treasureDeviceLv["funcId"]
-            if func_id in mstFuncId
-        ]
-        treasureDeviceLv["relatedSkillIds"] = get_trigger_skill_ids(treasureDeviceLv)
+# FuncExpander of a load worker process, set by init_worker_func_expander
+worker_func_expander: Optional[FuncExpander] = None
 
-    for classBoardCS in mstClassBoardCommandSpell_data:
-        classBoardCS["expandedFuncId"] = [
-            get_func_entity(func_id)
-            for func_id in classBoardCS["funcIds"]
-            if func_id in mstFuncId
-        ]
-        classBoardCS["relatedSkillIds"] = get_trigger_skill_ids(classBoardCS, "funcIds")
 
-    for commandSpell in mstCommandSpell_data:
-        commandSpell["expandedFuncId"] = [
-            get_func_entity(func_id)
-            for func_id in commandSpell["funcId"]
-            if func_id in mstFuncId
+def init_worker_func_expander(
+    func_expander: FuncExpander,
+) -> None:  # pragma: no cover
+    global worker_func_expander
+    worker_func_expander = func_expander
+
+
+def expand_rows_in_worker(
+    func_rows: FuncRows,
+) -> list[dict[str, Any]]:  # pragma: no cover
+    if worker_func_expander is None:
+        raise RuntimeError("The load worker has no FuncExpander")
+    return worker_func_expander.expand_rows(func_rows)
+
+
+def get_expanded_rows(
+    chunks: Iterable[list[dict[str, Any]]],
+) -> Iterator[dict[str, Any]]:
+    """Rows of FuncExpander.expand_rows for insert_db"""
+    for chunk in chunks:
+        for row in chunk:
+            # Already serialized, written as is by the JSON dumper of copy_db.
+            # types-orjson 3.6 predates orjson.Fragment and shadows the stubs
+            # shipped with orjson, unused-ignore covers installs without it.
+            row["expandedFuncId"] = orjson.Fragment(  # type: ignore[attr-defined,unused-ignore]
+                row["expandedFuncId"]
+            )
+            yield row
+
+
+def load_skill_td_lv(
+    conn: Connection, master_data: MasterDataStore
+) -> None:  # pragma: no cover
+    mstBuffId = master_data.get_derived(get_buff_with_classrelation)
+
+    mstFunc_data = master_data.get_raw("mstFunc")
+    mstFuncId = {func["id"]: func for func in mstFunc_data}
+
+    mstFuncGroupId = defaultdict(list)
+    mstFuncGroup_data = master_data.get_raw("mstFuncGroup")
+    for funcGroup in mstFuncGroup_data:
+        mstFuncGroupId[funcGroup["funcId"]].append(funcGroup)
+
+    mstSkillLv_data = master_data.get_raw("mstSkillLv")
+    mstSkillGroupOverwrite_data = master_data.get_raw("mstSkillGroupOverwrite")
+    mstTreasureDeviceLv_data = master_data.get_raw("mstTreasureDeviceLv")
+    mstClassBoardCommandSpell_data = master_data.get_raw("mstClassBoardCommandSpell")
+    mstCommandSpell_data = master_data.get_raw("mstCommandSpell")
+
+    func_expander = FuncExpander(mstFuncId, dict(mstFuncGroupId), mstBuffId)
+    expanded_tables: list[tuple[Table, list[dict[str, Any]], str, bool]] = [
+        (mstSkillLv, mstSkillLv_data, "funcId", True),
+        (mstSkillGroupOverwrite, mstSkillGroupOverwrite_data, "funcId", False),
+        (mstTreasureDeviceLv, mstTreasureDeviceLv_data, "funcId", True),
+        (mstClassBoardCommandSpell, mstClassBoardCommandSpell_data, "funcIds", True),
+        (mstCommandSpell, mstCommandSpell_data, "funcId", True),
+    ]
+
+    with load_worker_pool(init_worker_func_expander, (func_expander,)) as executor:
+        expand_rows = (
+            func_expander.expand_rows if executor is None else expand_rows_in_worker
+        )
+        # All chunks are submitted first so the workers expand the next tables
+        # while the previous ones are copied into the DB
+        table_chunks = [
+            (
+                table,
+                map_in_load_workers(
+                    executor,
+                    expand_rows,
+                    (
+                        FuncRows(list(rows), func_field_name, related_skills)
+                        for rows in batched(table_data, FUNC_ROWS_CHUNK_SIZE)
+                    ),
+                ),
+            )
+            for table, table_data, func_field_name, related_skills in expanded_tables
         ]
-        commandSpell["relatedSkillIds"] = get_trigger_skill_ids(commandSpell)
 
-    load_pydantic_to_db(conn, list(mstBuffId.values()), mstBuff)
+        load_pydantic_to_db(conn, list(mstBuffId.values()), mstBuff)
 
-    insert_db(conn, mstFunc, mstFunc_data)
-    insert_db(conn, mstFuncGroup, mstFuncGroup_data)
-    insert_db(conn, mstSkillLv, mstSkillLv_data)
-    insert_db(conn, mstSkillGroupOverwrite, mstSkillGroupOverwrite_data)
-    insert_db(conn, mstTreasureDeviceLv, mstTreasureDeviceLv_data)
-    insert_db(conn, mstClassBoardCommandSpell, mstClassBoardCommandSpell_data)
-    insert_db(conn, mstCommandSpell, mstCommandSpell_data)
+        insert_db(conn, mstFunc, mstFunc_data)
+        insert_db(conn, mstFuncGroup, mstFuncGroup_data)
+        for table, chunks in table_chunks:
+            insert_db(conn, table, get_expanded_rows(chunks))
 
 
 def load_event(
-    conn: Connection, gamedata_path: DirectoryPath
+    conn: Connection, master_data: MasterDataStore
 ) -> None:  # pragma: no cover
-    event_war = get_event_with_warIds(gamedata_path)
+    event_war = get_event_with_warIds(master_data)
     load_pydantic_to_db(conn, event_war.mstEvents, mstEvent)
 
     mstWar_db_data = [war.model_dump(mode="json") for war in event_war.mstWars]
@@ -286,29 +547,41 @@ def load_event(
 
 
 def load_bgm(
-    conn: Connection, gamedata_path: DirectoryPath, asset_lines: list[AssetStorageLine]
+    conn: Connection,
+    master_data: MasterDataStore,
+    asset_lines: list[AssetStorageLine],
 ) -> None:  # pragma: no cover
-    bgms = get_bgms(gamedata_path, asset_lines)
+    bgms = get_bgms(master_data, asset_lines)
     load_pydantic_to_db(conn, bgms, mstBgm)
 
 
 def load_item(
-    conn: Connection, gamedata_path: DirectoryPath
+    conn: Connection, master_data: MasterDataStore
 ) -> None:  # pragma: no cover
-    mstItems = get_item_with_use(gamedata_path)
+    mstItems = get_item_with_use(master_data)
     mstItem_db_data = [item.model_dump(mode="json") for item in mstItems]
     insert_db(conn, mstItem, mstItem_db_data)
 
 
 def load_gift(
-    conn: Connection, gamedata_path: DirectoryPath
+    conn: Connection, master_data: MasterDataStore
 ) -> None:  # pragma: no cover
-    mstGifts = get_gift_with_index(gamedata_path)
+    mstGifts = get_gift_with_index(master_data)
     insert_db(conn, mstGift, [item.model_dump(mode="json") for item in mstGifts])
 
 
+def read_script(region: Region, script_path: Path) -> tuple[str, str]:
+    """Raw script and its text only version, empty if the file doesn't exist"""
+    if not script_path.exists():
+        return "", ""
+
+    with open(script_path, "r", encoding="utf-8") as fp:
+        script_data = fp.read()
+    return script_data, get_script_text_only(region, script_data)
+
+
 def load_script_list(
-    engine: Engine, region: Region, repo_folder: DirectoryPath
+    conn: Connection, region: Region, repo_folder: DirectoryPath
 ) -> None:  # pragma: no cover
     script_list_file = (
         repo_folder
@@ -316,7 +589,8 @@ def load_script_list(
         / ScriptFileList.name
         / f"{ScriptFileList.name}.txt"
     )
-    db_data: list[dict[str, Union[int, str, None]]] = []
+    script_file_data: list[dict[str, Union[int, str, None]]] = []
+    script_contents: dict[str, dict[str, str]] = {}
 
     if script_list_file.exists():
         with open(script_list_file, encoding="utf-8") as fp:
@@ -332,23 +606,33 @@ def load_script_list(
             if quest["scriptQuestId"] != 0:
                 overwrite_script_quest_id[quest["scriptQuestId"]].append(quest["id"])
 
-        for script in script_list:
-            script_name = script.removesuffix(".txt")
-            script_path = (
-                repo_folder
-                / "ScriptActionEncrypt"
-                / f"{get_script_path(script_name)}.txt"
+        script_paths = [
+            repo_folder
+            / "ScriptActionEncrypt"
+            / f"{get_script_path(script.removesuffix('.txt'))}.txt"
+            for script in script_list
+        ]
+        with load_worker_pool() as executor:
+            scripts = list(
+                map_in_load_workers(
+                    executor,
+                    partial(read_script, region),
+                    script_paths,
+                    SCRIPT_READ_CHUNK_SIZE,
+                )
             )
 
-            if script_path.exists():
-                with open(script_path, "r", encoding="utf-8") as fp:
-                    script_data = fp.read()
-                    script_text = get_script_text_only(region, script_data)
-                    script_sha1 = hashlib.sha1(script_text.encode("utf-8")).hexdigest()
-            else:
-                script_data = ""
-                script_text = ""
-                script_sha1 = ""
+        for script, (script_data, script_text) in zip(
+            script_list, scripts, strict=True
+        ):
+            script_name = script.removesuffix(".txt")
+            script_sha1 = hashlib.sha1(script_data.encode("utf-8")).hexdigest()
+            if script_sha1 not in script_contents:
+                script_contents[script_sha1] = {
+                    "rawScriptSHA1": script_sha1,
+                    "rawScript": script_data,
+                    "textScript": script_text,
+                }
 
             quest_ids: list[int] = []
             phase: Optional[int] = None
@@ -373,26 +657,23 @@ def load_script_list(
                 quest_ids.append(-1)
 
             for quest_id in quest_ids:
-                db_data.append(
+                script_file_data.append(
                     {
                         "scriptFileName": script_name,
                         "questId": quest_id,
                         "phase": phase,
                         "sceneType": scene_type,
                         "rawScriptSHA1": script_sha1,
-                        "rawScript": script_data,
-                        "textScript": script_text,
                     }
                 )
 
-    with engine.begin() as conn:
-        stmt = text("select extname from pg_extension;")
-        rows = conn.execute(stmt).fetchall()
-        if "pgroonga" not in (row.extname for row in rows):
-            conn.execute(text("create extension pgroonga;"))
+    stmt = text("select extname from pg_extension;")
+    rows = conn.execute(stmt).fetchall()
+    if "pgroonga" not in (row.extname for row in rows):
+        conn.execute(text("create extension pgroonga;"))
 
-    with engine.begin() as conn:
-        insert_db(conn, ScriptFileList, db_data)
+    insert_db(conn, ScriptContent, script_contents.values())
+    insert_db(conn, ScriptFileList, script_file_data)
 
 
 def load_subtitle(
@@ -416,7 +697,7 @@ def load_subtitle(
 def load_pydantic_to_db(
     conn: Connection, pydantic_data: Sequence[BaseModelORJson], db_table: Table
 ) -> None:  # pragma: no cover
-    db_data = [item.model_dump(mode="json") for item in pydantic_data]
+    db_data = (item.model_dump(mode="json") for item in pydantic_data)
     insert_db(conn, db_table, db_data)
 
 
@@ -460,73 +741,283 @@ def load_asset_storage(
     load_pydantic_to_db(conn, asset_lines, AssetStorage)
 
 
-def update_db(region_path: dict[Region, DirectoryPath]) -> None:  # pragma: no cover
-    logger.info("Loading db …")
-    start_loading_time = time.perf_counter()
+def load_table_from_master(
+    conn: Connection, master_folder: DirectoryPath, table: Table
+) -> None:  # pragma: no cover
+    table_json = master_folder / f"{table.name}.json"
+    if table_json.exists():
+        with open(table_json, "rb") as fp:
+            data: list[dict[str, Any]] = orjson.loads(fp.read())
+
+        # Unknown columns are skipped when the rows are copied
+        if data:
+            different_columns = diff_column_schemas(data, table)
+            if different_columns:
+                logger.warning(
+                    f"Found unknown columns: {', '.join(different_columns)} in {table_json}"
+                )
+    else:
+        data = []
 
-    for region, repo_folder in region_path.items():
-        logger.info(f"Updating {region} tables …")
-        master_folder = repo_folder / "master"
-        engine = engines[region]
+    logger.debug(f"Updating {table.name} …")
+    insert_db(conn, table, data)
 
-        with engine.begin() as conn:
-            logger.info("Updating parsed skill and td …")
-            load_skill_td_lv(conn, repo_folder)
 
-        with engine.begin() as conn:
-            logger.info("Updating item …")
-            load_item(conn, repo_folder)
+def get_table_group_loader(
+    master_folder: DirectoryPath, tables: list[Table]
+) -> Callable[[Connection], None]:  # pragma: no cover
+    def load_table_group(conn: Connection) -> None:
+        for table in tables:
+            load_table_from_master(conn, master_folder, table)
 
-        with engine.begin() as conn:
-            logger.info("Updating gift …")
-            load_gift(conn, repo_folder)
-
-        for table_group in TABLES_TO_BE_LOADED:
-            with engine.begin() as conn:
-                for table in table_group:
-                    table_json = master_folder / f"{table.name}.json"
-                    if table_json.exists():
-                        with open(table_json, "rb") as fp:
-                            data: list[dict[str, Any]] = orjson.loads(fp.read())
-
-                        if data:
-                            different_columns = diff_column_schemas(data, table)
-                            if different_columns:
-                                logger.warning(
-                                    f"Found unknown columns: {', '.join(different_columns)} in {table_json}"
-                                )
-                                data = remove_unknown_columns(data, table)
-                    else:
-                        data = []
-
-                    logger.debug(f"Updating {table.name} …")
-                    insert_db(conn, table, data)
+    return load_table_group
 
-        with engine.begin() as conn:
-            logger.info("Updating subtitle …")
-            load_subtitle(conn, region, master_folder)
 
-        with engine.begin() as conn:
-            logger.info("Updating event …")
-            load_event(conn, repo_folder)
+def get_source_hash(repo_folder: Path, sources: Iterable[str]) -> str:
+    """Hash of the content of the source files, relative to repo_folder.
+
+    All files in a source folder are hashed. Missing files are hashed too so
+    adding or removing a file changes the hash.
+    """
+    source_hash = hashlib.sha1()
+    for source in sources:
+        source_path = repo_folder / source
+        if source_path.is_dir():
+            files = sorted(path for path in source_path.rglob("*") if path.is_file())
+        else:
+            files = [source_path]
+
+        for file in files:
+            source_hash.update(file.relative_to(repo_folder).as_posix().encode())
+            if file.exists():
+                with open(file, "rb") as fp:
+                    source_hash.update(hashlib.file_digest(fp, "sha1").digest())
+            else:
+                source_hash.update(b"\0")
+
+    return source_hash.hexdigest()
+
+
+def get_loaded_source_hashes(
+    conn: Connection,
+) -> dict[str, tuple[str, str]]:  # pragma: no cover
+    loadedSourceHash.create(conn, checkfirst=True)
+    stmt = sqlalchemy.select(
+        loadedSourceHash.c.name,
+        loadedSourceHash.c.sourceHash,
+        loadedSourceHash.c.appHash,
+    )
+    return {row.name: (row.sourceHash, row.appHash) for row in conn.execute(stmt).all()}
+
+
+def set_loaded_source_hash(
+    conn: Connection, name: str, source_hash: str, app_hash: str
+) -> None:  # pragma: no cover
+    stmt = insert(loadedSourceHash).values(
+        name=name, sourceHash=source_hash, appHash=app_hash
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[loadedSourceHash.c.name],
+        set_={"sourceHash": stmt.excluded.sourceHash, "appHash": stmt.excluded.appHash},
+    )
+    conn.execute(stmt)
+
+
+def master_sources(*table_names: str) -> list[str]:
+    return [f"master/{table_name}.json" for table_name in table_names]
+
+
+@dataclass
+class LoadStep:
+    name: str
+    load: Callable[[Connection], None]
+    tables: list[Table]
+    # Files and folders in the gamedata repo that the tables are built from
+    sources: list[str] = field(default_factory=list)
 
+
+def get_load_steps(
+    region: Region, master_data: MasterDataStore
+) -> list[LoadStep]:  # pragma: no cover
+    repo_folder = master_data.gamedata_path
+    master_folder = repo_folder / "master"
+
+    def load_asset_storage_bgm(conn: Connection) -> None:
         asset_lines = get_asset_storage_lines(repo_folder)
-        with engine.begin() as conn:
-            logger.info("Updating AssetStorage and bgms …")
-            load_asset_storage(conn, asset_lines)
-            load_bgm(conn, repo_folder, asset_lines)
+        load_asset_storage(conn, asset_lines)
+        load_bgm(conn, master_data, asset_lines)
+
+    load_steps = [
+        LoadStep(
+            "parsed skill and td",
+            lambda conn: load_skill_td_lv(conn, master_data),
+            [
+                mstBuff,
+                mstFunc,
+                mstFuncGroup,
+                mstSkillLv,
+                mstSkillGroupOverwrite,
+                mstTreasureDeviceLv,
+                mstClassBoardCommandSpell,
+                mstCommandSpell,
+            ],
+            master_sources(
+                "mstBuff",
+                "mstClassRelationOverwrite",
+                "mstBuffConvert",
+                "mstFunc",
+                "mstFuncGroup",
+                "mstSkillLv",
+                "mstSkillGroupOverwrite",
+                "mstTreasureDeviceLv",
+                "mstClassBoardCommandSpell",
+                "mstCommandSpell",
+            ),
+        ),
+        LoadStep(
+            "item",
+            lambda conn: load_item(conn, master_data),
+            [mstItem],
+            master_sources(
+                "mstItem",
+                "mstItemSelect",
+                "mstGift",
+                "mstGiftAdd",
+                "mstCombineSkill",
+                "mstCombineAppendPassiveSkill",
+                "mstCombineLimit",
+                "mstCombineCostume",
+            ),
+        ),
+        LoadStep(
+            "gift",
+            lambda conn: load_gift(conn, master_data),
+            [mstGift],
+            master_sources("mstGift"),
+        ),
+    ]
+
+    for table_group in TABLES_TO_BE_LOADED:
+        load_steps.append(
+            LoadStep(
+                ", ".join(table.name for table in table_group),
+                get_table_group_loader(master_folder, table_group),
+                table_group,
+                master_sources(*(table.name for table in table_group)),
+            )
+        )
+
+    load_steps += [
+        LoadStep(
+            "subtitle",
+            lambda conn: load_subtitle(conn, region, master_folder),
+            [mstSubtitle],
+            master_sources("globalNewMstSubtitle"),
+        ),
+        LoadStep(
+            "event",
+            lambda conn: load_event(conn, master_data),
+            [mstEvent, mstWar],
+            master_sources("mstEvent", "mstWar"),
+        ),
+        LoadStep(
+            "AssetStorage and bgms",
+            load_asset_storage_bgm,
+            [AssetStorage, mstBgm],
+            ["AssetStorage.txt", *master_sources("mstBgm")],
+        ),
+        LoadStep(
+            "script list",
+            lambda conn: load_script_list(conn, region, repo_folder),
+            [ScriptFileList, ScriptContent],
+            ["ScriptActionEncrypt", *master_sources("mstQuest")],
+        ),
+    ]
+
+    return load_steps
+
+
+def update_db(
+    master_data: dict[Region, MasterDataStore],
+) -> None:  # pragma: no cover
+    logger.info("Loading db …")
+    start_loading_time = time.perf_counter()
+    app_hash = get_app_info().hash
 
-        logger.info("Updating script list …")
-        load_script_list(engine, region, repo_folder)
+    for region, region_master_data in master_data.items():
+        logger.info(f"Updating {region} tables …")
+        repo_folder = region_master_data.gamedata_path
+        engine = engines[region]
+
+        with engine.begin() as conn:
+            loaded_hashes = get_loaded_source_hashes(conn)
+            live_tables = set(sqlalchemy.inspect(conn).get_table_names())
+
+        skipped_steps = 0
+        for load_step in get_load_steps(region, region_master_data):
+            source_hash = get_source_hash(repo_folder, load_step.sources)
+            if (
+                settings.db_incremental_load
+                and loaded_hashes.get(load_step.name) == (source_hash, app_hash)
+                and all(table.name in live_tables for table in load_step.tables)
+            ):
+                logger.debug(f"Skipping {load_step.name}, the sources are unchanged")
+                skipped_steps += 1
+                continue
+
+            logger.info(f"Updating {load_step.name} …")
+            with begin_load(engine) as conn:
+                load_step.load(conn)
+                set_loaded_source_hash(conn, load_step.name, source_hash, app_hash)
+
+        logger.info(f"Skipped {skipped_steps} unchanged load steps in {region}.")
 
         with engine.begin() as conn:
             rayshiftQuest.create(conn, checkfirst=True)
             rayshiftQuestHash.create(conn, checkfirst=True)
+            for side_table in RAYSHIFT_SIDE_TABLES:
+                side_table.create(conn, checkfirst=True)
+
+        load_missing_rayshift_rows(
+            region,
+            "runs",
+            fetch_missing_run_query_ids,
+            update_rayshift_runs_sync,
+            RAYSHIFT_RUNS_BATCH_SIZE,
+        )
+        load_missing_rayshift_rows(
+            region,
+            "drop stats",
+            fetch_uncounted_stats_query_ids,
+            update_rayshift_stats_sync,
+            RAYSHIFT_STATS_BATCH_SIZE,
+        )
 
     db_loading_time = time.perf_counter() - start_loading_time
     logger.info(f"Loaded db in {db_loading_time:.2f}s.")
 
 
+def load_missing_rayshift_rows(
+    region: Region,
+    name: str,
+    fetch_query_ids: Callable[[Connection, int], list[int]],
+    update_rows: Callable[[Connection, list[int]], None],
+    batch_size: int,
+) -> None:
+    """Add the runs missing from a rayshift side table, e.g. when it's new"""
+    added_runs = 0
+    while True:
+        with engines[region].begin() as conn:
+            query_ids = fetch_query_ids(conn, batch_size)
+            if not query_ids:
+                break
+            update_rows(conn, query_ids)
+            added_runs += len(query_ids)
+
+    if added_runs:
+        logger.info(f"Added {added_runs} rayshift runs to the {name} tables.")
+
+
 def load_rayshift_quest_list(region: Region, quest_list: list[QuestList]) -> None:
     with engines[region].begin() as conn:
         rayshiftQuest.create(conn, checkfirst=True)
@@ -0,0 +1,215 @@
+from enum import StrEnum
+from fnmatch import fnmatchcase
+from pathlib import Path, PurePosixPath
+from typing import Optional
+
+from git import GitCommandError, Repo
+from loguru import logger
+
+from ..config import get_app_info
+from ..schemas.common import RegionInfo
+
+
+class ExportGroup(StrEnum):
+    """Export files that are generated together"""
+
+    SVT = "svt"
+    COMMAND_CODE = "command_code"
+    MYSTIC_CODE = "mystic_code"
+    WAR = "war"
+    EVENT = "event"
+    ITEM = "item"
+    MASTER_MISSION = "master_mission"
+    SHOP = "shop"
+    BGM = "bgm"
+    GACHA = "gacha"
+    ILLUSTRATOR = "illustrator"
+    CV = "cv"
+    ENEMY_MASTER = "enemy_master"
+    CLASS_BOARD = "class_board"
+    GRAND_GRAPH = "grand_graph"
+    BATTLE_POINT = "battle_point"
+    ASSET_STORAGE = "asset_storage"
+    ENUMS = "enums"
+
+
+COMMON_TABLES = ("mstConstant", "mstCommonRelease", "mstCommonConsume")
+ITEM_TABLES = ("mstItem*", "mstGift*", "mstSetItem")
+SKILL_TABLES = (
+    "mstSkill*",
+    "mstAi*",
+    "mstTreasureDevice*",
+    "mstFunc*",
+    "mstBuff*",
+    "mstClassRelation*",
+    "mstSvtPassiveSkill",
+)
+VOICE_TABLES = ("mstVoice*", "mstSvtVoice*", "mstSubtitle", "globalNewMstSubtitle")
+
+
+# Master tables that the files of an export group are built from. A table is
+# matched with fnmatch so `mstSvt*` covers mstSvtLimit, mstSvtSkill, etc. Tables
+# that are not listed here cause a full export.
+EXPORT_GROUP_TABLES: dict[ExportGroup, tuple[str, ...]] = {
+    ExportGroup.SVT: (
+        "mstSvt*",
+        "mstCombine*",
+        "mstBattlePoint*",
+        "mstFriendship*",
+        "mstIllustrator",
+        "mstCv",
+        "mstEvent*",
+        "mstQuest*",
+        "mstImagePartsGroup",
+        *SKILL_TABLES,
+        *VOICE_TABLES,
+        *ITEM_TABLES,
+        *COMMON_TABLES,
+    ),
+    ExportGroup.COMMAND_CODE: (
+        "mstCommandCode*",
+        "mstIllustrator",
+        *SKILL_TABLES,
+        *COMMON_TABLES,
+    ),
+    ExportGroup.MYSTIC_CODE: ("mstEquip*", *SKILL_TABLES, *COMMON_TABLES),
+    ExportGroup.WAR: (
+        "mstWar*",
+        "mstSpot*",
+        "mstQuest*",
+        "mstMap*",
+        "mstBgm*",
+        "mstBlankEarth*",
+        "mstStage*",
+        "mstEvent",
+        "mstClosedMessage",
+        *ITEM_TABLES,
+        *COMMON_TABLES,
+    ),
+    ExportGroup.EVENT: (
+        "mstEvent*",
+        "mstShop*",
+        "mstBoxGacha*",
+        "mstTreasureBox*",
+        "mstBgm*",
+        "mstQuest*",
+        "mstWar*",
+        "mstSvtGroup",
+        "mstSvtExtra",
+        "mstHeelPortrait",
+        "mstBulletinBoard*",
+        *SKILL_TABLES,
+        *VOICE_TABLES,
+        *ITEM_TABLES,
+        *COMMON_TABLES,
+    ),
+    ExportGroup.ITEM: (*ITEM_TABLES, *COMMON_TABLES),
+    ExportGroup.MASTER_MISSION: (
+        "mstMasterMission*",
+        "mstEventMission*",
+        "mstQuest*",
+        *ITEM_TABLES,
+        *COMMON_TABLES,
+    ),
+    ExportGroup.SHOP: (
+        "mstShop*",
+        "mstEvent*",
+        *ITEM_TABLES,
+        *COMMON_TABLES,
+    ),
+    ExportGroup.BGM: ("mstBgm*", "mstShop*", *ITEM_TABLES, *COMMON_TABLES),
+    ExportGroup.GACHA: ("mstGacha*",),
+    ExportGroup.ILLUSTRATOR: ("mstIllustrator",),
+    ExportGroup.CV: ("mstCv",),
+    ExportGroup.ENEMY_MASTER: ("mstEnemyMaster*",),
+    ExportGroup.CLASS_BOARD: (
+        "mstClassBoard*",
+        "mstCommandSpell*",
+        *SKILL_TABLES,
+        *ITEM_TABLES,
+        *COMMON_TABLES,
+    ),
+    ExportGroup.GRAND_GRAPH: (
+        "mstGrandGraph*",
+        *SKILL_TABLES,
+        *ITEM_TABLES,
+        *COMMON_TABLES,
+    ),
+    ExportGroup.BATTLE_POINT: ("mstBattlePoint*",),
+    ExportGroup.ASSET_STORAGE: (),
+    ExportGroup.ENUMS: (),
+}
+
+
+# Files outside of the master folder that exports depend on
+EXPORT_GROUP_FILES: dict[str, tuple[ExportGroup, ...]] = {
+    "AssetStorage.txt": (ExportGroup.ASSET_STORAGE,),
+    "gamedatatop.json": (),
+    "metadata/assetbundle.json": (),
+}
+
+
+# Folders of the gamedata repo that are not used in the exports
+NOT_EXPORTED_FOLDERS = ("ScriptActionEncrypt",)
+
+
+def get_table_export_groups(table: str) -> set[ExportGroup]:
+    return {
+        group
+        for group, patterns in EXPORT_GROUP_TABLES.items()
+        if any(fnmatchcase(table, pattern) for pattern in patterns)
+    }
+
+
+def get_changed_export_groups(changed_files: list[str]) -> Optional[set[ExportGroup]]:
+    """Export groups affected by the changed gamedata files.
+
+    Return None if a changed file isn't in the dependency map and everything
+    should be exported.
+    """
+    export_groups: set[ExportGroup] = set()
+
+    for changed_file in changed_files:
+        file_path = PurePosixPath(changed_file)
+        if file_path.parts and file_path.parts[0] in NOT_EXPORTED_FOLDERS:
+            continue
+
+        if file_path.parent == PurePosixPath("master") and file_path.suffix == ".json":
+            table_groups = get_table_export_groups(file_path.stem)
+            if not table_groups:
+                logger.info(f"{changed_file} is not in the export dependency map.")
+                return None
+            export_groups |= table_groups
+        elif changed_file in EXPORT_GROUP_FILES:
+            export_groups |= set(EXPORT_GROUP_FILES[changed_file])
+        else:
+            logger.info(f"{changed_file} is not in the export dependency map.")
+            return None
+
+    return export_groups
+
+
+def get_export_groups(
+    gamedata: Path, export_info: Optional[RegionInfo]
+) -> Optional[set[ExportGroup]]:
+    """Export groups to generate since the last export described by `export_info`.
+
+    Return None if everything should be exported: there was no previous export,
+    the app changed since then or the changes can't be found in the git history.
+    """
+    if export_info is None or not (gamedata / ".git").exists():
+        return None
+
+    if export_info.serverHash != get_app_info().hash:
+        return None
+
+    try:
+        changed_files = (
+            Repo(gamedata)
+            .git.diff("--name-only", export_info.hash, "HEAD")
+            .splitlines()
+        )
+    except GitCommandError:
+        return None
+
+    return get_changed_export_groups(changed_files)
@@ -14,7 +14,6 @@ from fastapi.openapi.utils import get_openapi
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi_cache import Coder, FastAPICache
-from fastapi_cache.backends.redis import RedisBackend
 from loguru import logger
 from redis.asyncio import Redis as AsyncRedis
 from sqlalchemy.ext.asyncio import AsyncConnection
@@ -24,6 +23,12 @@ from .core.info import get_all_repo_info
 from .db.engine import async_engines, engines
 from .logging import init_logging
 from .redis import Redis
+from .redis.cache import (
+    CacheHits,
+    SingleFlightRedisBackend,
+    cache_versions,
+    single_flight_scope,
+)
 from .routers import basic, nice, raw, secret
 from .routers.deps import get_redis
 from .schemas.common import Region, RepoInfo
@@ -192,6 +197,19 @@ if settings.openapi_url:
 app.add_middleware(CORSMiddleware, allow_origins=["*"])
 
 
+@app.middleware("http")
+async def release_single_flight_keys(
+    request: Request, call_next: Callable[..., Awaitable[Response]]
+) -> Response:
+    # Let other requests waiting on a key this request didn't cache compute it
+    with single_flight_scope() as keys:
+        try:
+            return await call_next(request)
+        finally:
+            for key in list(keys):
+                await request.app.state.cache_backend.release(key)
+
+
 @app.middleware("http")
 async def add_process_time_header(
     request: Request, call_next: Callable[..., Awaitable[Response]]
@@ -238,11 +256,11 @@ def get_region(args: list[Any], kwargs: dict[str, Any]) -> str:  # pragma: no co
     return ""
 
 
-def custom_key_builder(
+async def custom_key_builder(
     __function: Callable[..., Any],
     __namespace: str = "",
     *,
-    request: Optional[Request] = None,  # noqa: ARG001
+    request: Optional[Request] = None,
     response: Optional[Response] = None,  # noqa: ARG001
     args: tuple[Any, ...],
     kwargs: dict[str, Any],
@@ -272,8 +290,26 @@ def custom_key_builder(
         + kwargs_dump
     )
     cache_key = hashlib.sha1(raw_key).hexdigest()
+    unversioned_key = f"{prefix}:{region}:{__namespace}:{cache_key}"
+    if region:
+        cache_version = await cache_versions.get(app.state.redis, Region(region))
+        full_key = f"{prefix}:{region}:{cache_version}:{__namespace}:{cache_key}"
+    else:
+        full_key = unversioned_key
 
-    return f"{prefix}:{region}:{__namespace}:{cache_key}"
+    # Warm-up requests refresh the cache with no-cache and shouldn't be counted
+    if (
+        request is not None
+        and region
+        and request.headers.get("Cache-Control") != "no-cache"
+    ):
+        url = request.url.path
+        if request.url.query:
+            url += f"?{request.url.query}"
+        # Without the version so the counts of a request add up across updates
+        request.app.state.cache_hits.record(region, unversioned_key, url)
+
+    return full_key
 
 
 class PickleCoder(Coder):  # pragma: no cover
@@ -290,14 +326,19 @@ class PickleCoder(Coder):  # pragma: no cover
 @app.on_event("startup")
 async def startup() -> None:
     redis = await Redis.from_url(str(settings.redisdsn))
+    cache_backend = SingleFlightRedisBackend(
+        redis, settings.cache_single_flight_timeout
+    )
     FastAPICache.init(
-        RedisBackend(redis),
+        cache_backend,
         prefix=f"{settings.redis_prefix}:cache",
         expire=60 * 60 * 24 * 7,
         key_builder=custom_key_builder,
         coder=PickleCoder,
     )
     app.state.redis = redis
+    app.state.cache_backend = cache_backend
+    app.state.cache_hits = CacheHits(redis, settings.cache_warm_up_size)
 
 
 @app.on_event("shutdown")
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, String, Table
+
+from .base import metadata
+
+loadedSourceHash = Table(
+    "loadedSourceHash",
+    metadata,
+    Column("name", String, primary_key=True),
+    Column("sourceHash", String),
+    Column("appHash", String),
+)
@@ -2936,16 +2936,22 @@ ScriptFileList = Table(
     Column("questId", Integer, index=True),
     Column("phase", Integer, index=True),
     Column("sceneType", Integer),
-    Column("rawScriptSHA1", String),
+    Column("rawScriptSHA1", String, index=True),
+)
+
+
+# Scripts used by several quests are only stored and indexed once
+ScriptContent = Table(
+    "ScriptContent",
+    metadata,
+    Column("rawScriptSHA1", String, primary_key=True),
     Column("rawScript", TEXT),
     Column("textScript", TEXT),
 )
 
-Index("ix_ScriptFileList_raw", ScriptFileList.c.rawScript, postgresql_using="pgroonga")
+Index("ix_ScriptContent_raw", ScriptContent.c.rawScript, postgresql_using="pgroonga")
 
-Index(
-    "ix_ScriptFileList_text", ScriptFileList.c.textScript, postgresql_using="pgroonga"
-)
+Index("ix_ScriptContent_text", ScriptContent.c.textScript, postgresql_using="pgroonga")
 
 AssetStorage = Table(
     "AssetStorage",
@@ -1,4 +1,4 @@
-from sqlalchemy import VARCHAR, Column, Index, Integer, Table, text
+from sqlalchemy import BIGINT, VARCHAR, Column, Index, Integer, Table, text
 from sqlalchemy.dialects.postgresql import JSONB
 
 from .base import metadata
@@ -24,3 +24,81 @@ rayshiftQuestHash = Table(
     Column("queryId", Integer, primary_key=True),
     Column("questHash", VARCHAR(100), index=True),
 )
+
+
+# Fields of the runs with a quest detail, extracted from questDetail when the
+# runs are inserted so the quest endpoints don't need to read the JSONB
+rayshiftRun = Table(
+    "rayshiftRun",
+    metadata,
+    Column("queryId", Integer, primary_key=True),
+    Column("questId", Integer),
+    Column("phase", Integer),
+    Column("questSelect", Integer),
+    Column("stageCutinCount", Integer),
+    Index("ix_rayshiftRun_quest", "questId", "phase", "questSelect", "queryId"),
+)
+
+
+rayshiftStageCutin = Table(
+    "rayshiftStageCutin",
+    metadata,
+    Column("queryId", Integer, primary_key=True),
+    Column("cutinIndex", Integer, primary_key=True),
+    Column("stage", Integer),
+    Column("skillId", Integer),
+)
+
+
+# Drop counts of the stage cut-ins of each run
+rayshiftCutinDrop = Table(
+    "rayshiftCutinDrop",
+    metadata,
+    Column("queryId", Integer, primary_key=True),
+    Column("stage", Integer, primary_key=True),
+    Column("type", Integer, primary_key=True),
+    Column("objectId", Integer, primary_key=True),
+    Column("originalNum", Integer, primary_key=True),
+    Column("dropCount", Integer),
+)
+
+
+# Drop counts of the runs, summed per quest, enemy hash, questSelect and range
+# of query IDs. Rows with stage -1 and deckId -1 are the drops of the whole run.
+rayshiftDropStats = Table(
+    "rayshiftDropStats",
+    metadata,
+    Column("questId", Integer, primary_key=True),
+    Column("phase", Integer, primary_key=True),
+    Column("questHash", VARCHAR(100), primary_key=True),
+    Column("questSelect", Integer, primary_key=True),
+    Column("queryIdFrom", Integer, primary_key=True),
+    Column("stage", Integer, primary_key=True),
+    Column("deckType", VARCHAR(10), primary_key=True),
+    Column("deckId", Integer, primary_key=True),
+    Column("type", Integer, primary_key=True),
+    Column("objectId", Integer, primary_key=True),
+    Column("originalNum", Integer, primary_key=True),
+    Column("dropCount", BIGINT),
+    Column("sumDropCountSquared", BIGINT),
+)
+
+
+rayshiftRunStats = Table(
+    "rayshiftRunStats",
+    metadata,
+    Column("questId", Integer, primary_key=True),
+    Column("phase", Integer, primary_key=True),
+    Column("questHash", VARCHAR(100), primary_key=True),
+    Column("questSelect", Integer, primary_key=True),
+    Column("queryIdFrom", Integer, primary_key=True),
+    Column("runs", BIGINT),
+)
+
+
+# Runs already added to rayshiftDropStats and rayshiftRunStats
+rayshiftStatsQuery = Table(
+    "rayshiftStatsQuery",
+    metadata,
+    Column("queryId", Integer, primary_key=True),
+)
@@ -0,0 +1,255 @@
+import asyncio
+import time
+from itertools import batched
+from pathlib import Path
+from typing import Callable, Iterator, NamedTuple, Optional
+
+import httpx
+import orjson
+from loguru import logger
+from pydantic import ValidationError
+
+from ..schemas.common import Region
+from ..schemas.rayshift import QuestDetail, QuestRayshiftResponse
+from .quest import DEFAULT_WAIT_SEC, QUEST_ENDPOINT, get_multiple_quests_params
+
+# The Rayshift API returns at most this many quest details per request
+QUERY_IDS_PER_REQUEST = 25
+
+# Attempts at fetching a batch that fails for other reasons than the rate limit
+MAX_FETCH_ATTEMPTS = 3
+
+
+class RayshiftRateLimitError(Exception):
+    def __init__(self, wait: float) -> None:
+        super().__init__(f"Rate limited by the Rayshift API for {wait} seconds")
+        self.wait = wait
+
+
+class TokenBucket:
+    """Allow `rate` requests per second on average, with bursts of `capacity`.
+
+    `pause` holds every request for a while, e.g. for the `wait` seconds the
+    API asks for when it rate limits a request.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        # No tokens build up while paused so requests restart at `rate`
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0
+        self.updated = self.paused_until
+
+
+async def fetch_quest_details(
+    client: httpx.AsyncClient,
+    region: Region,
+    query_ids: list[int],
+    quest_endpoint: str = QUEST_ENDPOINT,
+) -> dict[int, QuestDetail]:
+    params = get_multiple_quests_params(region, query_ids)
+    r = await client.get(f"{quest_endpoint}/get", params=params)
+    if r.status_code == httpx.codes.TOO_MANY_REQUESTS:
+        try:
+            body = orjson.loads(r.content)
+        except orjson.JSONDecodeError:
+            body = None
+        wait = DEFAULT_WAIT_SEC - 1
+        if isinstance(body, dict):
+            wait = body.get("wait", wait)
+        raise RayshiftRateLimitError(wait + 1)
+    r.raise_for_status()
+
+    try:
+        return QuestRayshiftResponse.parse_raw(r.content).response.questDetails
+    except ValidationError:
+        logger.exception(f"Failed to parse the quest details: {r.text}")
+        raise
+
+
+class ImportCheckpoint:
+    """JSON file with the last query ID imported in each region.
+
+    All query IDs up to the checkpoint have been fetched and inserted so an
+    import can resume after it.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.query_ids: dict[str, int] = {}
+        if path.exists():
+            self.query_ids = orjson.loads(path.read_bytes())
+
+    def get(self, region: Region) -> Optional[int]:
+        return self.query_ids.get(region.value)
+
+    def set(self, region: Region, query_id: int) -> None:
+        self.query_ids[region.value] = query_id
+        # Write then rename so a crash can't leave a truncated checkpoint
+        temp_path = self.path.with_name(f"{self.path.name}.tmp")
+        temp_path.write_bytes(orjson.dumps(self.query_ids))
+        temp_path.replace(self.path)
+
+
+class ImportProgress:
+    def __init__(self, total_runs: int, report_interval: float) -> None:
+        self.total_runs = total_runs
+        self.report_interval = report_interval
+        self.processed_runs = 0
+        self.loaded_runs = 0
+        self.failed_runs = 0
+        self.requests = 0
+        self.rate_limited = 0
+        self.start_time = time.perf_counter()
+        self.last_report = self.start_time
+
+    def report(self, force: bool = False) -> None:
+        now = time.perf_counter()
+        if not force and now - self.last_report < self.report_interval:
+            return
+        self.last_report = now
+
+        run_time = now - self.start_time
+        logger.info(
+            f"Processed {self.processed_runs}/{self.total_runs} query IDs, "
+            f"loaded {self.loaded_runs} quest details, "
+            f"failed {self.failed_runs} in {run_time:.2f}s "
+            f"({self.loaded_runs / run_time if run_time else 0:.1f} details/s, "
+            f"{self.requests} requests, {self.rate_limited} rate limited)"
+        )
+
+
+class FetchedBatch(NamedTuple):
+    batch_index: int
+    # None if the batch couldn't be fetched
+    quest_details: Optional[dict[int, QuestDetail]]
+
+
+InsertQuestDetails = Callable[[Region, dict[int, QuestDetail]], None]
+
+
+async def import_quest_details(
+    client: httpx.AsyncClient,
+    region: Region,
+    query_ids: list[int],
+    insert_quest_details: InsertQuestDetails,
+    bucket: TokenBucket,
+    checkpoint: Optional[ImportCheckpoint] = None,
+    fetch_workers: int = 4,
+    queue_size: int = 8,
+    report_interval: float = 10.0,
+    quest_endpoint: str = QUEST_ENDPOINT,
+) -> ImportProgress:
+    """Fetch the quest details of the query IDs and insert them.
+
+    Fetch workers share the token bucket and put the fetched batches in a
+    bounded queue. A single inserter takes everything in the queue and
+    inserts it in one `insert_quest_details` call in a thread, so inserts
+    overlap with the fetches and the fetches wait when the inserts fall
+    behind. The checkpoint is moved once all earlier batches are inserted and
+    never past a batch that failed, so a resumed import fetches it again.
+    """
+    query_ids = sorted(set(query_ids))
+    last_query_id = checkpoint.get(region) if checkpoint else None
+    if last_query_id is not None:
+        query_ids = [query_id for query_id in query_ids if query_id > last_query_id]
+
+    batches = list(batched(query_ids, QUERY_IDS_PER_REQUEST))
+    progress = ImportProgress(len(query_ids), report_interval)
+    pending_batches: Iterator[int] = iter(range(len(batches)))
+    fetched: asyncio.Queue[Optional[FetchedBatch]] = asyncio.Queue(queue_size)
+
+    async def fetch_batch(batch_index: int) -> Optional[dict[int, QuestDetail]]:
+        batch_query_ids = list(batches[batch_index])
+        attempt = 0
+        while True:
+            await bucket.acquire()
+            progress.requests += 1
+            try:
+                return await fetch_quest_details(
+                    client, region, batch_query_ids, quest_endpoint
+                )
+            except RayshiftRateLimitError as e:
+                progress.rate_limited += 1
+                logger.info(f"Waiting {e.wait} seconds for the Rayshift API")
+                bucket.pause(e.wait)
+            except (httpx.HTTPError, ValidationError):
+                attempt += 1
+                if attempt >= MAX_FETCH_ATTEMPTS:
+                    logger.exception(f"Failed to fetch query IDs: {batch_query_ids}")
+                    return None
+
+    async def fetch_worker() -> None:
+        for batch_index in pending_batches:
+            quest_details = await fetch_batch(batch_index)
+            await fetched.put(FetchedBatch(batch_index, quest_details))
+
+    async def inserter() -> None:
+        inserted_batches: set[int] = set()
+        next_batch = 0
+        workers_done = False
+        while not workers_done:
+            fetched_batches = [await fetched.get()]
+            while not fetched.empty():
+                fetched_batches.append(fetched.get_nowait())
+            if None in fetched_batches:
+                workers_done = True
+
+            quest_details: dict[int, QuestDetail] = {}
+            for fetched_batch in fetched_batches:
+                if fetched_batch is None:
+                    continue
+                batch_size = len(batches[fetched_batch.batch_index])
+                progress.processed_runs += batch_size
+                if fetched_batch.quest_details is None:
+                    progress.failed_runs += batch_size
+                    continue
+                quest_details |= fetched_batch.quest_details
+                inserted_batches.add(fetched_batch.batch_index)
+            if quest_details:
+                await asyncio.to_thread(insert_quest_details, region, quest_details)
+                progress.loaded_runs += len(quest_details)
+
+            previous_batch = next_batch
+            while next_batch in inserted_batches:
+                inserted_batches.remove(next_batch)
+                next_batch += 1
+            if checkpoint and next_batch > previous_batch:
+                checkpoint.set(region, batches[next_batch - 1][-1])
+
+            progress.report()
+
+    async with asyncio.TaskGroup() as tg:
+        insert_task = tg.create_task(inserter())
+        async with asyncio.TaskGroup() as fetch_tg:
+            for _ in range(max(fetch_workers, 1)):
+                fetch_tg.create_task(fetch_worker())
+        await fetched.put(None)
+        await insert_task
+
+    progress.report(force=True)
+    return progress
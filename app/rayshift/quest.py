@@ -93,23 +93,30 @@ async def get_quest_detail(
     return []
 
 
-def get_multiple_quests(
-    client: Client, region: Region, query_ids: list[int]
-) -> dict[int, QuestDetail]:
-    if NO_API_KEY or region not in REGION_ENUM:  # pragma: no cover
-        return {}
-
+def get_multiple_quests_params(
+    region: Region, query_ids: list[int]
+) -> dict[str, Union[str, int, list[int]]]:
     params: dict[str, Union[str, int, list[int]]] = {
         "apiKey": settings.rayshift_api_key.get_secret_value(),
         "region": REGION_ENUM[region],
         "showNpcSupport": "true",
     }
-    if len(query_ids) == 0:
-        return {}
-    elif len(query_ids) == 1:
+    if len(query_ids) == 1:
         params["id"] = query_ids[0]
     else:
         params["ids"] = query_ids
+    return params
+
+
+def get_multiple_quests(
+    client: Client, region: Region, query_ids: list[int]
+) -> dict[int, QuestDetail]:
+    if NO_API_KEY or region not in REGION_ENUM:  # pragma: no cover
+        return {}
+
+    if len(query_ids) == 0:
+        return {}
+    params = get_multiple_quests_params(region, query_ids)
 
     r = client.get(f"{QUEST_ENDPOINT}/get", params=params)
     if r.status_code == httpx.codes.TOO_MANY_REQUESTS:  # pragma: no cover
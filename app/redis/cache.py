@@ -0,0 +1,249 @@
+import asyncio
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, NamedTuple, Optional
+
+from fastapi_cache.backends.redis import RedisBackend
+from loguru import logger
+from redis.asyncio.lock import Lock
+from redis.exceptions import LockError, RedisError
+
+from ..config import Settings
+from ..schemas.common import Region
+from . import Redis
+from .helpers.repo_version import get_cache_version
+
+settings = Settings()
+
+
+# How often a worker checks Redis while another worker computes the same key
+SINGLE_FLIGHT_POLL_INTERVAL = 0.05
+
+# How often a worker adds its cached request counts to Redis
+CACHE_HITS_FLUSH_INTERVAL = 10.0
+
+# Number of requests tracked for each request warmed up
+CACHE_HITS_TRACKED_RATIO = 10
+
+
+CachedValue = tuple[int, Optional[bytes]]
+
+
+class SingleFlight:
+    """A cache key being computed by this worker"""
+
+    def __init__(self) -> None:
+        self.result: asyncio.Future[Optional[CachedValue]] = (
+            asyncio.get_running_loop().create_future()
+        )
+        self.lock: Optional[Lock] = None
+
+
+# Keys the current request is computing, see single_flight_scope
+request_flights: ContextVar[Optional[set[str]]] = ContextVar(
+    "request_flights", default=None
+)
+
+
+class SingleFlightRedisBackend(RedisBackend):
+    """fastapi_cache Redis backend that lets one request compute a missing key.
+
+    On a miss, the first request in the worker becomes the leader and tries to
+    take a Redis lock on the key. Other requests in the worker wait for the
+    leader's `set`. Workers that don't get the lock poll Redis until the value
+    shows up, or take over the lock if it's released without a value. Nobody
+    waits longer than `timeout` seconds before computing the value itself.
+    """
+
+    def __init__(self, redis: Redis, timeout: float) -> None:
+        super().__init__(redis)
+        self.timeout = timeout
+        self.flights: dict[str, SingleFlight] = {}
+
+    def get_lock(self, key: str) -> Lock:
+        return self.redis.lock(  # type: ignore[union-attr]
+            f"{key}:lock", timeout=self.timeout, blocking=False
+        )
+
+    async def get_with_ttl(self, key: str) -> CachedValue:
+        ttl, cached = await super().get_with_ttl(key)
+        if cached is not None or self.timeout <= 0:
+            return ttl, cached
+
+        flight = self.flights.get(key)
+        if flight is not None:
+            try:
+                result = await asyncio.wait_for(
+                    asyncio.shield(flight.result), self.timeout
+                )
+            except TimeoutError:
+                return 0, None
+            return result if result is not None else (0, None)
+
+        flight = SingleFlight()
+        self.flights[key] = flight
+        keys = request_flights.get()
+        if keys is not None:
+            keys.add(key)
+
+        lock = self.get_lock(key)
+        deadline = time.monotonic() + self.timeout
+        while time.monotonic() < deadline:
+            if await lock.acquire():
+                flight.lock = lock
+                return 0, None
+
+            await asyncio.sleep(SINGLE_FLIGHT_POLL_INTERVAL)
+            ttl, cached = await super().get_with_ttl(key)
+            if cached is not None:
+                self.finish(key, (ttl, cached))
+                return ttl, cached
+
+        return 0, None
+
+    async def set(self, key: str, value: bytes, expire: Optional[int] = None) -> None:
+        await super().set(key, value, expire)
+        await self.release(key, (expire or 0, value))
+
+    def finish(self, key: str, result: Optional[CachedValue]) -> Optional[Lock]:
+        flight = self.flights.pop(key, None)
+        if flight is None:
+            return None
+
+        keys = request_flights.get()
+        if keys is not None:
+            keys.discard(key)
+        if not flight.result.done():
+            flight.result.set_result(result)
+        return flight.lock
+
+    async def release(self, key: str, result: Optional[CachedValue] = None) -> None:
+        """Wake up the waiting requests and release the Redis lock of the key.
+
+        Without a result, the waiting requests compute the value themselves.
+        """
+        lock = self.finish(key, result)
+        if lock is not None:
+            try:
+                await lock.release()
+            except LockError:
+                pass
+
+
+@contextmanager
+def single_flight_scope() -> Iterator[set[str]]:
+    """Track the keys a request computes so they can be released if it fails"""
+    keys: set[str] = set()
+    token = request_flights.set(keys)
+    try:
+        yield keys
+    finally:
+        request_flights.reset(token)
+
+
+def get_cache_hits_key(region: str) -> str:
+    return f"{settings.redis_prefix}:cache_hits:{region}"
+
+
+class CachedRequest(NamedTuple):
+    cache_key: str
+    url: str
+
+
+class CacheHits:
+    """Count the requests of each cached response to warm up the popular ones.
+
+    Counts are kept in memory and added to a Redis sorted set per region every
+    CACHE_HITS_FLUSH_INTERVAL seconds. Members are "<cache key> <url>" with the
+    cache key of the request without the cache version, so the counts carry
+    over data updates.
+    """
+
+    def __init__(self, redis: Redis, warm_up_size: int) -> None:
+        self.redis = redis
+        self.max_size = warm_up_size * CACHE_HITS_TRACKED_RATIO
+        self.hits: defaultdict[str, Counter[str]] = defaultdict(Counter)
+        self.last_flush = time.monotonic()
+        self.flush_task: Optional[asyncio.Task[None]] = None
+
+    def record(self, region: str, cache_key: str, url: str) -> None:
+        if self.max_size <= 0:
+            return
+
+        self.hits[region][f"{cache_key} {url}"] += 1
+
+        now = time.monotonic()
+        if now - self.last_flush > CACHE_HITS_FLUSH_INTERVAL and (
+            self.flush_task is None or self.flush_task.done()
+        ):
+            self.last_flush = now
+            self.flush_task = asyncio.create_task(self.flush())
+
+    async def flush(self) -> None:
+        hits, self.hits = self.hits, defaultdict(Counter)
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for region, counter in hits.items():
+                    hits_key = get_cache_hits_key(region)
+                    for member, count in counter.items():
+                        pipe.zincrby(hits_key, count, member)
+                    pipe.zremrangebyrank(hits_key, 0, -self.max_size - 1)
+                await pipe.execute()
+        except RedisError:
+            logger.opt(exception=True).warning("Failed to save cache hit counts")
+
+
+async def get_top_cached_requests(
+    redis: Redis, region: Region, count: int
+) -> list[CachedRequest]:
+    if count <= 0:
+        return []
+
+    members = await redis.zrevrange(get_cache_hits_key(region.value), 0, count - 1)
+    return [CachedRequest(*member.decode("utf-8").split(" ", 1)) for member in members]
+
+
+async def decay_cache_hits(redis: Redis, region: Region) -> None:
+    """Halve the counts so requests that stopped being popular drop out over time"""
+    hits_key = get_cache_hits_key(region.value)
+    await redis.zunionstore(hits_key, {hits_key: 0.5})
+
+
+class CacheVersions:
+    """Per-worker copy of the cache version of each region.
+
+    The cache version is part of the cached response keys so an update only
+    needs to change it. It's re-read at most once every
+    `redis_lru_version_check_interval` seconds. A pinned version isn't re-read
+    until it's set again without `pin`, so a worker can warm up a new version
+    before the other workers switch to it.
+    """
+
+    def __init__(self) -> None:
+        self.versions: dict[Region, tuple[str, float]] = {}
+        self.pinned: set[Region] = set()
+
+    async def get(self, redis: Redis, region: Region) -> str:
+        now = time.monotonic()
+        checked = self.versions.get(region)
+        if checked is not None and (
+            region in self.pinned
+            or now - checked[1] < settings.redis_lru_version_check_interval
+        ):
+            return checked[0]
+
+        cache_version = await get_cache_version(redis, region)
+        self.versions[region] = (cache_version, now)
+        return cache_version
+
+    def set(self, region: Region, cache_version: str, pin: bool = False) -> None:
+        self.versions[region] = (cache_version, time.monotonic())
+        if pin:
+            self.pinned.add(region)
+        else:
+            self.pinned.discard(region)
+
+
+cache_versions = CacheVersions()
@@ -0,0 +1,93 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from ...config import Settings
+from ...schemas.common import Region
+from .. import Redis
+from .repo_version import get_repo_version
+
+settings = Settings()
+
+
+MISSING = object()
+
+
+class RedisLRUCache:
+    """Per-worker LRU cache of decoded Redis master data.
+
+    The entries of a region are dropped when its repo version changes. The repo
+    version is re-read at most once every `redis_lru_version_check_interval` seconds.
+    Cached objects are shared between requests and must not be modified.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self.data: OrderedDict[tuple[Region, Hashable], Any] = OrderedDict()
+        self.versions: dict[Region, tuple[Optional[str], float]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def check_version(self, redis: Redis, region: Region) -> None:
+        now = time.monotonic()
+        checked = self.versions.get(region)
+        if (
+            checked is not None
+            and now - checked[1] < settings.redis_lru_version_check_interval
+        ):
+            return
+
+        repo_info = await get_repo_version(redis, region)
+        version = repo_info.hash if repo_info is not None else None
+        if checked is not None and checked[0] != version:
+            self.clear(region)
+        self.versions[region] = (version, now)
+
+    async def get(self, redis: Redis, region: Region, key: Hashable) -> Any:
+        """Return the cached value or `MISSING`"""
+        if self.maxsize <= 0:
+            return MISSING
+
+        await self.check_version(redis, region)
+
+        try:
+            value = self.data[(region, key)]
+        except KeyError:
+            self.misses += 1
+            return MISSING
+
+        self.data.move_to_end((region, key))
+        self.hits += 1
+        return value
+
+    def set(self, region: Region, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+
+        self.data[(region, key)] = value
+        self.data.move_to_end((region, key))
+        while len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self, region: Optional[Region] = None) -> None:
+        if region is None:
+            self.data.clear()
+        else:
+            for key in [key for key in self.data if key[0] == region]:
+                del self.data[key]
+
+    def get_stats(self) -> dict[str, int | float]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+redis_lru_cache = RedisLRUCache(settings.redis_lru_cache_size)
@@ -1,4 +1,4 @@
-from typing import Optional, Type, TypeVar
+from typing import Iterable, Optional, Type, TypeVar
 
 from ...config import Settings
 from ...schemas.base import BaseModelORJson
@@ -13,8 +13,9 @@ from ...schemas.raw import (
     MstSvtExtra,
     MstTreasureDevice,
 )
-from ...zstd import zstd_decompress
 from .. import Redis
+from .lru_cache import MISSING, redis_lru_cache
+from .zstd_dict import zstd_decompress_redis
 
 settings = Settings()
 
@@ -37,10 +38,62 @@ async def fetch_id(
     redis: Redis, region: Region, schema: Type[RedisPydantic], item_id: int
 ) -> Optional[RedisPydantic]:
     redis_table = pydantic_obj_redis_table[schema][0]
+    cache_key = (redis_table, item_id)
+    cached: Optional[RedisPydantic] = await redis_lru_cache.get(
+        redis, region, cache_key
+    )
+    if cached is not MISSING:
+        return cached
+
     redis_key = f"{settings.redis_prefix}:data:{region.name}:{redis_table}"
     item_redis = await redis.hget(redis_key, str(item_id))
 
-    if item_redis:
-        return schema.model_validate_json(zstd_decompress(item_redis))
+    item = (
+        schema.model_validate_json(
+            await zstd_decompress_redis(redis, region, item_redis)
+        )
+        if item_redis
+        else None
+    )
+    redis_lru_cache.set(region, cache_key, item)
+    return item
+
+
+async def fetch_id_many(
+    redis: Redis, region: Region, schema: Type[RedisPydantic], item_ids: Iterable[int]
+) -> dict[int, RedisPydantic]:
+    """Fetch multiple items with one HMGET. Items not found are left out."""
+    redis_table = pydantic_obj_redis_table[schema][0]
+    items: dict[int, RedisPydantic] = {}
+    missing_ids: list[int] = []
+
+    for item_id in dict.fromkeys(item_ids):
+        cached: Optional[RedisPydantic] = await redis_lru_cache.get(
+            redis, region, (redis_table, item_id)
+        )
+        if cached is MISSING:
+            missing_ids.append(item_id)
+        elif cached is not None:
+            items[item_id] = cached
+
+    if not missing_ids:
+        return items
+
+    redis_key = f"{settings.redis_prefix}:data:{region.name}:{redis_table}"
+    items_redis = await redis.hmget(
+        redis_key, [str(item_id) for item_id in missing_ids]
+    )
+
+    for item_id, item_redis in zip(missing_ids, items_redis, strict=True):
+        item = (
+            schema.model_validate_json(
+                await zstd_decompress_redis(redis, region, item_redis)
+            )
+            if item_redis
+            else None
+        )
+        redis_lru_cache.set(region, (redis_table, item_id), item)
+        if item is not None:
+            items[item_id] = item
 
-    return None
+    return items
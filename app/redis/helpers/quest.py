@@ -7,6 +7,7 @@ from ...schemas.common import Language, Region
 from ...schemas.nice import EnemyDrop, NiceStage, QuestEnemy
 from ...zstd import zstd_compress, zstd_decompress
 from .. import Redis
+from ..cache import cache_versions
 
 settings = Settings()
 
@@ -17,8 +18,29 @@ def get_redis_cache_key(
     phase: int,
     hash: str | None = None,
     lang: Language = Language.jp,
+    cache_version: str | None = None,
 ) -> str:
-    return f"{settings.redis_prefix}:cache:{region.value}:stage_data:{quest_id}:{phase}:{hash}:{lang.value}"
+    version = f"{cache_version}:" if cache_version else ""
+    return f"{settings.redis_prefix}:cache:{region.value}:{version}stage_data:{quest_id}:{phase}:{hash}:{lang.value}"
+
+
+async def get_redis_cache_keys(
+    redis: Redis,
+    region: Region,
+    quest_id: int,
+    phase: int,
+    hash: str | None = None,
+    lang: Language = Language.jp,
+) -> tuple[str, str]:
+    """Keys of the stage data and of the heavy stage data.
+
+    Heavy stage data isn't versioned so it keeps being served after an update
+    until tasks.clear_redis_cache slowly clears it.
+    """
+    cache_version = await cache_versions.get(redis, region)
+    redis_key = get_redis_cache_key(region, quest_id, phase, hash, lang, cache_version)
+    heavy_key = f"{get_redis_cache_key(region, quest_id, phase, hash, lang)}:heavy"
+    return redis_key, heavy_key
 
 
 class RayshiftRedisData(BaseModelORJson):
@@ -39,12 +61,14 @@ async def get_stages_cache(
     lang: Language = Language.jp,
     hash: str | None = None,
 ) -> Optional[RayshiftRedisData]:
-    redis_key = get_redis_cache_key(region, quest_id, phase, hash, lang)
+    redis_key, heavy_key = await get_redis_cache_keys(
+        redis, region, quest_id, phase, hash, lang
+    )
 
     if redis_data := await redis.get(redis_key):
         return cast(RayshiftRedisData, pickle.loads(zstd_decompress(redis_data)))
 
-    if redis_data := await redis.get(f"{redis_key}:heavy"):
+    if redis_data := await redis.get(heavy_key):
         return cast(RayshiftRedisData, pickle.loads(zstd_decompress(redis_data)))
 
     return None
@@ -60,12 +84,14 @@ async def set_stages_cache(
     hash_: str | None = None,
     ttl: int | None = None,
 ) -> None:
-    redis_key = get_redis_cache_key(region, quest_id, phase, hash_, lang)
+    redis_key, heavy_key = await get_redis_cache_keys(
+        redis, region, quest_id, phase, hash_, lang
+    )
     if (
         data.quest_drops
         and data.quest_drops[0].runs > settings.quest_heavy_cache_threshold
     ):
-        redis_key = f"{redis_key}:heavy"
+        redis_key = heavy_key
 
     redis_data = zstd_compress(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL))
 
@@ -1,3 +1,4 @@
+import time
 from typing import Optional
 
 from ...config import Settings
@@ -39,3 +40,33 @@ async def set_region_version(
     redis_key = f"{settings.redis_prefix}:region_version:{region.name}"
     redis_data = repo_info.model_dump_json()
     await redis.set(redis_key, redis_data)
+
+
+def get_cache_version_key(region: Region) -> str:
+    return f"{settings.redis_prefix}:cache_version:{region.name}"
+
+
+async def get_cache_version(redis: Redis, region: Region) -> str:
+    cache_version = await redis.get(get_cache_version_key(region))
+    return cache_version.decode("utf-8") if cache_version else "0"
+
+
+async def new_cache_version(redis: Redis, region: Region) -> str:
+    """A new namespace for the cached responses of the region.
+
+    It's the data repo hash and the time of the update so reloading the same
+    data commit still gets a new namespace.
+    """
+    repo_info = await get_repo_version(redis, region)
+    repo_hash = repo_info.hash if repo_info is not None else ""
+    return f"{repo_hash}{int(time.time()):x}"
+
+
+async def set_cache_version(
+    redis: Redis, region: Region, cache_version: Optional[str] = None
+) -> str:
+    """Switch all the workers to the cache version, a new one if not given"""
+    if cache_version is None:
+        cache_version = await new_cache_version(redis, region)
+    await redis.set(get_cache_version_key(region), cache_version)
+    return cache_version
@@ -1,11 +1,14 @@
+from collections import defaultdict
 from enum import StrEnum
+from typing import Iterable, Mapping
 
 import orjson
 
 from ...config import Settings
-from ...schemas.common import Region
-from ...zstd import zstd_decompress
+from ...schemas.common import Region, ReverseDepth
 from .. import Redis
+from .lru_cache import MISSING, redis_lru_cache
+from .zstd_dict import zstd_decompress_redis
 
 settings = Settings()
 
@@ -21,14 +24,147 @@ class RedisReverse(StrEnum):
     SKILL_TO_CC = "skill_to_cc"
 
 
+ReverseIds = dict[RedisReverse, dict[int, list[int]]]
+
+
+BUFF_REVERSE_TYPES = (RedisReverse.BUFF_TO_FUNC,)
+FUNC_REVERSE_TYPES = (RedisReverse.FUNC_TO_SKILL, RedisReverse.FUNC_TO_TD)
+SKILL_REVERSE_TYPES = (
+    RedisReverse.ACTIVE_SKILL_TO_SVT,
+    RedisReverse.PASSIVE_SKILL_TO_SVT,
+    RedisReverse.SKILL_TO_MC,
+    RedisReverse.SKILL_TO_CC,
+)
+TD_REVERSE_TYPES = (RedisReverse.TD_TO_SVT,)
+
+
+# Reverse types to look up for the IDs found by a reverse type and the minimum
+# reverse depth needed to do so
+REVERSE_NEXT_LEVEL: dict[
+    RedisReverse, tuple[ReverseDepth, tuple[RedisReverse, ...]]
+] = {
+    RedisReverse.BUFF_TO_FUNC: (ReverseDepth.skillNp, FUNC_REVERSE_TYPES),
+    RedisReverse.FUNC_TO_SKILL: (ReverseDepth.servant, SKILL_REVERSE_TYPES),
+    RedisReverse.FUNC_TO_TD: (ReverseDepth.servant, TD_REVERSE_TYPES),
+}
+
+
+def get_reverse_redis_key(region: Region, reverse_type: RedisReverse) -> str:
+    return f"{settings.redis_prefix}:data:{region.name}:{reverse_type.name}"
+
+
+async def get_reverse_ids_multiple(
+    redis: Redis, region: Region, lookups: Mapping[RedisReverse, Iterable[int]]
+) -> ReverseIds:
+    """Get the reverse IDs of several reverse types in one Redis round trip"""
+    reverse_ids: ReverseIds = {}
+    to_fetch: list[tuple[RedisReverse, list[int]]] = []
+
+    for reverse_type, item_ids in lookups.items():
+        type_ids = reverse_ids.setdefault(reverse_type, {})
+        missing_ids: list[int] = []
+        for item_id in dict.fromkeys(item_ids):
+            cached = await redis_lru_cache.get(
+                redis, region, (reverse_type.name, item_id)
+            )
+            if cached is MISSING:
+                missing_ids.append(item_id)
+            else:
+                type_ids[item_id] = list(cached)
+        if missing_ids:
+            to_fetch.append((reverse_type, missing_ids))
+
+    if not to_fetch:
+        return reverse_ids
+
+    async with redis.pipeline(transaction=False) as pipe:
+        for reverse_type, missing_ids in to_fetch:
+            pipe.hmget(
+                get_reverse_redis_key(region, reverse_type),
+                [str(item_id) for item_id in missing_ids],
+            )
+        results: list[list[bytes | None]] = await pipe.execute()
+
+    for (reverse_type, missing_ids), items_redis in zip(to_fetch, results, strict=True):
+        for item_id, item_redis in zip(missing_ids, items_redis, strict=True):
+            id_list: list[int] = (
+                orjson.loads(await zstd_decompress_redis(redis, region, item_redis))
+                if item_redis
+                else []
+            )
+            redis_lru_cache.set(region, (reverse_type.name, item_id), id_list)
+            reverse_ids[reverse_type][item_id] = list(id_list)
+
+    return reverse_ids
+
+
+async def get_reverse_ids_many(
+    redis: Redis, region: Region, reverse_type: RedisReverse, item_ids: Iterable[int]
+) -> dict[int, list[int]]:
+    reverse_ids = await get_reverse_ids_multiple(
+        redis, region, {reverse_type: item_ids}
+    )
+    return reverse_ids[reverse_type]
+
+
 async def get_reverse_ids(
     redis: Redis, region: Region, reverse_type: RedisReverse, item_id: int
 ) -> list[int]:
-    redis_key = f"{settings.redis_prefix}:data:{region.name}:{reverse_type.name}"
-    item_redis = await redis.hget(redis_key, str(item_id))
+    return (await get_reverse_ids_many(redis, region, reverse_type, [item_id]))[item_id]
+
+
+async def get_reverse_id_tree(
+    redis: Redis,
+    region: Region,
+    reverse_types: Iterable[RedisReverse],
+    item_id: int,
+    reverseDepth: ReverseDepth,
+) -> ReverseIds:
+    """Walk the reverse graph breadth-first starting from `item_id`.
+
+    All the lookups of a level are done in one Redis round trip instead of one
+    round trip per node.
+    """
+    tree: ReverseIds = {}
+    lookups: dict[RedisReverse, set[int]] = {
+        reverse_type: {item_id} for reverse_type in reverse_types
+    }
+
+    while lookups:
+        level = await get_reverse_ids_multiple(redis, region, lookups)
+        next_lookups: defaultdict[RedisReverse, set[int]] = defaultdict(set)
+        for reverse_type, level_ids in level.items():
+            tree.setdefault(reverse_type, {}).update(level_ids)
+            if reverse_type not in REVERSE_NEXT_LEVEL:
+                continue
+            min_depth, next_types = REVERSE_NEXT_LEVEL[reverse_type]
+            if not reverseDepth >= min_depth:
+                continue
+            for next_type in next_types:
+                next_lookups[next_type].update(
+                    next_id
+                    for next_ids in level_ids.values()
+                    for next_id in next_ids
+                    if next_id not in tree.get(next_type, {})
+                )
+        lookups = {
+            reverse_type: ids for reverse_type, ids in next_lookups.items() if ids
+        }
+
+    return tree
+
+
+def lookup_reverse_ids(
+    tree: ReverseIds, reverse_type: RedisReverse, item_id: int
+) -> list[int]:
+    return tree.get(reverse_type, {}).get(item_id, [])
 
-    if item_redis:
-        id_list: list[int] = orjson.loads(zstd_decompress(item_redis))
-        return id_list
 
-    return []
+def get_reverse_values(tree: ReverseIds, *reverse_types: RedisReverse) -> set[int]:
+    """All the IDs found by the given reverse types, i.e. one level of the tree"""
+    return {
+        reverse_id
+        for reverse_type in reverse_types
+        for reverse_ids in tree.get(reverse_type, {}).values()
+        for reverse_id in reverse_ids
+    }
@@ -0,0 +1,117 @@
+from redis.asyncio.client import Pipeline
+
+from ...config import Settings
+from ...schemas.common import Region
+from ...zstd import (
+    ZstdDictNotFoundError,
+    add_zstd_dict,
+    remove_zstd_dict,
+    train_zstd_dict,
+    zstd_decompress,
+    zstd_dicts,
+)
+from .. import Redis
+
+settings = Settings()
+
+
+# Dictionaries registered in this process for each region
+region_dict_ids: dict[Region, set[int]] = {}
+
+
+def get_zstd_dict_redis_key(region: Region) -> str:
+    """Hash of dictionary ID to dictionary of the values of the region"""
+    return f"{settings.redis_prefix}:data:{region.name}:zstdDict"
+
+
+def get_zstd_dict_family_redis_key(region: Region) -> str:
+    """Hash of family to the ID of the dictionary its values are compressed with"""
+    return f"{settings.redis_prefix}:data:{region.name}:zstdDictFamily"
+
+
+async def train_redis_zstd_dict(
+    redis: Redis, region: Region, samples: list[bytes]
+) -> int:
+    """Train a dictionary for a family of Redis values and save it with the data.
+
+    The dictionary is added next to the one the current values use, which is
+    only removed by `publish_redis_zstd_dict` when the values are replaced.
+    Return the dictionary ID to compress the values with or 0 if no dictionary
+    should be used.
+    """
+    dict_id = train_zstd_dict(samples, settings.redis_zstd_dict_size)
+    if dict_id is None:
+        return 0
+
+    region_dict_ids.setdefault(region, set()).add(dict_id)
+    await redis.hset(
+        get_zstd_dict_redis_key(region), str(dict_id), zstd_dicts[dict_id].as_bytes()
+    )
+    return dict_id
+
+
+async def get_retired_zstd_dict_ids(
+    redis: Redis, region: Region, family: str, dict_id: int
+) -> list[int]:
+    """Dictionaries that are unused once the family's values use dict_id"""
+    family_dict_ids = {
+        field.decode("utf-8"): int(value)
+        for field, value in (
+            await redis.hgetall(get_zstd_dict_family_redis_key(region))
+        ).items()
+    }
+    old_dict_id = family_dict_ids.pop(family, 0)
+    if old_dict_id in (0, dict_id) or old_dict_id in family_dict_ids.values():
+        return []
+    return [old_dict_id]
+
+
+def publish_redis_zstd_dict(
+    pipe: "Pipeline[bytes]",
+    region: Region,
+    family: str,
+    dict_id: int,
+    retired_dict_ids: list[int],
+) -> None:
+    """Queue the family's switch to dict_id and the removal of the retired
+    dictionaries"""
+    family_key = get_zstd_dict_family_redis_key(region)
+    if dict_id:
+        pipe.hset(family_key, family, dict_id)
+    else:
+        pipe.hdel(family_key, family)
+    if retired_dict_ids:
+        pipe.hdel(get_zstd_dict_redis_key(region), *map(str, retired_dict_ids))
+
+
+async def load_zstd_dicts(redis: Redis, region: Region) -> None:
+    """Register the dictionaries of the current data in this process.
+
+    Dictionaries that are not in Redis anymore are unregistered. The ones of the
+    values being replaced are only removed from Redis after the swap so that the
+    old values stay readable while the data is being reloaded.
+    """
+    dict_ids = {
+        add_zstd_dict(dict_data)
+        for dict_data in await redis.hvals(get_zstd_dict_redis_key(region))
+    }
+
+    other_dict_ids = set[int]().union(
+        *(
+            ids
+            for other_region, ids in region_dict_ids.items()
+            if other_region != region
+        )
+    )
+    for dict_id in region_dict_ids.get(region, set()) - dict_ids - other_dict_ids:
+        remove_zstd_dict(dict_id)
+    region_dict_ids[region] = dict_ids
+
+
+async def zstd_decompress_redis(redis: Redis, region: Region, input: bytes) -> bytes:
+    """Decompress a Redis data value, loading its dictionary if it's a new one"""
+    try:
+        return zstd_decompress(input)
+    except ZstdDictNotFoundError:
+        await load_zstd_dicts(redis, region)
+        return zstd_decompress(input)
@@ -1,10 +1,14 @@
+import asyncio
 import time
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import contextmanager
 from dataclasses import dataclass
-from typing import Any, Callable
+from itertools import batched
+from typing import Any, Callable, Iterator, Optional, Sequence
 
 import orjson
 from loguru import logger
-from pydantic import DirectoryPath
 
 from ..config import Settings
 from ..data.buff import get_buff_with_classrelation
@@ -18,64 +22,153 @@ from ..data.reverse import (
     get_skill_to_MC,
     get_td_to_svt,
 )
+from ..data.utils import MasterDataStore
 from ..schemas.common import Region
 from ..schemas.raw import MstSvtExtra
 from ..zstd import zstd_compress
 from . import Redis
 from .helpers.pydantic_object import pydantic_obj_redis_table
 from .helpers.reverse import RedisReverse
+from .helpers.zstd_dict import (
+    get_retired_zstd_dict_ids,
+    load_zstd_dicts,
+    publish_redis_zstd_dict,
+    train_redis_zstd_dict,
+)
 
 settings = Settings()
 REDIS_DATA_PREFIX = f"{settings.redis_prefix}:data"
 
 
+# Number of fields compressed together and sent in one HSET
+REDIS_HSET_CHUNK_SIZE = 1000
+# Number of HSETs sent in one pipeline round trip
+REDIS_PIPELINE_SIZE = 10
+
+
+def compress_redis_chunk(
+    chunk: Sequence[tuple[str, bytes]], dict_id: int
+) -> dict[str, bytes]:
+    return {field: zstd_compress(value, dict_id) for field, value in chunk}
+
+
+async def load_redis_hash(
+    redis: Redis,
+    region: Region,
+    family: str,
+    redis_key: str,
+    json_data: dict[str, bytes],
+    executor: Optional[Executor] = None,
+) -> None:
+    """Compress the values and replace the hash at redis_key with them.
+
+    The values are written in chunks into a temporary key that is renamed over
+    redis_key at the end so lookups keep reading the old hash until then. The
+    chunks are compressed in the executor, zstd releases the GIL, while the
+    previous ones are being sent. The family switches to the new dictionary and
+    its old one is removed in the same MULTI as the rename, so the old values
+    can always be read with a dictionary that's still in Redis.
+    """
+    dict_id = await train_redis_zstd_dict(redis, region, list(json_data.values()))
+
+    loading_key = f"{redis_key}:loading"
+    await redis.delete(loading_key)
+
+    loop = asyncio.get_running_loop()
+    max_pending = settings.redis_compress_workers
+    pending: deque[asyncio.Future[dict[str, bytes]]] = deque()
+    written_fields = 0
+
+    async with redis.pipeline(transaction=False) as pipe:
+
+        async def send_chunk(mapping: dict[str, bytes]) -> None:
+            nonlocal written_fields
+            pipe.hset(loading_key, mapping=mapping)  # type: ignore[arg-type]
+            written_fields += len(mapping)
+            if len(pipe) >= REDIS_PIPELINE_SIZE:
+                await pipe.execute()
+
+        for chunk in batched(json_data.items(), REDIS_HSET_CHUNK_SIZE):
+            if executor is None:
+                await send_chunk(compress_redis_chunk(chunk, dict_id))
+                continue
+
+            pending.append(
+                loop.run_in_executor(executor, compress_redis_chunk, chunk, dict_id)
+            )
+            if len(pending) > max_pending:
+                await send_chunk(await pending.popleft())
+
+        while pending:
+            await send_chunk(await pending.popleft())
+        await pipe.execute()
+
+    retired_dict_ids = await get_retired_zstd_dict_ids(redis, region, family, dict_id)
+    async with redis.pipeline(transaction=True) as pipe:
+        if written_fields:
+            pipe.rename(loading_key, redis_key)
+        else:
+            pipe.delete(redis_key)
+        publish_redis_zstd_dict(pipe, region, family, dict_id, retired_dict_ids)
+        await pipe.execute()
+    await load_zstd_dicts(redis, region)
+
+
 async def load_pydantic_object(
-    redis: Redis, region_path: dict[Region, DirectoryPath], redis_prefix: str
+    redis: Redis,
+    region: Region,
+    master_data: MasterDataStore,
+    redis_prefix: str,
+    executor: Optional[Executor] = None,
 ) -> None:
-    for region, master_folder in region_path.items():
-        for master_file, id_field in pydantic_obj_redis_table.values():
-            table_json = master_folder / "master" / f"{master_file}.json"
-            if master_file != "mstBuff" and table_json.exists():
-                with open(table_json, "rb") as fp:
-                    master_data: list[dict[str, Any]] = orjson.loads(fp.read())
-                redis_data = {
-                    item[id_field]: zstd_compress(orjson.dumps(item))
-                    for item in master_data
-                }
-                redis_key = f"{redis_prefix}:{region.name}:{master_file}"
-                await redis.delete(redis_key)
-                await redis.hset(redis_key, mapping=redis_data)
+    for master_file, id_field in pydantic_obj_redis_table.values():
+        table_json = master_data.gamedata_path / "master" / f"{master_file}.json"
+        if master_file != "mstBuff" and table_json.exists():
+            json_data = {
+                str(item[id_field]): orjson.dumps(item)
+                for item in master_data.get_raw(master_file)
+            }
+            redis_key = f"{redis_prefix}:{region.name}:{master_file}"
+            await load_redis_hash(
+                redis, region, master_file, redis_key, json_data, executor
+            )
 
 
 async def load_svt_extra_redis(
-    redis: Redis, region: Region, svtExtras: list[MstSvtExtra]
+    redis: Redis,
+    region: Region,
+    svtExtras: list[MstSvtExtra],
+    executor: Optional[Executor] = None,
 ) -> None:
     redis_key = f"{REDIS_DATA_PREFIX}:{region.name}:mstSvtExtra"
-    svtExtra_redis_data = {
-        str(svtExtra.svtId): zstd_compress(svtExtra.model_dump_json().encode("utf-8"))
+    svtExtra_json = {
+        str(svtExtra.svtId): svtExtra.model_dump_json().encode("utf-8")
         for svtExtra in svtExtras
     }
-    await redis.delete(redis_key)
-    await redis.hset(redis_key, mapping=svtExtra_redis_data)  # type: ignore[arg-type]
+    await load_redis_hash(
+        redis, region, "mstSvtExtra", redis_key, svtExtra_json, executor
+    )
 
 
 async def load_mstBuff(
-    redis: Redis, region_path: dict[Region, DirectoryPath], redis_prefix: str
+    redis: Redis,
+    region: Region,
+    master_data: MasterDataStore,
+    redis_prefix: str,
+    executor: Optional[Executor] = None,
 ) -> None:
-    for region, repo_folder in region_path.items():
-        redis_key = f"{redis_prefix}:{region.name}:mstBuff"
-        mstBuff_data = get_buff_with_classrelation(repo_folder)
-        mstBuff_redis = {
-            k: zstd_compress(v.json().encode("utf-8")) for k, v in mstBuff_data.items()
-        }
-        await redis.delete(redis_key)
-        await redis.hset(redis_key, mapping=mstBuff_redis)  # type: ignore[arg-type]
+    redis_key = f"{redis_prefix}:{region.name}:mstBuff"
+    mstBuff_data = master_data.get_derived(get_buff_with_classrelation)
+    mstBuff_json = {
+        str(k): v.model_dump_json().encode("utf-8") for k, v in mstBuff_data.items()
+    }
+    await load_redis_hash(redis, region, "mstBuff", redis_key, mstBuff_json, executor)
 
 
 @dataclass
 class ReverseDataFunc:
     key: RedisReverse
-    dataFunc: Callable[[DirectoryPath], dict[int, Any]]
+    dataFunc: Callable[[MasterDataStore], dict[int, Any]]
 
 
 reverse_data_detail = [
@@ -91,28 +184,58 @@ reverse_data_detail = [
 
 
 async def load_reverse_data(
-    redis: Redis, region_path: dict[Region, DirectoryPath], redis_prefix: str
+    redis: Redis,
+    region: Region,
+    master_data: MasterDataStore,
+    redis_prefix: str,
+    executor: Optional[Executor] = None,
 ) -> None:
-    for region, gamedata_path in region_path.items():
-        for data in reverse_data_detail:
-            reverse_data = data.dataFunc(gamedata_path)
-            redis_data = {
-                str(k): zstd_compress(orjson.dumps(v)) for k, v in reverse_data.items()
-            }
-            redis_key = f"{redis_prefix}:{region.name}:{data.key.name}"
-            await redis.delete(redis_key)
-            await redis.hset(redis_key, mapping=redis_data)  # type: ignore[arg-type]
+    for data in reverse_data_detail:
+        reverse_data = data.dataFunc(master_data)
+        json_data = {str(k): orjson.dumps(v) for k, v in reverse_data.items()}
+        redis_key = f"{redis_prefix}:{region.name}:{data.key.name}"
+        await load_redis_hash(
+            redis, region, data.key.name, redis_key, json_data, executor
+        )
+
+
+async def load_region_redis_data(
+    redis: Redis,
+    region: Region,
+    master_data: MasterDataStore,
+    executor: Optional[Executor] = None,
+) -> None:
+    await load_pydantic_object(redis, region, master_data, REDIS_DATA_PREFIX, executor)
+    await load_mstBuff(redis, region, master_data, REDIS_DATA_PREFIX, executor)
+    await load_reverse_data(redis, region, master_data, REDIS_DATA_PREFIX, executor)
+
+
+@contextmanager
+def redis_compress_executor() -> Iterator[Optional[ThreadPoolExecutor]]:
+    """Threads compressing the Redis values, None to compress in the event loop"""
+    if settings.redis_compress_workers <= 0:
+        yield None
+        return
+
+    with ThreadPoolExecutor(
+        settings.redis_compress_workers, thread_name_prefix="redis_compress"
+    ) as executor:
+        yield executor
 
 
 async def load_redis_data(
-    redis: Redis, region_path: dict[Region, DirectoryPath]
+    redis: Redis, master_data: dict[Region, MasterDataStore]
 ) -> None:
     logger.info("Loading redis …")
     start_loading_time = time.perf_counter()
 
-    await load_pydantic_object(redis, region_path, REDIS_DATA_PREFIX)
-    await load_mstBuff(redis, region_path, REDIS_DATA_PREFIX)
-    await load_reverse_data(redis, region_path, REDIS_DATA_PREFIX)
+    with redis_compress_executor() as executor:
+        await asyncio.gather(
+            *(
+                load_region_redis_data(redis, region, region_master_data, executor)
+                for region, region_master_data in master_data.items()
+            )
+        )
 
     redis_loading_time = time.perf_counter() - start_loading_time
     logger.info(f"Loaded redis in {redis_loading_time:.2f}s.")
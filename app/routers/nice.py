@@ -3,7 +3,7 @@ from fastapi_cache.decorator import cache
 from loguru import logger
 
 from ..config import Settings
-from ..core import search
+from ..core import raw, search
 from ..core.nice import (
     ai,
     battle_message,
@@ -112,12 +112,20 @@ async def find_servant(
         if not search_param.excludeCollectionNo:
             search_param.excludeCollectionNo = [0]
         matches = await search.search_servant(conn, search_param)
+        raw_svts = await raw.get_servant_entities_many(
+            conn, [mstSvt.id for mstSvt in matches], True, lore, matches
+        )
         return list_response(
             [
                 await nice.get_nice_servant_model(
-                    conn, search_param.region, mstSvt.id, lang, lore, mstSvt
+                    conn,
+                    search_param.region,
+                    raw_svt.mstSvt.id,
+                    lang,
+                    lore,
+                    raw_svt=raw_svt,
                 )
-                for mstSvt in matches
+                for raw_svt in raw_svts
             ]
         )
 
@@ -186,12 +194,20 @@ async def find_equip(
 ) -> Response:
     async with get_db(search_param.region) as conn:
         matches = await search.search_equip(conn, search_param)
+        raw_svts = await raw.get_servant_entities_many(
+            conn, [mstSvt.id for mstSvt in matches], True, lore, matches
+        )
         return list_response(
             [
                 await nice.get_nice_equip_model(
-                    conn, search_param.region, mstSvt.id, lang, lore, mstSvt
+                    conn,
+                    search_param.region,
+                    raw_svt.mstSvt.id,
+                    lang,
+                    lore,
+                    raw_svt=raw_svt,
                 )
-                for mstSvt in matches
+                for raw_svt in raw_svts
             ]
         )
 
@@ -255,16 +271,24 @@ async def find_svt(
 ) -> Response:
     async with get_db(search_param.region) as conn:
         matches = await search.search_servant(conn, search_param)
+        raw_svts = await raw.get_servant_entities_many(
+            conn, [mstSvt.id for mstSvt in matches], True, lore, matches
+        )
         out: list[NiceServant] = []
-        for mstSvt in matches:
+        for raw_svt in raw_svts:
             try:
                 out.append(
                     await nice.get_nice_servant_model(
-                        conn, search_param.region, mstSvt.id, lang, lore, mstSvt
+                        conn,
+                        search_param.region,
+                        raw_svt.mstSvt.id,
+                        lang,
+                        lore,
+                        raw_svt=raw_svt,
                     )
                 )
             except HTTPException:
-                logger.warning(f"Failed to get basic servant of {mstSvt}")
+                logger.warning(f"Failed to get basic servant of {raw_svt.mstSvt}")
         return list_response(out)
 
 
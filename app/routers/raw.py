@@ -106,10 +106,9 @@ async def find_servant(
             search_param.excludeCollectionNo = [0]
         matches = await search.search_servant(conn, search_param)
         return list_response(
-            [
-                await raw.get_servant_entity(conn, mstSvt.id, expand, lore, mstSvt)
-                for mstSvt in matches
-            ]
+            await raw.get_servant_entities_many(
+                conn, [mstSvt.id for mstSvt in matches], expand, lore, matches
+            )
         )
 
 
@@ -161,10 +160,9 @@ async def find_equip(
     async with get_db(search_param.region) as conn:
         matches = await search.search_equip(conn, search_param)
         return list_response(
-            [
-                await raw.get_servant_entity(conn, mstSvt.id, expand, lore, mstSvt)
-                for mstSvt in matches
-            ]
+            await raw.get_servant_entities_many(
+                conn, [mstSvt.id for mstSvt in matches], expand, lore, matches
+            )
         )
 
 
@@ -216,10 +214,9 @@ async def find_svt(
     async with get_db(search_param.region) as conn:
         matches = await search.search_servant(conn, search_param)
         return list_response(
-            [
-                await raw.get_servant_entity(conn, mstSvt.id, expand, lore, mstSvt)
-                for mstSvt in matches
-            ]
+            await raw.get_servant_entities_many(
+                conn, [mstSvt.id for mstSvt in matches], expand, lore, matches
+            )
         )
 
 
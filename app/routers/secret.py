@@ -1,12 +1,14 @@
 from typing import Any, Optional
 
-from fastapi import APIRouter, BackgroundTasks, Depends, Response
+from fastapi import APIRouter, BackgroundTasks, Depends, Request, Response
 from pydantic import BaseModel
 
 from ..config import Settings, get_instance_info
 from ..core.info import get_all_repo_info
+from ..core.nice.func import parse_raw_dataVals
 from ..db.engine import async_engines
 from ..redis import Redis
+from ..redis.helpers.lru_cache import redis_lru_cache
 from ..tasks import pull_and_update
 from .deps import get_redis
 from .utils import pretty_print_response
@@ -30,6 +32,8 @@ async def get_secret_info(redis: Redis) -> dict[str, Any]:
         data_repo_version={
             k.value: v.model_dump(mode="json") for k, v in all_repo_info.items()
         },
+        redis_lru_cache=redis_lru_cache.get_stats(),
+        datavals_cache=parse_raw_dataVals.cache_info()._asdict(),
         **get_instance_info(settings),
     )
     return response_data
@@ -41,6 +45,7 @@ class GithubWebhookPayload(BaseModel):
 
 @router.post("/update")  # pragma: no cover
 async def update_gamedata(
+    request: Request,
     background_tasks: BackgroundTasks,
     payload: Optional[GithubWebhookPayload] = None,
     redis: Redis = Depends(get_redis),
@@ -55,7 +60,9 @@ async def update_gamedata(
             for region, region_data in settings.data.items()
             if region.name in ref_regions
         }
-    background_tasks.add_task(pull_and_update, region_pathes, async_engines, redis)
+    background_tasks.add_task(
+        pull_and_update, region_pathes, async_engines, redis, request.app
+    )
     secret_info = await get_secret_info(redis)
     regions = ", ".join(region.name for region in region_pathes)
     response_data = dict(
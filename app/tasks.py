@@ -1,18 +1,39 @@
 import asyncio
+import hashlib
+import multiprocessing
+import os
+import sys
 import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import AsyncExitStack
 from dataclasses import dataclass
+from functools import partial
 from pathlib import Path
-from typing import Any, Iterable, Union
+from types import TracebackType
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    Optional,
+    Self,
+    TypeVar,
+    Union,
+)
 
 import aiofiles
 import httpx
 import orjson
 import psutil
+from aiofiles.threadpool.text import AsyncTextIOWrapper
 from fastapi.concurrency import run_in_threadpool
 from git import Repo
 from loguru import logger
 from pydantic import DirectoryPath
 from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+from starlette.types import ASGIApp
 
 from .config import EXTRA_SVT_ID_IN_NICE, Settings, get_app_info, project_root
 from .core.basic import (
@@ -23,6 +44,7 @@ from .core.basic import (
     get_all_basic_servants,
     get_all_basic_wars,
 )
+from .core.name_index import name_indexes
 from .core.nice.battle_point import get_all_nice_battle_points
 from .core.nice.bgm import get_all_nice_bgms
 from .core.nice.cc import get_all_nice_ccs
@@ -37,30 +59,48 @@ from .core.nice.mc import get_all_nice_mcs
 from .core.nice.mm import get_all_nice_mms
 from .core.nice.nice import get_nice_equip_model, get_nice_servant_model
 from .core.nice.war import get_nice_war
-from .core.raw import get_all_bgm_entities, get_servant_entity
+from .core.raw import (
+    get_all_bgm_entities,
+    get_event_entity,
+    get_func_entity_no_reverse_many,
+    get_servant_entities_many,
+    get_war_entity,
+)
 from .core.utils import get_translation
 from .data.extra import get_extra_svt_data
-from .db.engine import engines
+from .data.utils import MasterDataStore
+from .db.engine import async_engines, engines
 from .db.helpers import fetch
 from .db.helpers.gacha import get_all_gacha_entities
 from .db.load import load_pydantic_to_db, update_db
 from .export.constants import export_constants
+from .export.dependencies import (
+    ExportGroup,
+    get_export_groups,
+)
 from .models.raw import mstSvtExtra
 from .redis import Redis
+from .redis.cache import (
+    CachedRequest,
+    cache_versions,
+    decay_cache_hits,
+    get_top_cached_requests,
+)
 from .redis.helpers.repo_version import (
+    get_cache_version,
     get_region_version,
     get_repo_version,
+    new_cache_version,
+    set_cache_version,
     set_region_version,
     set_repo_version,
 )
 from .redis.load import load_redis_data, load_svt_extra_redis
-from .routers.utils import list_string
 from .schemas.base import BaseModelORJson
 from .schemas.common import Language, Region, RegionInfo, RepoInfo
 from .schemas.enums import ALL_ENUMS, TRAIT_NAME
 from .schemas.gameenums import NiceItemType, SvtType
 from .schemas.nice import (
-    NiceBattlePoint,
     NiceEquip,
     NiceEvent,
     NiceGacha,
@@ -74,6 +114,7 @@ from .schemas.nice import (
 from .schemas.raw import (
     AssetStorageLine,
     BgmEntity,
+    FunctionEntityNoReverse,
     GachaEntity,
     MstBattlePoint,
     MstClassBoardBase,
@@ -93,23 +134,135 @@ from .schemas.raw import (
     ServantEntity,
 )
 
+if sys.platform != "win32":  # pragma: no cover
+    import resource
+
+
 settings = Settings()
 
 
+# Old cache keys are deleted this many at a time with a pause in between
+CACHE_SWEEP_BATCH_SIZE = 500
+CACHE_SWEEP_BATCH_INTERVAL = 0.1
+
+
+def get_memory_usage() -> tuple[int, int]:  # pragma: no cover
+    """Current and peak RSS of this process in bytes"""
+    memory_info = psutil.Process().memory_info()
+    if sys.platform == "win32":
+        return memory_info.rss, memory_info.peak_wset
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        return memory_info.rss, max_rss
+    return memory_info.rss, max_rss * 1024
+
+
+# Amount of text buffered by an export file before it's written to disk
+EXPORT_FILE_BUFFER_SIZE = 1024 * 1024
+
+
+class ExportFile:  # pragma: no cover
+    """Write an export file incrementally.
+
+    The content is written to a temporary file that replaces the export file once
+    it's complete so a partially written export file is never served.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.tmp_path = path.with_name(f"{path.name}.tmp")
+        self.buffer: list[str] = []
+        self.buffer_size = 0
+        self.start_time = 0.0
+        self.fp: Optional[AsyncTextIOWrapper] = None
+
+    async def __aenter__(self) -> Self:
+        self.start_time = time.perf_counter()
+        self.fp = await aiofiles.open(self.tmp_path, "w", encoding="utf-8")
+        return self
+
+    async def write(self, data: str) -> None:
+        self.buffer.append(data)
+        self.buffer_size += len(data)
+        if self.buffer_size >= EXPORT_FILE_BUFFER_SIZE:
+            await self.flush()
+
+    async def flush(self) -> None:
+        if self.fp is not None:
+            await self.fp.write("".join(self.buffer))
+        self.buffer = []
+        self.buffer_size = 0
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None:
+        if self.fp is None:
+            return
+        if exc_type is None:
+            await self.flush()
+        await self.fp.close()
+
+        if exc_type is not None:
+            self.tmp_path.unlink(missing_ok=True)
+            return
+
+        os.replace(self.tmp_path, self.path)
+
+        run_time = time.perf_counter() - self.start_time
+        rss, peak_rss = get_memory_usage()
+        logger.info(
+            f"Exported {self.path.name} in {run_time:.2f}s. "
+            f"RSS: {rss / 1024**2:.0f}MB, peak RSS: {peak_rss / 1024**2:.0f}MB."
+        )
+
+
+class ExportListFile(ExportFile):  # pragma: no cover
+    """Write a JSON array export file item by item"""
+
+    def __init__(self, path: Path) -> None:
+        super().__init__(path)
+        self.item_count = 0
+
+    async def __aenter__(self) -> Self:
+        await super().__aenter__()
+        await self.write("[")
+        return self
+
+    async def write_item(self, item_json: str) -> None:
+        if self.item_count:
+            await self.write(",")
+        await self.write(item_json)
+        self.item_count += 1
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None:
+        if exc_type is None:
+            await self.write("]")
+        await super().__aexit__(exc_type, exc, tb)
+
+
 async def dump_normal(
     export_path: Path, file_name: str, data: Any
 ) -> None:  # pragma: no cover
-    async with aiofiles.open(export_path / f"{file_name}.json", "wb") as fp:
-        await fp.write(orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS))
+    async with ExportFile(export_path / f"{file_name}.json") as fp:
+        await fp.write(orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS).decode())
 
 
 async def dump_orjson(
     export_path: Path, file_name: str, data: Iterable[BaseModelORJson]
 ) -> None:  # pragma: no cover
-    async with aiofiles.open(
-        export_path / f"{file_name}.json", "w", encoding="utf-8"
-    ) as fp:
-        await fp.write(list_string(data))
+    async with ExportListFile(export_path / f"{file_name}.json") as fp:
+        for item in data:
+            await fp.write_item(
+                item.model_dump_json(exclude_unset=True, exclude_none=True)
+            )
 
 
 @dataclass
@@ -132,14 +285,57 @@ class ExportUtil:
     async def dump_orjson_object(
         self, file_name: str, data: BaseModelORJson
     ) -> None:  # pragma: no cover
-        async with aiofiles.open(
-            self.export_path / f"{self.append_file_name(file_name)}.json",
-            "w",
-            encoding="utf-8",
+        async with ExportFile(
+            self.export_path / f"{self.append_file_name(file_name)}.json"
         ) as fp:
             await fp.write(data.json())
 
 
+T = TypeVar("T")
+TItem = TypeVar("TItem")
+TModel = TypeVar("TModel", bound=BaseModelORJson)
+
+
+@dataclass
+class ExportRunner:
+    """Run the export jobs of a region with a bounded number of DB connections.
+
+    Servants are converted in worker processes if an executor is given.
+    """
+
+    engine: AsyncEngine
+    semaphore: asyncio.Semaphore
+    executor: Optional[ProcessPoolExecutor] = None
+
+    async def run(
+        self, job: Callable[[AsyncConnection], Awaitable[T]]
+    ) -> T:  # pragma: no cover
+        async with self.semaphore, self.engine.connect() as conn:
+            return await job(conn)
+
+    async def run_batch(
+        self,
+        job: Callable[[AsyncConnection, list[TItem]], Awaitable[list[T]]],
+        batch: list[TItem],
+    ) -> list[T]:  # pragma: no cover
+        async with self.semaphore, self.engine.connect() as conn:
+            return await job(conn, batch)
+
+    async def run_batches(
+        self,
+        job: Callable[[AsyncConnection, list[TItem]], Awaitable[list[T]]],
+        items: list[TItem],
+        batch_size: int,
+    ) -> list[T]:  # pragma: no cover
+        """Run the job on batches of items concurrently and concat the results"""
+        async with asyncio.TaskGroup() as tg:
+            tasks = [
+                tg.create_task(self.run_batch(job, items[i : i + batch_size]))
+                for i in range(0, len(items), batch_size)
+            ]
+        return [result for task in tasks for result in task.result()]
+
+
 async def get_nice_svt(
     conn: AsyncConnection,
     region: Region,
@@ -167,53 +363,253 @@ async def get_nice_svt(
         )
 
 
-async def dump_svt(
-    conn: AsyncConnection, util: ExportUtil, file_name: str, svts: list[MstSvt]
-) -> None:  # pragma: no cover
-    region = util.region
-    export_path = util.export_path
+# Number of servants loaded together by get_servant_entities_many
+SVT_DUMP_BATCH_SIZE = 50
 
-    with_lore: list[str] = []
-    without_lore: list[str] = []
-    with_lore_en: list[str] = []
-    without_lore_en: list[str] = []
 
-    for svt in svts:
-        raw_svt = await get_servant_entity(
-            conn, svt.id, expand=True, lore=True, mstSvt=svt
-        )
+def get_svt_export_cache_dir(region: Region, file_name: str) -> Path:
+    return project_root / "export_cache" / region.value / file_name
+
+
+@dataclass
+class SvtExportCache:
+    hash: str
+    dependFuncIds: list[int]
+    jsons: list[str]
+
+
+def get_svt_export_hash(
+    app_hash: str,
+    langs: list[Language],
+    raw_svt: ServantEntity,
+    depend_func_ids: list[int],
+    depend_funcs: dict[int, FunctionEntityNoReverse],
+) -> str:
+    """Hash of everything the nice servant JSONs are generated from.
+
+    Besides the raw servant, nice conversion only reads the DependFunc functions
+    of the servant's skills and NPs.
+    """
+    content_hash = hashlib.sha1(
+        f"{app_hash}:{','.join(langs)}:{depend_func_ids}:".encode()
+    )
+    content_hash.update(raw_svt.model_dump_json().encode("utf-8"))
+    for func_id in depend_func_ids:
+        if func_id in depend_funcs:
+            content_hash.update(depend_funcs[func_id].model_dump_json().encode("utf-8"))
+    return content_hash.hexdigest()
+
+
+def get_depend_func_ids(nice_data: Any) -> set[int]:
+    """IDs of the DependFunc functions in nice JSON data"""
+    if isinstance(nice_data, list):
+        return set[int]().union(*map(get_depend_func_ids, nice_data))
+    if not isinstance(nice_data, dict):
+        return set()
+    func_ids = set[int]().union(*map(get_depend_func_ids, nice_data.values()))
+    if isinstance(nice_data.get("DependFunc"), dict):
+        func_ids.add(nice_data["DependFunc"]["funcId"])
+    return func_ids
+
+
+async def get_depend_funcs(
+    conn: AsyncConnection, func_ids: Iterable[int]
+) -> dict[int, FunctionEntityNoReverse]:  # pragma: no cover
+    return {
+        func.mstFunc.id: func
+        for func in await get_func_entity_no_reverse_many(conn, sorted(func_ids))
+    }
+
 
-        nice_svt = await get_nice_svt(conn, region, Language.jp, True, raw_svt)
-        with_lore.append(nice_svt.json(exclude_unset=True, exclude_none=True))
-        without_lore.append(
-            nice_svt.json(exclude={"profile"}, exclude_unset=True, exclude_none=True)
+def read_svt_export_cache(cache_path: Path) -> Optional[SvtExportCache]:
+    if not cache_path.exists():
+        return None
+    return SvtExportCache(**orjson.loads(cache_path.read_bytes()))
+
+
+def write_svt_export_cache(cache_path: Path, cache: SvtExportCache) -> None:
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    cache_path.write_bytes(orjson.dumps(cache))
+
+
+def prune_svt_export_cache(cache_dir: Path, svts: list[MstSvt]) -> None:
+    """Remove the cached JSONs of the servants that aren't exported anymore"""
+    svt_ids = {str(svt.id) for svt in svts}
+    for cache_path in cache_dir.glob("*.json"):
+        if cache_path.stem not in svt_ids:
+            cache_path.unlink()
+
+
+async def get_nice_svt_jsons(
+    conn: AsyncConnection,
+    region: Region,
+    svts: list[MstSvt],
+    langs: list[Language],
+    cache_dir: Optional[Path],
+) -> list[list[str]]:  # pragma: no cover
+    """Return the with lore and without lore JSONs of each language of the servants.
+
+    The raw servants are only fetched once for all languages. If `cache_dir` is
+    given, servants whose raw data and DependFunc functions didn't change since
+    the last export are read from the cache instead of being converted again.
+    """
+    raw_svts = await get_servant_entities_many(
+        conn, [svt.id for svt in svts], expand=True, lore=True, mstSvts=svts
+    )
+    app_hash = get_app_info().hash
+
+    cached = {
+        raw_svt.mstSvt.id: read_svt_export_cache(
+            cache_dir / f"{raw_svt.mstSvt.id}.json"
         )
+        for raw_svt in raw_svts
+        if cache_dir is not None
+    }
+    # The DependFunc IDs of a servant only change with its raw data, so the IDs of
+    # the cached JSONs are the ones to check
+    depend_funcs = await get_depend_funcs(
+        conn,
+        {
+            func_id
+            for cache in cached.values()
+            if cache
+            for func_id in cache.dependFuncIds
+        },
+    )
 
-        if region == Region.JP:
-            nice_svt_en = await get_nice_svt(conn, region, Language.en, True, raw_svt)
-            with_lore_en.append(nice_svt_en.json(exclude_unset=True, exclude_none=True))
-            without_lore_en.append(
-                nice_svt_en.json(
+    svt_jsons: list[list[str]] = []
+    for raw_svt in raw_svts:
+        cache = cached.get(raw_svt.mstSvt.id)
+        if cache is not None and cache.hash == get_svt_export_hash(
+            app_hash, langs, raw_svt, cache.dependFuncIds, depend_funcs
+        ):
+            svt_jsons.append(cache.jsons)
+            continue
+
+        jsons: list[str] = []
+        for lang in langs:
+            nice_svt = await get_nice_svt(conn, region, lang, True, raw_svt)
+            jsons.append(nice_svt.json(exclude_unset=True, exclude_none=True))
+            jsons.append(
+                nice_svt.json(
                     exclude={"profile"}, exclude_unset=True, exclude_none=True
                 )
             )
+        svt_jsons.append(jsons)
 
-    out_name = export_path / f"{file_name}.json"
-    out_lore_name = export_path / f"{file_name}_lore.json"
+        if cache_dir is not None:
+            depend_func_ids = sorted(get_depend_func_ids(orjson.loads(jsons[0])))
+            depend_funcs |= await get_depend_funcs(
+                conn, set(depend_func_ids) - depend_funcs.keys()
+            )
+            content_hash = get_svt_export_hash(
+                app_hash, langs, raw_svt, depend_func_ids, depend_funcs
+            )
+            write_svt_export_cache(
+                cache_dir / f"{raw_svt.mstSvt.id}.json",
+                SvtExportCache(content_hash, depend_func_ids, jsons),
+            )
 
-    async with aiofiles.open(out_lore_name, "w", encoding="utf-8") as fp:
-        await fp.write("[" + ",".join(with_lore) + "]")
-    async with aiofiles.open(out_name, "w", encoding="utf-8") as fp:
-        await fp.write("[" + ",".join(without_lore) + "]")
+    return svt_jsons
 
-    if region == Region.JP:
-        out_name_en = export_path / f"{file_name}_lang_en.json"
-        out_lore_name_en = export_path / f"{file_name}_lore_lang_en.json"
 
-        async with aiofiles.open(out_lore_name_en, "w", encoding="utf-8") as fp:
-            await fp.write("[" + ",".join(with_lore_en) + "]")
-        async with aiofiles.open(out_name_en, "w", encoding="utf-8") as fp:
-            await fp.write("[" + ",".join(without_lore_en) + "]")
+# The event loop of an export worker process is kept between batches so the worker
+# can reuse its DB connections
+export_worker_runner = asyncio.Runner()
+
+
+async def get_nice_svt_jsons_worker(
+    region: Region, svts: list[MstSvt], langs: list[Language], cache_dir: Optional[Path]
+) -> list[list[str]]:  # pragma: no cover
+    async with async_engines[region].connect() as conn:
+        return await get_nice_svt_jsons(conn, region, svts, langs, cache_dir)
+
+
+def export_nice_svt_batch(
+    region: Region, svts: list[MstSvt], langs: list[Language], cache_dir: Optional[Path]
+) -> list[list[str]]:  # pragma: no cover
+    """Entry point of the export worker processes"""
+    return export_worker_runner.run(
+        get_nice_svt_jsons_worker(region, svts, langs, cache_dir)
+    )
+
+
+async def get_nice_svt_batches(
+    runner: ExportRunner,
+    region: Region,
+    svts: list[MstSvt],
+    langs: list[Language],
+    cache_dir: Optional[Path],
+) -> AsyncIterator[list[list[str]]]:  # pragma: no cover
+    """Yield the servant JSONs batch by batch in order"""
+    batches = [
+        svts[i : i + SVT_DUMP_BATCH_SIZE]
+        for i in range(0, len(svts), SVT_DUMP_BATCH_SIZE)
+    ]
+
+    if runner.executor is None:
+        for batch in batches:
+            yield await runner.run(
+                partial(
+                    get_nice_svt_jsons,
+                    region=region,
+                    svts=batch,
+                    langs=langs,
+                    cache_dir=cache_dir,
+                )
+            )
+        return
+
+    loop = asyncio.get_running_loop()
+    pending: deque[asyncio.Future[list[list[str]]]] = deque()
+    for batch in batches:
+        pending.append(
+            loop.run_in_executor(
+                runner.executor,
+                export_nice_svt_batch,
+                region,
+                batch,
+                langs,
+                cache_dir,
+            )
+        )
+        # Only keep a few batches in flight so finished batches don't pile up in
+        # memory while waiting to be written
+        if len(pending) >= settings.export_workers * 2:
+            yield await pending.popleft()
+    while pending:
+        yield await pending.popleft()
+
+
+async def dump_svt(
+    runner: ExportRunner,
+    util: ExportUtil,
+    file_name: str,
+    svts: list[MstSvt],
+) -> None:  # pragma: no cover
+    langs = [Language.jp, Language.en] if util.region == Region.JP else [Language.jp]
+    cache_dir: Optional[Path] = None
+    if settings.export_incremental:
+        cache_dir = get_svt_export_cache_dir(util.region, file_name)
+        await asyncio.to_thread(prune_svt_export_cache, cache_dir, svts)
+    file_names: list[str] = []
+    for lang in langs:
+        lang_suffix = "_lang_en" if lang == Language.en else ""
+        file_names += [f"{file_name}_lore{lang_suffix}", f"{file_name}{lang_suffix}"]
+
+    async with AsyncExitStack() as stack:
+        export_files = [
+            await stack.enter_async_context(
+                ExportListFile(util.export_path / f"{name}.json")
+            )
+            for name in file_names
+        ]
+        async for svt_jsons in get_nice_svt_batches(
+            runner, util.region, svts, langs, cache_dir
+        ):
+            for jsons in svt_jsons:
+                for export_file, svt_json in zip(export_files, jsons, strict=True):
+                    await export_file.write_item(svt_json)
 
 
 def get_nice_items_from_raw(
@@ -291,9 +687,18 @@ async def dump_nice_mms(
 
 
 async def get_nice_wars_from_raw(
-    conn: AsyncConnection, util: ExportUtil, wars: list[MstWar]
-) -> list[NiceWar]:  # pragma: no cover
-    return [await get_nice_war(conn, util.region, war.id, util.lang) for war in wars]
+    conn: AsyncConnection, region: Region, wars: list[MstWar], langs: list[Language]
+) -> list[dict[Language, NiceWar]]:  # pragma: no cover
+    nice_wars: list[dict[Language, NiceWar]] = []
+    for war in wars:
+        raw_war = await get_war_entity(conn, war.id)
+        nice_wars.append(
+            {
+                lang: await get_nice_war(conn, region, war.id, lang, raw_war)
+                for lang in langs
+            }
+        )
+    return nice_wars
 
 
 async def dump_nice_wars(
@@ -303,11 +708,18 @@ async def dump_nice_wars(
 
 
 async def get_nice_events_from_raw(
-    conn: AsyncConnection, util: ExportUtil, events: list[MstEvent]
-) -> list[NiceEvent]:  # pragma: no cover
-    return [
-        await get_nice_event(conn, util.region, event.id, util.lang) for event in events
-    ]
+    conn: AsyncConnection, region: Region, events: list[MstEvent], langs: list[Language]
+) -> list[dict[Language, NiceEvent]]:  # pragma: no cover
+    nice_events: list[dict[Language, NiceEvent]] = []
+    for event in events:
+        raw_event = await get_event_entity(conn, event.id)
+        nice_events.append(
+            {
+                lang: await get_nice_event(conn, region, event.id, lang, raw_event)
+                for lang in langs
+            }
+        )
+    return nice_events
 
 
 async def dump_nice_events(
@@ -329,8 +741,9 @@ async def dump_nice_shops(
 
 
 async def dump_nice_battle_points(
-    util: ExportUtil, all_bp_data: list[NiceBattlePoint]
+    conn: AsyncConnection, util: ExportUtil, battle_points: list[MstBattlePoint]
 ) -> None:  # pragma: no cover
+    all_bp_data = await get_all_nice_battle_points(conn, battle_points)
     await util.dump_orjson("nice_battle_point", all_bp_data)
 
 
@@ -519,221 +932,365 @@ async def dump_current_events(
     await util.dump_orjson_object("timer_data", timer_data)
 
 
-async def generate_exports(
+async def get_last_export_info(region: Region) -> Optional[RegionInfo]:
+    info_path = project_root / "export" / region.value / "info.json"
+    if not info_path.exists():
+        return None
+    async with aiofiles.open(info_path, "rb") as fp:
+        return RegionInfo.model_validate_json(await fp.read())
+
+
+async def load_export_file(
+    util: ExportUtil, file_name: str, schema: type[TModel]
+) -> list[TModel]:  # pragma: no cover
+    export_file = util.export_path / f"{util.append_file_name(file_name)}.json"
+    async with aiofiles.open(export_file, "rb") as fp:
+        return [schema.model_validate(item) for item in orjson.loads(await fp.read())]
+
+
+# Number of wars and events converted together on one DB connection
+WAR_EVENT_EXPORT_BATCH_SIZE = 20
+
+
+async def export_region(
     redis: Redis,
+    region: Region,
     region_path: dict[Region, DirectoryPath],
-    async_engines: dict[Region, AsyncEngine],
+    runner: ExportRunner,
     enable_webhook: bool,
+    export_groups: Optional[set[ExportGroup]] = None,
 ) -> None:  # pragma: no cover
-    if settings.export_all_nice:
-        await export_constants(region_path)
-        for region in region_path:
-            start_time = time.perf_counter()
-            export_path = project_root / "export" / region.value
-            engine = async_engines[region]
+    """Generate the export files of a region.
+
+    Only the files of `export_groups` and the files depending on the current time
+    are generated if given.
+    """
+    export_path = project_root / "export" / region.value
+    util = ExportUtil(redis, region, export_path)
+    utils = [util]
+    if region == Region.JP:
+        utils.append(ExportUtil(redis, region, export_path, Language.en))
+    langs = [lang_util.lang for lang_util in utils]
 
-            logger.info(f"Exporting {region} data …")
-            util = ExportUtil(redis, region, export_path)
+    async with asyncio.TaskGroup() as tg:
+        all_svts_task = tg.create_task(
+            runner.run(lambda conn: fetch.get_everything(conn, MstSvt))
+        )
+        mstCcs_task = tg.create_task(
+            runner.run(lambda conn: fetch.get_everything(conn, MstCommandCode))
+        )
+        mstWars_task = tg.create_task(
+            runner.run(lambda conn: fetch.get_everything(conn, MstWar))
+        )
+        mstEvents_task = tg.create_task(
+            runner.run(lambda conn: fetch.get_everything(conn, MstEvent))
+        )
+        mstEquips_task = tg.create_task(
+            runner.run(lambda conn: fetch.get_everything(conn, MstEquip))
+        )
+        mstIllustrators_task = tg.create_task(
+            runner.run(lambda conn: fetch.get_everything(conn, MstIllustrator))
+        )
+        mstCvs_task = tg.create_task(
+            runner.run(lambda conn: fetch.get_everything(conn, MstCv))
+        )
+        bgms_task = tg.create_task(runner.run(get_all_bgm_entities))
+        mstItems_task = tg.create_task(
+            runner.run(lambda conn: fetch.get_everything(conn, MstItem))
+        )
+        mstMasterMissions_task = tg.create_task(
+            runner.run(lambda conn: fetch.get_everything(conn, MstMasterMission))
+        )
+        mstShops_task = tg.create_task(
+            runner.run(lambda conn: fetch.get_all(conn, MstShop, 0))
+        )
+        mstEnemyMasters_task = tg.create_task(
+            runner.run(lambda conn: fetch.get_everything(conn, MstEnemyMaster))
+        )
+        mstClassBoardBases_task = tg.create_task(
+            runner.run(lambda conn: fetch.get_everything(conn, MstClassBoardBase))
+        )
+        mstGrandGraphs_task = tg.create_task(
+            runner.run(lambda conn: fetch.get_everything(conn, MstGrandGraph))
+        )
+        mstBattlePoints_task = tg.create_task(
+            runner.run(lambda conn: fetch.get_everything(conn, MstBattlePoint))
+        )
+        asset_storage_task = tg.create_task(
+            runner.run(lambda conn: fetch.get_everything(conn, AssetStorageLine))
+        )
+        raw_gacha_entities_task = tg.create_task(runner.run(get_all_gacha_entities))
+        raw_constants_task = tg.create_task(
+            runner.run(lambda conn: fetch.get_everything(conn, MstConstant))
+        )
 
-            async with engine.connect() as conn:
-                all_svts = await fetch.get_everything(conn, MstSvt)
+    all_svts = all_svts_task.result()
+    mstCcs = mstCcs_task.result()
+    mstWars = mstWars_task.result()
+    mstEvents = mstEvents_task.result()
+    mstEquips = mstEquips_task.result()
+    raw_gacha_entities = raw_gacha_entities_task.result()
 
-            all_servants = [
-                svt for svt in all_svts if svt.collectionNo != 0 and svt.isServant()
-            ]
-            all_nice_servants = [
-                svt
-                for svt in all_svts
-                if (svt.collectionNo != 0 and svt.isServant())
-                or svt.id in EXTRA_SVT_ID_IN_NICE
-            ]
-            await dump_basic_servants(util, "basic_servant", all_servants)
+    all_servants = [
+        svt for svt in all_svts if svt.collectionNo != 0 and svt.isServant()
+    ]
+    all_nice_servants = [
+        svt
+        for svt in all_svts
+        if (svt.collectionNo != 0 and svt.isServant()) or svt.id in EXTRA_SVT_ID_IN_NICE
+    ]
+    all_equips = [svt for svt in all_svts if svt.collectionNo != 0 and svt.isEquip()]
 
-            all_equips = [
-                svt for svt in all_svts if svt.collectionNo != 0 and svt.isEquip()
-            ]
-            await dump_basic_equips(util, all_equips)
-
-            async with engine.connect() as conn:
-                mstCcs = await fetch.get_everything(conn, MstCommandCode)
-            await dump_basic_ccs(util, mstCcs)
-
-            async with engine.connect() as conn:
-                mstWars = await fetch.get_everything(conn, MstWar)
-            await dump_basic_wars(util, mstWars)
-
-            async with engine.connect() as conn:
-                mstEvents = await fetch.get_everything(conn, MstEvent)
-            await dump_basic_events(util, mstEvents)
-
-            async with engine.connect() as conn:
-                mstEquips = await fetch.get_everything(conn, MstEquip)
-            await dump_basic_mcs(util, mstEquips)
-
-            await dump_normal(export_path, "nice_trait", TRAIT_NAME)
-            await dump_normal(export_path, "nice_enums", ALL_ENUMS)
-
-            async with engine.connect() as conn:
-                mstIllustrators = await fetch.get_everything(conn, MstIllustrator)
-            await dump_illustrators(util, mstIllustrators)
-
-            async with engine.connect() as conn:
-                mstCvs = await fetch.get_everything(conn, MstCv)
-            await dump_cvs(util, mstCvs)
-
-            async with engine.connect() as conn:
-                bgms = await get_all_bgm_entities(conn)
-            async with engine.connect() as conn:
-                mstItems = await fetch.get_everything(conn, MstItem)
-            async with engine.connect() as conn:
-                mstMasterMissions = await fetch.get_everything(conn, MstMasterMission)
-            async with engine.connect() as conn:
-                mstShops = await fetch.get_all(conn, MstShop, 0)
-            async with engine.connect() as conn:
-                mstEnemyMasters = await fetch.get_everything(conn, MstEnemyMaster)
-            async with engine.connect() as conn:
-                mstClassBoardBases = await fetch.get_everything(conn, MstClassBoardBase)
-            async with engine.connect() as conn:
-                mstGrandGraphs = await fetch.get_everything(conn, MstGrandGraph)
-            async with engine.connect() as conn:
-                mstBattlePoints = await fetch.get_everything(conn, MstBattlePoint)
-
-            async with engine.connect() as conn:
-                asset_storage = await fetch.get_everything(conn, AssetStorageLine)
-            await util.dump_orjson("asset_storage", asset_storage)
-
-            await dump_basic_servants(util, "basic_svt", all_svts)
-
-            nice_items = get_nice_items_from_raw(util, mstItems)
-            await dump_nice_items(util, nice_items)
-            async with engine.connect() as conn:
-                await dump_nice_mcs(conn, util, mstEquips)
-            async with engine.connect() as conn:
-                await dump_nice_ccs(conn, util, mstCcs)
-            async with engine.connect() as conn:
-                nice_mms = await get_nice_mms_from_raw(conn, util, mstMasterMissions)
-            await dump_nice_mms(util, nice_mms)
-            await dump_nice_bgms(util, bgms)
-            async with engine.connect() as conn:
-                nice_shops = await util_get_nice_shops_from_raw(conn, util, mstShops)
-            await dump_nice_shops(util, nice_shops)
-            async with engine.connect() as conn:
-                await dump_nice_enemy_masters(conn, util, mstEnemyMasters)
-            async with engine.connect() as conn:
-                await dump_nice_class_boards(conn, util, mstClassBoardBases)
-            async with engine.connect() as conn:
-                await dump_nice_grand_graphs(conn, util, mstGrandGraphs)
-
-            async with engine.connect() as conn:
-                raw_gacha_entities = await get_all_gacha_entities(conn)
-            await dump_nice_gachas(util, raw_gacha_entities)
-
-            async with engine.connect() as conn:
-                nice_battle_points = await get_all_nice_battle_points(
-                    conn, mstBattlePoints
+    nice_items = {
+        lang_util.lang: get_nice_items_from_raw(lang_util, mstItems_task.result())
+        for lang_util in utils
+    }
+
+    def should_export(group: ExportGroup) -> bool:
+        return export_groups is None or group in export_groups
+
+    def exists(file_name: str) -> bool:
+        return all(
+            (export_path / f"{lang_util.append_file_name(file_name)}.json").exists()
+            for lang_util in utils
+        )
+
+    # The timer data needs the nice wars and events so they are read from the
+    # previous export if they don't have to be generated
+    export_wars = should_export(ExportGroup.WAR) or not exists("nice_war")
+    export_events = should_export(ExportGroup.EVENT) or not exists("nice_event")
+
+    async with asyncio.TaskGroup() as tg:
+        # The servants and equips take the longest so they are started first
+        if should_export(ExportGroup.SVT):
+            tg.create_task(dump_svt(runner, util, "nice_servant", all_nice_servants))
+            tg.create_task(dump_svt(runner, util, "nice_equip", all_equips))
+        if export_wars:
+            nice_wars_task = tg.create_task(
+                runner.run_batches(
+                    lambda conn, wars: get_nice_wars_from_raw(
+                        conn, region, wars, langs
+                    ),
+                    mstWars,
+                    WAR_EVENT_EXPORT_BATCH_SIZE,
                 )
-            await dump_nice_battle_points(util, nice_battle_points)
-
-            util_en = ExportUtil(redis, region, export_path, Language.en)
-            nice_items_lang_en: list[NiceItem] = []
-            if region == Region.JP:
-                await dump_basic_servants(util_en, "basic_servant", all_servants)
-                await dump_basic_events(util_en, mstEvents)
-
-            async with engine.connect() as conn:
-                await dump_svt(conn, util, "nice_servant", all_nice_servants)
-            async with engine.connect() as conn:
-                await dump_svt(conn, util, "nice_equip", all_equips)
-
-            async with engine.connect() as conn:
-                nice_wars = [
-                    await get_nice_war(conn, util.region, war.id, util.lang)
-                    for war in mstWars
-                ]
-            await dump_nice_wars(util, nice_wars)
-            async with engine.connect() as conn:
-                nice_events = await get_nice_events_from_raw(conn, util, mstEvents)
-            await dump_nice_events(util, nice_events)
-
-            async with engine.connect() as conn:
-                raw_constants = await fetch.get_everything(conn, MstConstant)
-
-            repo_info = await get_repo_version(redis, region)
-            if repo_info is None:
-                info_path = export_path / "info.json"
-                if info_path.exists():
-                    repo_info = RepoInfo.model_validate(
-                        orjson.loads(info_path.read_bytes())
+            )
+        if export_events:
+            nice_events_task = tg.create_task(
+                runner.run_batches(
+                    lambda conn, events: get_nice_events_from_raw(
+                        conn, region, events, langs
+                    ),
+                    mstEvents,
+                    WAR_EVENT_EXPORT_BATCH_SIZE,
+                )
+            )
+        nice_mms_task = tg.create_task(
+            runner.run(
+                partial(
+                    get_nice_mms_from_raw,
+                    util=util,
+                    mms=mstMasterMissions_task.result(),
+                )
+            )
+        )
+        nice_shops_task = tg.create_task(
+            runner.run(
+                partial(
+                    util_get_nice_shops_from_raw,
+                    util=util,
+                    shops=mstShops_task.result(),
+                )
+            )
+        )
+        if should_export(ExportGroup.BATTLE_POINT):
+            tg.create_task(
+                runner.run(
+                    partial(
+                        dump_nice_battle_points,
+                        util=util,
+                        battle_points=mstBattlePoints_task.result(),
                     )
-
-            export_info = await get_region_version(redis, region)
-            if export_info:
-                await dump_normal(
-                    export_path, "info", export_info.model_dump(mode="json")
                 )
-
-            await dump_current_events(
-                util,
-                repo_info,
-                nice_events,
-                nice_wars,
-                raw_gacha_entities,
-                nice_mms,
-                nice_shops,
-                nice_items,
-                raw_constants,
             )
 
-            if enable_webhook:
-                await report_webhooks(region_path, "export")
-
-            if region == Region.JP:
-                await dump_basic_equips(util_en, all_equips)
-                await dump_basic_ccs(util_en, mstCcs)
-                await dump_basic_wars(util_en, mstWars)
-                await dump_basic_mcs(util_en, mstEquips)
-
-                await dump_illustrators(util_en, mstIllustrators)
-                await dump_cvs(util_en, mstCvs)
-
-                await dump_basic_servants(util_en, "basic_svt", all_svts)
-                nice_items_lang_en = get_nice_items_from_raw(util_en, mstItems)
-                await dump_nice_items(util_en, nice_items_lang_en)
-                async with engine.connect() as conn:
-                    await dump_nice_mcs(conn, util_en, mstEquips)
-                async with engine.connect() as conn:
-                    await dump_nice_ccs(conn, util_en, mstCcs)
-                await dump_nice_bgms(util_en, bgms)
-                async with engine.connect() as conn:
-                    await dump_nice_class_boards(conn, util_en, mstClassBoardBases)
-                await dump_nice_gachas(util_en, raw_gacha_entities)
-
-                async with engine.connect() as conn:
-                    nice_wars_lang_en = await get_nice_wars_from_raw(
-                        conn, util_en, mstWars
+        if should_export(ExportGroup.ENUMS):
+            tg.create_task(dump_normal(export_path, "nice_trait", TRAIT_NAME))
+            tg.create_task(dump_normal(export_path, "nice_enums", ALL_ENUMS))
+        if should_export(ExportGroup.ASSET_STORAGE):
+            tg.create_task(
+                util.dump_orjson("asset_storage", asset_storage_task.result())
+            )
+        if should_export(ExportGroup.ENEMY_MASTER):
+            tg.create_task(
+                runner.run(
+                    partial(
+                        dump_nice_enemy_masters,
+                        util=util,
+                        mcs=mstEnemyMasters_task.result(),
+                    )
+                )
+            )
+        if should_export(ExportGroup.GRAND_GRAPH):
+            tg.create_task(
+                runner.run(
+                    partial(
+                        dump_nice_grand_graphs,
+                        util=util,
+                        graphs=mstGrandGraphs_task.result(),
                     )
-                await dump_nice_wars(util_en, nice_wars)
+                )
+            )
 
-                async with engine.connect() as conn:
-                    nice_events_lang_en = await get_nice_events_from_raw(
-                        conn, util_en, mstEvents
+        for lang_util in utils:
+            if should_export(ExportGroup.SVT):
+                tg.create_task(
+                    dump_basic_servants(lang_util, "basic_servant", all_servants)
+                )
+                tg.create_task(dump_basic_equips(lang_util, all_equips))
+                tg.create_task(dump_basic_servants(lang_util, "basic_svt", all_svts))
+            if should_export(ExportGroup.COMMAND_CODE):
+                tg.create_task(dump_basic_ccs(lang_util, mstCcs))
+                tg.create_task(
+                    runner.run(partial(dump_nice_ccs, util=lang_util, ccs=mstCcs))
+                )
+            if should_export(ExportGroup.MYSTIC_CODE):
+                tg.create_task(dump_basic_mcs(lang_util, mstEquips))
+                tg.create_task(
+                    runner.run(partial(dump_nice_mcs, util=lang_util, mcs=mstEquips))
+                )
+            if should_export(ExportGroup.WAR):
+                tg.create_task(dump_basic_wars(lang_util, mstWars))
+            if should_export(ExportGroup.EVENT):
+                tg.create_task(dump_basic_events(lang_util, mstEvents))
+            if should_export(ExportGroup.ILLUSTRATOR):
+                tg.create_task(
+                    dump_illustrators(lang_util, mstIllustrators_task.result())
+                )
+            if should_export(ExportGroup.CV):
+                tg.create_task(dump_cvs(lang_util, mstCvs_task.result()))
+            if should_export(ExportGroup.ITEM):
+                tg.create_task(dump_nice_items(lang_util, nice_items[lang_util.lang]))
+            if should_export(ExportGroup.BGM):
+                tg.create_task(dump_nice_bgms(lang_util, bgms_task.result()))
+            if should_export(ExportGroup.CLASS_BOARD):
+                tg.create_task(
+                    runner.run(
+                        partial(
+                            dump_nice_class_boards,
+                            util=lang_util,
+                            boards=mstClassBoardBases_task.result(),
+                        )
                     )
-                await dump_nice_events(util_en, nice_events_lang_en)
-
-                await dump_current_events(
-                    util_en,
-                    repo_info,
-                    nice_events_lang_en,
-                    nice_wars_lang_en,
-                    raw_gacha_entities,
-                    nice_mms,
-                    nice_shops,
-                    nice_items_lang_en,
-                    raw_constants,
                 )
+            if should_export(ExportGroup.GACHA):
+                tg.create_task(dump_nice_gachas(lang_util, raw_gacha_entities))
+
+    nice_mms = nice_mms_task.result()
+    nice_shops = nice_shops_task.result()
+    if should_export(ExportGroup.MASTER_MISSION):
+        await dump_nice_mms(util, nice_mms)
+    if should_export(ExportGroup.SHOP):
+        await dump_nice_shops(util, nice_shops)
+
+    nice_wars: dict[Language, list[NiceWar]] = {}
+    nice_events: dict[Language, list[NiceEvent]] = {}
+    for lang_util in utils:
+        lang = lang_util.lang
+        if export_wars:
+            nice_wars[lang] = [nice_war[lang] for nice_war in nice_wars_task.result()]
+            await dump_nice_wars(lang_util, nice_wars[lang])
+        else:
+            nice_wars[lang] = await load_export_file(lang_util, "nice_war", NiceWar)
+        if export_events:
+            nice_events[lang] = [
+                nice_event[lang] for nice_event in nice_events_task.result()
+            ]
+            await dump_nice_events(lang_util, nice_events[lang])
+        else:
+            nice_events[lang] = await load_export_file(
+                lang_util, "nice_event", NiceEvent
+            )
+
+    repo_info = await get_repo_version(redis, region)
+    if repo_info is None:
+        info_path = export_path / "info.json"
+        if info_path.exists():
+            repo_info = RepoInfo.model_validate(orjson.loads(info_path.read_bytes()))
+
+    export_info = await get_region_version(redis, region)
+    if export_info:
+        await dump_normal(export_path, "info", export_info.model_dump(mode="json"))
+
+    for lang_util in utils:
+        await dump_current_events(
+            lang_util,
+            repo_info,
+            nice_events[lang_util.lang],
+            nice_wars[lang_util.lang],
+            raw_gacha_entities,
+            nice_mms,
+            nice_shops,
+            nice_items[lang_util.lang],
+            raw_constants_task.result(),
+        )
+
+    if enable_webhook:
+        await report_webhooks(region_path, "export")
+
+
+async def generate_exports(
+    redis: Redis,
+    region_path: dict[Region, DirectoryPath],
+    async_engines: dict[Region, AsyncEngine],
+    enable_webhook: bool,
+) -> None:  # pragma: no cover
+    if settings.export_all_nice:
+        await export_constants(region_path)
+
+        executor = (
+            ProcessPoolExecutor(
+                settings.export_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            if settings.export_workers > 0
+            else None
+        )
+        # Shared by the regions so the DB connections stay bounded overall
+        semaphore = asyncio.Semaphore(settings.export_db_connections)
+
+        async def export_one_region(
+            region: Region, gamedata: DirectoryPath
+        ) -> None:  # pragma: no cover
+            start_time = time.perf_counter()
+            logger.info(f"Exporting {region} data …")
+
+            runner = ExportRunner(async_engines[region], semaphore, executor)
+            export_groups = (
+                get_export_groups(gamedata, await get_last_export_info(region))
+                if settings.export_incremental
+                else None
+            )
+            if export_groups is not None:
+                logger.info(f"Exporting {region} groups: {sorted(export_groups)} …")
+            await export_region(
+                redis, region, region_path, runner, enable_webhook, export_groups
+            )
 
             run_time = time.perf_counter() - start_time
-            logger.info(f"Exported {region} data in {run_time:.2f}s.")
+            _, peak_rss = get_memory_usage()
+            logger.info(
+                f"Exported {region} data in {run_time:.2f}s. "
+                f"Peak RSS: {peak_rss / 1024**2:.0f}MB."
+            )
+
+        try:
+            async with asyncio.TaskGroup() as tg:
+                for region, gamedata in region_path.items():
+                    tg.create_task(export_one_region(region, gamedata))
+        finally:
+            if executor is not None:
+                executor.shutdown()
 
 
 async def get_region_info(
@@ -814,14 +1371,128 @@ async def clear_redis_cache(
     logger.info(f"Cleared {key_count} cache redis keys. {clear_heavy_quests=}")
 
 
-async def load_svt_extra(
+async def update_cache_version(
+    redis: Redis, region_path: dict[Region, DirectoryPath], app: Optional[ASGIApp]
+) -> None:  # pragma: no cover
+    """Move the regions to new cache namespaces, which invalidates all cached
+    responses except the heavy stage data at once.
+
+    If `app` is given, the most popular requests are first computed in the new
+    namespaces by this worker only. The other workers keep serving the old
+    responses until the new versions are saved to Redis after the warm-up.
+    """
+    new_versions = {
+        region: await new_cache_version(redis, region) for region in region_path
+    }
+
+    try:
+        if app is not None:
+            for region, cache_version in new_versions.items():
+                cache_versions.set(region, cache_version, pin=True)
+            cached_requests = {
+                region: await get_top_cached_requests(
+                    redis, region, settings.cache_warm_up_size
+                )
+                for region in region_path
+            }
+            await warm_up_cache(app, redis, cached_requests)
+    finally:
+        for region, cache_version in new_versions.items():
+            await set_cache_version(redis, region, cache_version)
+            cache_versions.set(region, cache_version)
+            logger.info(f"Updated {region} cache version to {cache_version}.")
+
+
+async def sweep_redis_cache(
     redis: Redis, region_path: dict[Region, DirectoryPath]
+) -> None:  # pragma: no cover
+    """Delete the cached responses of older cache versions.
+
+    They are not used anymore so they are deleted in small batches with UNLINK
+    to not get in the way of live traffic. The heavy stage data is left to
+    clear_redis_cache.
+    """
+    key_count = 0
+
+    for region in region_path:
+        cache_version = await get_cache_version(redis, region)
+        current_prefix = (
+            f"{settings.redis_prefix}:cache:{region.value}:{cache_version}:"
+        ).encode("utf-8")
+        key_pattern = f"{settings.redis_prefix}:cache:{region.value}:*"
+
+        old_keys: list[bytes] = []
+        async for key in redis.scan_iter(match=key_pattern, count=1000):
+            if key.startswith(current_prefix) or b"heavy" in key:
+                continue
+            old_keys.append(key)
+            if len(old_keys) >= CACHE_SWEEP_BATCH_SIZE:
+                key_count += await redis.unlink(*old_keys)
+                old_keys = []
+                await asyncio.sleep(CACHE_SWEEP_BATCH_INTERVAL)
+        if old_keys:
+            key_count += await redis.unlink(*old_keys)
+
+    old_keys = [
+        key async for key in redis.scan_iter(match=f"{settings.redis_prefix}:cache::*")
+    ]
+    if old_keys:
+        key_count += await redis.unlink(*old_keys)
+
+    logger.info(f"Swept {key_count} old cache redis keys.")
+
+
+async def warm_up_cache(
+    app: ASGIApp, redis: Redis, cached_requests: dict[Region, list[CachedRequest]]
+) -> None:  # pragma: no cover
+    """Compute the cached responses of the most popular requests.
+
+    The requests are sent with `Cache-Control: no-cache` so they don't count
+    towards the popularity of the request.
+    """
+    start_time = time.perf_counter()
+    semaphore = asyncio.Semaphore(settings.cache_warm_up_concurrency)
+    warmed_count = 0
+
+    async def warm_up(client: httpx.AsyncClient, url: str) -> None:
+        nonlocal warmed_count
+        async with semaphore:
+            try:
+                response = await client.get(url, headers={"Cache-Control": "no-cache"})
+            except Exception:  # noqa: BLE001
+                logger.exception(f"Failed to warm up {url}")
+                return
+            if response.is_success:
+                warmed_count += 1
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://warm-up"
+    ) as client:
+        # In order of popularity, the semaphore lets the next one start when one is done
+        await asyncio.gather(
+            *(
+                warm_up(client, cached_request.url)
+                for region_requests in cached_requests.values()
+                for cached_request in region_requests
+            )
+        )
+
+    for region in cached_requests:
+        await decay_cache_hits(redis, region)
+
+    warm_up_time = time.perf_counter() - start_time
+    logger.info(f"Warmed up {warmed_count} cached responses in {warm_up_time:.2f}s.")
+
+
+async def load_svt_extra(
+    redis: Redis, master_data: dict[Region, MasterDataStore]
 ) -> None:  # pragma: no cover
     logger.info("Loading extra svt data …")
     start_loading_time = time.perf_counter()
 
-    for region, gamedata_path in region_path.items():
-        svtExtras = get_extra_svt_data(region, gamedata_path)
+    for region, region_master_data in master_data.items():
+        svtExtras = get_extra_svt_data(region, region_master_data)
         if settings.write_postgres_data:
             with engines[region].begin() as conn:
                 load_pydantic_to_db(conn, svtExtras, mstSvtExtra)
@@ -832,27 +1503,50 @@ async def load_svt_extra(
     logger.info(f"Loaded extra svt data in {extra_loading_time:.2f}s.")
 
 
+async def load_data(
+    redis: Redis,
+    region_path: dict[Region, DirectoryPath],
+    async_engines: dict[Region, AsyncEngine],
+    enable_webhook: bool,
+) -> None:  # pragma: no cover
+    # The master files used by several loaders are only read and parsed once
+    master_data = {
+        region: MasterDataStore(gamedata_path)
+        for region, gamedata_path in region_path.items()
+    }
+
+    if settings.write_postgres_data:
+        update_db(master_data)
+        for region in region_path:
+            async with async_engines[region].connect() as conn:
+                await name_indexes.build_all(conn, region)
+    if settings.write_redis_data:
+        await load_redis_data(redis, master_data)
+        await update_master_repo_info(redis, region_path)
+    if settings.write_postgres_data or settings.write_redis_data:
+        await load_svt_extra(redis, master_data)
+        if enable_webhook:
+            await report_webhooks(region_path, "load")
+
+
 async def load_and_export(
     redis: Redis,
     region_path: dict[Region, DirectoryPath],
     async_engines: dict[Region, AsyncEngine],
     enable_webhook: bool,
+    app: Optional[ASGIApp] = None,
 ) -> None:  # pragma: no cover
     try:
-        if settings.write_postgres_data:
-            update_db(region_path)
-        if settings.write_redis_data:
-            await load_redis_data(redis, region_path)
-            await update_master_repo_info(redis, region_path)
-        if settings.write_postgres_data or settings.write_redis_data:
-            await load_svt_extra(redis, region_path)
-            if enable_webhook:
-                await report_webhooks(region_path, "load")
+        await load_data(redis, region_path, async_engines, enable_webhook)
     except Exception:  # noqa: BLE001
         logger.exception("Failed to load data")
 
-    if settings.clear_redis_cache:
-        await clear_redis_cache(redis, region_path, clear_heavy_quests=False)
+    # The cache warm-up runs next to the exports so they aren't delayed by it
+    cache_version_task = (
+        asyncio.create_task(update_cache_version(redis, region_path, app))
+        if settings.clear_redis_cache
+        else None
+    )
 
     if settings.export_all_nice:
         try:
@@ -863,7 +1557,9 @@ async def load_and_export(
         except Exception:  # noqa: BLE001
             logger.exception("Failed to export data")
 
-    if settings.clear_redis_cache:
+    if cache_version_task is not None:
+        await cache_version_task
+        await sweep_redis_cache(redis, region_path)
         await clear_redis_cache(redis, region_path, clear_heavy_quests=True)
 
     await logger.complete()
@@ -904,6 +1600,7 @@ async def pull_and_update(
     region_path: dict[Region, DirectoryPath],
     async_engines: dict[Region, AsyncEngine],
     redis: Redis,
+    app: Optional[ASGIApp] = None,
 ) -> None:  # pragma: no cover
     await run_in_threadpool(lambda: update_data_repo(region_path))
-    await load_and_export(redis, region_path, async_engines, True)
+    await load_and_export(redis, region_path, async_engines, True, app)
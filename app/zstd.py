@@ -1,17 +1,113 @@
+import threading
+from typing import Any, Optional, Sequence
+
 import zstandard
 
+ZSTANDARD_MAGIC_BYTES = (0xFD2FB528).to_bytes(4, "little")
+
+# Minimum number of samples to train a dictionary on. zstd refuses to train on
+# too few samples and a dictionary wouldn't help much for a small table anyway.
+ZSTD_DICT_MIN_SAMPLES = 100
 
-def zstd_compress(input: bytes) -> bytes:
-    cctx = zstandard.ZstdCompressor()
-    return cctx.compress(input)
 
+# Dictionaries known to this process, keyed by dictionary ID
+zstd_dicts: dict[int, zstandard.ZstdCompressionDict] = {}
 
-ZSTANDARD_MAGIC_BYTES = (0xFD2FB528).to_bytes(4, "little")
+
+class ZstdContexts(threading.local):
+    """Compression contexts are not thread safe so each thread gets its own set"""
+
+    def __init__(self) -> None:
+        self.compressors: dict[int, zstandard.ZstdCompressor] = {}
+        self.decompressors: dict[int, zstandard.ZstdDecompressor] = {}
+
+
+zstd_contexts = ZstdContexts()
+
+
+class ZstdDictNotFoundError(Exception):
+    def __init__(self, dict_id: int) -> None:
+        super().__init__(f"zstd dictionary {dict_id} is not loaded")
+        self.dict_id = dict_id
+
+
+def prune_zstd_contexts(contexts: dict[int, Any]) -> None:
+    """Drop the contexts of the dictionaries removed since they were created"""
+    removed_ids = [
+        dict_id for dict_id in contexts if dict_id and dict_id not in zstd_dicts
+    ]
+    for dict_id in removed_ids:
+        del contexts[dict_id]
+
+
+def get_zstd_compressor(dict_id: int = 0) -> zstandard.ZstdCompressor:
+    cctx = zstd_contexts.compressors.get(dict_id)
+    if cctx is None:
+        prune_zstd_contexts(zstd_contexts.compressors)
+        if dict_id:
+            cctx = zstandard.ZstdCompressor(dict_data=zstd_dicts[dict_id])
+        else:
+            cctx = zstandard.ZstdCompressor()
+        zstd_contexts.compressors[dict_id] = cctx
+    return cctx
+
+
+def get_zstd_decompressor(dict_id: int = 0) -> zstandard.ZstdDecompressor:
+    dctx = zstd_contexts.decompressors.get(dict_id)
+    if dctx is None:
+        prune_zstd_contexts(zstd_contexts.decompressors)
+        if dict_id:
+            dctx = zstandard.ZstdDecompressor(dict_data=zstd_dicts[dict_id])
+        else:
+            dctx = zstandard.ZstdDecompressor()
+        zstd_contexts.decompressors[dict_id] = dctx
+    return dctx
+
+
+def zstd_compress(input: bytes, dict_id: int = 0) -> bytes:
+    return get_zstd_compressor(dict_id).compress(input)
 
 
 def zstd_decompress(input: bytes) -> bytes:
     if input.startswith(ZSTANDARD_MAGIC_BYTES):
-        dctx = zstandard.ZstdDecompressor()
-        return dctx.decompress(input)
+        # The dictionary ID is written in the frame header so entries compressed
+        # with an older dictionary stay readable as long as it's still registered
+        dict_id = zstandard.get_frame_parameters(input).dict_id
+        if dict_id and dict_id not in zstd_dicts:
+            raise ZstdDictNotFoundError(dict_id)
+        return get_zstd_decompressor(dict_id).decompress(input)
 
     return input
+
+
+def add_zstd_dict(dict_data: bytes) -> int:
+    """Register a dictionary in this process and return its ID"""
+    zstd_dict = zstandard.ZstdCompressionDict(dict_data)
+    dict_id = zstd_dict.dict_id()
+    if dict_id not in zstd_dicts:
+        zstd_dicts[dict_id] = zstd_dict
+    return dict_id
+
+
+def remove_zstd_dict(dict_id: int) -> None:
+    """Unregister a dictionary that no stored value uses anymore.
+
+    The compression contexts of other threads are dropped the next time they
+    create a context.
+    """
+    zstd_dicts.pop(dict_id, None)
+    zstd_contexts.compressors.pop(dict_id, None)
+    zstd_contexts.decompressors.pop(dict_id, None)
+
+
+def train_zstd_dict(samples: Sequence[bytes], dict_size: int) -> Optional[int]:
+    """Train and register a dictionary, return its ID or None if training failed"""
+    if dict_size <= 0 or len(samples) < ZSTD_DICT_MIN_SAMPLES:
+        return None
+
+    try:
+        zstd_dict = zstandard.train_dictionary(dict_size, list(samples))
+    except zstandard.ZstdError:
+        return None
+
+    return add_zstd_dict(zstd_dict.as_bytes())
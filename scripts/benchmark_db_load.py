@@ -0,0 +1,91 @@
+import argparse
+import time
+from typing import Any, Callable
+
+import orjson
+from sqlalchemy import Table
+from sqlalchemy.engine import Connection
+
+from app.config import Settings
+from app.db.engine import engines
+from app.db.load import get_shadow_table, load_shadow_table, recreate_table
+from app.models.raw import TABLES_TO_BE_LOADED
+from app.schemas.common import Region
+
+settings = Settings()
+
+
+def remove_unknown_columns(
+    data: list[dict[str, Any]], table: Table
+) -> list[dict[str, Any]]:
+    table_columns = {column.name for column in table.columns}
+    return [{k: v for k, v in item.items() if k in table_columns} for item in data]
+
+
+def insert_executemany(conn: Connection, table: Table, data: Any) -> None:
+    """The previous loader: create the table with its indexes and executemany"""
+    shadow_table = get_shadow_table(table)
+    recreate_table(conn, shadow_table)
+    if data:
+        conn.execute(shadow_table.insert(), remove_unknown_columns(data, table))
+
+
+def measure(
+    region: Region,
+    table: Table,
+    data: list[dict[str, Any]],
+    loader: Callable[[Connection, Table, Any], Any],
+) -> float:
+    with engines[region].connect() as conn:
+        with conn.begin() as transaction:
+            start_time = time.perf_counter()
+            loader(conn, table, data)
+            run_time = time.perf_counter() - start_time
+            transaction.rollback()
+    return run_time
+
+
+def main(region: Region, tables: list[str]) -> None:
+    master_folder = settings.data[region].gamedata / "master"
+    total_executemany = total_copy = 0.0
+
+    print(f"{'table':>36} {'rows':>8} {'executemany':>12} {'copy':>8} {'speedup':>8}")
+    for table in (
+        table for table_group in TABLES_TO_BE_LOADED for table in table_group
+    ):
+        table_json = master_folder / f"{table.name}.json"
+        if (tables and table.name not in tables) or not table_json.exists():
+            continue
+
+        with open(table_json, "rb") as fp:
+            data = orjson.loads(fp.read())
+
+        executemany_time = measure(region, table, data, insert_executemany)
+        copy_time = measure(region, table, data, load_shadow_table)
+        total_executemany += executemany_time
+        total_copy += copy_time
+
+        print(
+            f"{table.name:>36} {len(data):>8} {executemany_time:>11.3f}s "
+            f"{copy_time:>7.3f}s {executemany_time / copy_time:>7.1f}x"
+        )
+
+    print(
+        f"{'total':>36} {'':>8} {total_executemany:>11.3f}s {total_copy:>7.3f}s "
+        f"{total_executemany / total_copy if total_copy else 0:>7.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare the time to load master tables with executemany "
+        "inserts and with COPY. Nothing is committed."
+    )
+    parser.add_argument("--region", "-r", type=Region, default=Region.NA)
+    parser.add_argument(
+        "--table", "-t", action="append", default=[], help="Master tables to test"
+    )
+
+    args = parser.parse_args()
+
+    main(args.region, args.table)
@@ -0,0 +1,74 @@
+import argparse
+import asyncio
+import time
+from typing import Any
+
+from sqlalchemy import event
+
+from app.core.raw import get_servant_entities_many, get_servant_entity
+from app.db.engine import async_engines
+from app.schemas.common import Region
+
+
+class QueryCounter:
+    def __init__(self) -> None:
+        self.count = 0
+
+    def __call__(self, *_: Any) -> None:
+        self.count += 1
+
+
+async def main(
+    region: Region, svt_ids: list[int], expand: bool, lore: bool, many: bool
+) -> None:
+    engine = async_engines[region]
+    counter = QueryCounter()
+    event.listen(engine.sync_engine, "before_cursor_execute", counter)
+
+    async with engine.connect() as conn:
+        # Warm up the connection and Postgres caches
+        await get_servant_entity(conn, svt_ids[0], expand, lore)
+
+        counter.count = 0
+        start_time = time.perf_counter()
+        if many:
+            await get_servant_entities_many(conn, svt_ids, expand, lore)
+        else:
+            for svt_id in svt_ids:
+                await get_servant_entity(conn, svt_id, expand, lore)
+        run_time = time.perf_counter() - start_time
+
+    function_name = "get_servant_entities_many" if many else "get_servant_entity"
+    print(
+        f"{region} {function_name} {expand=} {lore=}: "
+        f"{len(svt_ids)} servants, "
+        f"{counter.count / len(svt_ids):.1f} queries/servant, "
+        f"{run_time / len(svt_ids) * 1000:.2f}ms/servant"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Count queries and wall time per servant of loading servant entities."
+    )
+    parser.add_argument("--region", "-r", type=Region, default=Region.NA)
+    parser.add_argument(
+        "--svt-id",
+        "-s",
+        type=int,
+        action="append",
+        help="Servant IDs to load",
+        required=True,
+    )
+    parser.add_argument("--expand", "-e", action="store_true")
+    parser.add_argument("--lore", "-l", action="store_true")
+    parser.add_argument(
+        "--many",
+        "-m",
+        action="store_true",
+        help="Load all servants with one get_servant_entities_many call",
+    )
+
+    args = parser.parse_args()
+
+    asyncio.run(main(args.region, args.svt_id, args.expand, args.lore, args.many))
@@ -0,0 +1,48 @@
+import argparse
+import asyncio
+import time
+
+from app.core.raw import get_all_bgm_entities, get_shop_entities
+from app.db.engine import async_engines
+from app.db.helpers import fetch
+from app.schemas.common import Region
+from app.schemas.raw import MstShop
+
+
+async def main(region: Region, runs: int) -> None:
+    async with async_engines[region].connect() as conn:
+        shops = await fetch.get_everything(conn, MstShop)
+
+        # Warm up the connection and Postgres caches
+        await get_shop_entities(conn, shops)
+
+        start_time = time.perf_counter()
+        for _ in range(runs):
+            shop_entities = await get_shop_entities(conn, shops)
+        run_time = (time.perf_counter() - start_time) / runs
+        print(
+            f"{region} shops: {len(shop_entities)} entities, "
+            f"{run_time * 1000:.2f}ms/run"
+        )
+
+        await get_all_bgm_entities(conn)
+
+        start_time = time.perf_counter()
+        for _ in range(runs):
+            bgm_entities = await get_all_bgm_entities(conn)
+        run_time = (time.perf_counter() - start_time) / runs
+        print(
+            f"{region} BGMs: {len(bgm_entities)} entities, {run_time * 1000:.2f}ms/run"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure building the raw entities of all the shops and BGMs."
+    )
+    parser.add_argument("--region", "-r", type=Region, default=Region.JP)
+    parser.add_argument("--runs", "-n", type=int, default=5, help="Number of runs")
+
+    args = parser.parse_args()
+
+    asyncio.run(main(args.region, args.runs))
@@ -0,0 +1,69 @@
+import argparse
+import asyncio
+import time
+from typing import Any, Awaitable, Callable
+
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.db.engine import async_engines
+from app.db.helpers.skill import get_skillEntity
+from app.db.helpers.td import get_tdEntity
+from app.schemas.common import Region
+
+EntityGetter = Callable[[AsyncConnection, list[int], bool], Awaitable[Any]]
+
+
+async def measure(
+    conn: AsyncConnection, getter: EntityGetter, ids: list[int], expand: bool
+) -> tuple[float, int]:
+    # Warm up the connection and Postgres caches
+    await getter(conn, ids, expand)
+
+    start_time = time.perf_counter()
+    for entity_id in ids:
+        entities: list[BaseModel] = await getter(conn, [entity_id], expand)
+    run_time = time.perf_counter() - start_time
+
+    payload_size = 0
+    for entity_id in ids:
+        entities = await getter(conn, [entity_id], expand)
+        payload_size += sum(
+            len(entity.model_dump_json(exclude_none=True)) for entity in entities
+        )
+
+    return run_time / len(ids), payload_size // len(ids)
+
+
+async def main(region: Region, skill_ids: list[int], td_ids: list[int]) -> None:
+    async with async_engines[region].connect() as conn:
+        for name, getter, ids in (
+            ("skill", get_skillEntity, skill_ids),
+            ("NP", get_tdEntity, td_ids),
+        ):
+            if not ids:
+                continue
+            for expand in (True, False):
+                run_time, payload_size = await measure(conn, getter, ids, expand)
+                print(
+                    f"{region} {name} {expand=}: {len(ids)} entities, "
+                    f"{run_time * 1000:.2f}ms/entity, {payload_size:,} bytes/entity"
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare the latency and payload size of raw skill and NP "
+        "entities with and without the expanded functions."
+    )
+    parser.add_argument("--region", "-r", type=Region, default=Region.NA)
+    parser.add_argument(
+        "--skill-id", "-s", type=int, action="append", default=[], help="Skill IDs"
+    )
+    parser.add_argument(
+        "--td-id", "-t", type=int, action="append", default=[], help="NP IDs"
+    )
+
+    args = parser.parse_args()
+
+    asyncio.run(main(args.region, args.skill_id, args.td_id))
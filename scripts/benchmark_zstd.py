@@ -0,0 +1,106 @@
+import argparse
+import time
+from pathlib import Path
+from typing import Callable
+
+import orjson
+import zstandard
+
+from app.data.utils import MasterDataStore
+from app.redis.load import reverse_data_detail
+from app.zstd import train_zstd_dict, zstd_compress, zstd_decompress
+
+
+def measure(func: Callable[[bytes], bytes], samples: list[bytes]) -> tuple[float, int]:
+    """Return the throughput in MB/s of the input and the total output size"""
+    start_time = time.perf_counter()
+    output_size = sum(len(func(sample)) for sample in samples)
+    run_time = time.perf_counter() - start_time
+    input_size = sum(len(sample) for sample in samples)
+    return input_size / run_time / 1_000_000 if run_time else 0.0, output_size
+
+
+def compress_new_context(sample: bytes) -> bytes:
+    return zstandard.ZstdCompressor().compress(sample)
+
+
+def decompress_new_context(sample: bytes) -> bytes:
+    return zstandard.ZstdDecompressor().decompress(sample)
+
+
+def benchmark_family(family: str, samples: list[bytes], dict_size: int) -> None:
+    input_size = sum(len(sample) for sample in samples)
+    if not input_size:
+        return
+
+    dict_id = train_zstd_dict(samples, dict_size) or 0
+    compressed = [zstd_compress(sample) for sample in samples]
+    dict_compressed = [zstd_compress(sample, dict_id) for sample in samples]
+
+    results = {
+        "new context": (
+            measure(compress_new_context, samples),
+            measure(decompress_new_context, compressed)[0],
+        ),
+        "reused context": (
+            measure(zstd_compress, samples),
+            measure(zstd_decompress, compressed)[0],
+        ),
+    }
+    if dict_id:
+        results["dictionary"] = (
+            measure(lambda sample: zstd_compress(sample, dict_id), samples),
+            measure(zstd_decompress, dict_compressed)[0],
+        )
+
+    print(f"{family}: {len(samples)} values, {input_size:,} bytes")
+    for name, ((encode_speed, output_size), decode_speed) in results.items():
+        print(
+            f"  {name:>14}: ratio {input_size / output_size:.2f}, "
+            f"encode {encode_speed:.1f}MB/s, decode {decode_speed:.1f}MB/s"
+        )
+
+
+def main(gamedata: Path, dict_size: int, tables: list[str], reverse: bool) -> None:
+    for table_json in sorted((gamedata / "master").glob("*.json")):
+        if tables and table_json.stem not in tables:
+            continue
+        with open(table_json, "rb") as fp:
+            master_data = orjson.loads(fp.read())
+        samples = [orjson.dumps(item) for item in master_data]
+        benchmark_family(table_json.stem, samples, dict_size)
+
+    if reverse:
+        reverse_master_data = MasterDataStore(gamedata)
+        for data in reverse_data_detail:
+            reverse_data = data.dataFunc(reverse_master_data)
+            samples = [orjson.dumps(v) for v in reverse_data.values()]
+            benchmark_family(data.key.name, samples, dict_size)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare zstd compression ratio and throughput of Redis values "
+        "with a new context per call, reused contexts and trained dictionaries."
+    )
+    parser.add_argument(
+        "--gamedata",
+        "-g",
+        type=Path,
+        default=Path(__file__).resolve().parents[1] / "tests" / "test_data_gamedata",
+        help="Gamedata folder with a master folder",
+    )
+    parser.add_argument("--dict-size", "-d", type=int, default=16384)
+    parser.add_argument(
+        "--table", "-t", action="append", default=[], help="Master tables to test"
+    )
+    parser.add_argument(
+        "--reverse",
+        "-r",
+        action="store_true",
+        help="Also test the reverse lists. Needs a full gamedata folder.",
+    )
+
+    args = parser.parse_args()
+
+    main(args.gamedata, args.dict_size, args.table, args.reverse)
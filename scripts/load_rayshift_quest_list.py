@@ -1,5 +1,7 @@
 import argparse
+import asyncio
 import time
+from pathlib import Path
 
 import httpx
 
@@ -9,17 +11,45 @@ from app.db.load import (
     load_rayshift_quest_details,
     load_rayshift_quest_list,
 )
-from app.rayshift.quest import get_all_quest_lists, get_multiple_quests
+from app.rayshift.importer import ImportCheckpoint, TokenBucket, import_quest_details
+from app.rayshift.quest import get_all_quest_lists
 from app.schemas.common import Region
 
 
+async def load_quest_details(
+    region: Region,
+    query_ids: list[int],
+    bucket: TokenBucket,
+    checkpoint: ImportCheckpoint | None,
+    fetch_workers: int,
+    queue_size: int,
+) -> None:
+    async with httpx.AsyncClient(follow_redirects=True, timeout=60) as client:
+        await import_quest_details(
+            client,
+            region,
+            query_ids,
+            load_rayshift_quest_details,
+            bucket,
+            checkpoint,
+            fetch_workers=fetch_workers,
+            queue_size=queue_size,
+        )
+
+
 def main(
     quest_ids: list[int],
     load_all: bool = False,
     no_load: bool = False,
     selected_region: str | None = None,
+    rate: float = 1.0,
+    burst: float = 1.0,
+    fetch_workers: int = 4,
+    queue_size: int = 8,
+    checkpoint_path: Path | None = None,
 ) -> None:
     client = httpx.Client(follow_redirects=True, timeout=60)
+    checkpoint = ImportCheckpoint(checkpoint_path) if checkpoint_path else None
     for region in [Region.NA, Region.JP]:
         if selected_region and region != selected_region:
             continue
@@ -49,19 +79,16 @@ def main(
         print(f"Loading {len(query_ids)} query IDs")
 
         if query_ids:
-            QUERY_IDS_PER_REQUEST = 25
-            for i in range(0, len(query_ids), QUERY_IDS_PER_REQUEST):
-                start_req_time = time.perf_counter()
-                request_query_ids = query_ids[i : i + QUERY_IDS_PER_REQUEST]
-                quest_details = get_multiple_quests(client, region, request_query_ids)
-                if quest_details:
-                    load_rayshift_quest_details(region, quest_details)
-                    load_req_time = round((time.perf_counter() - start_req_time) * 1000)
-                    print(
-                        f"Loaded {min(i + QUERY_IDS_PER_REQUEST, len(query_ids))} query IDs in {load_req_time}ms"
-                    )
-                else:
-                    print(f"Failed to fetch query IDs: {request_query_ids}")
+            asyncio.run(
+                load_quest_details(
+                    region,
+                    query_ids,
+                    TokenBucket(rate, burst),
+                    checkpoint,
+                    fetch_workers,
+                    queue_size,
+                )
+            )
 
         rayshift_load_time = time.perf_counter() - start_loading_time
         print(f"Loaded {region} rayshift in {rayshift_load_time:.2f}s.")
@@ -91,7 +118,38 @@ if __name__ == "__main__":
     parser.add_argument(
         "--region", "-r", help="Region", type=str, required=False, default=None
     )
+    parser.add_argument(
+        "--rate", type=float, default=1.0, help="Rayshift API requests per second"
+    )
+    parser.add_argument(
+        "--burst", type=float, default=1.0, help="Requests allowed in a burst"
+    )
+    parser.add_argument(
+        "--fetch-workers", type=int, default=4, help="Concurrent API requests"
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=8,
+        help="Fetched batches waiting to be inserted before fetching pauses",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        type=Path,
+        default=None,
+        help="JSON file with the last imported query ID to resume from",
+    )
 
     args = parser.parse_args()
 
-    main(args.quest_id, args.all, args.no_load, args.region)
+    main(
+        args.quest_id,
+        args.all,
+        args.no_load,
+        args.region,
+        args.rate,
+        args.burst,
+        args.fetch_workers,
+        args.queue_size,
+        args.checkpoint,
+    )
@@ -1,11 +1,42 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 
+import orjson
 import pytest
+from _pytest.monkeypatch import MonkeyPatch
 from httpx import AsyncClient
 from redis.asyncio import Redis
 
 from app.core.basic import get_basic_svt
+from app.redis.cache import (
+    CachedRequest,
+    CacheHits,
+    CacheVersions,
+    SingleFlightRedisBackend,
+    get_cache_hits_key,
+    get_top_cached_requests,
+    single_flight_scope,
+)
+from app.redis.helpers import zstd_dict
+from app.redis.helpers.lru_cache import MISSING, RedisLRUCache
+from app.redis.helpers.repo_version import (
+    get_cache_version,
+    get_cache_version_key,
+    set_cache_version,
+)
+from app.redis.helpers.reverse import (
+    RedisReverse,
+    get_reverse_ids,
+    get_reverse_ids_many,
+)
+from app.redis.helpers.zstd_dict import (
+    get_zstd_dict_family_redis_key,
+    get_zstd_dict_redis_key,
+)
+from app.redis.load import load_redis_hash
 from app.schemas.common import Region
+from app.zstd import zstd_decompress, zstd_dicts
 
 from .utils import get_response_data
 
@@ -147,6 +178,157 @@ class TestBasicSpecial:
             )
             assert basic_svt["face"].endswith(case.face_suffix)
 
+    async def test_redis_lru_cache(self, redis: "Redis[bytes]") -> None:
+        cache = RedisLRUCache(2)
+        assert await cache.get(redis, Region.NA, 1) is MISSING
+        cache.set(Region.NA, 1, "a")
+        cache.set(Region.NA, 2, "b")
+        assert await cache.get(redis, Region.NA, 1) == "a"
+        cache.set(Region.NA, 3, "c")
+        assert await cache.get(redis, Region.NA, 2) is MISSING
+        assert cache.get_stats() == {
+            "size": 2,
+            "maxsize": 2,
+            "hits": 1,
+            "misses": 2,
+            "hit_ratio": 1 / 3,
+            "evictions": 1,
+        }
+
+    async def test_single_flight_cache(self, redis: "Redis[bytes]") -> None:
+        key = "fgoapi:test:single_flight"
+        await redis.delete(key, f"{key}:lock")
+        workers = [SingleFlightRedisBackend(redis, 5) for _ in range(2)]
+        computes = 0
+
+        async def get_value(backend: SingleFlightRedisBackend) -> bytes:
+            nonlocal computes
+            with single_flight_scope() as keys:
+                try:
+                    _, cached = await backend.get_with_ttl(key)
+                    if cached is not None:
+                        return cached
+                    computes += 1
+                    await asyncio.sleep(0.2)
+                    await backend.set(key, b"value", 60)
+                    return b"value"
+                finally:
+                    for flight_key in keys:
+                        await backend.release(flight_key)
+
+        results = await asyncio.gather(*(get_value(workers[i % 2]) for i in range(10)))
+        assert results == [b"value"] * 10
+        assert computes == 1
+        assert not any(worker.flights for worker in workers)
+        assert not await redis.exists(f"{key}:lock")
+        await redis.delete(key)
+
+    async def test_cache_hits(self, redis: "Redis[bytes]") -> None:
+        await redis.delete(get_cache_hits_key(Region.NA.value))
+        cache_hits = CacheHits(redis, 1)
+        for _ in range(2):
+            cache_hits.record(Region.NA.value, "key:1", "/nice/NA/servant/1")
+        cache_hits.record(Region.NA.value, "key:2", "/nice/NA/servant/2?lang=en")
+        await cache_hits.flush()
+
+        assert await get_top_cached_requests(redis, Region.NA, 2) == [
+            CachedRequest("key:1", "/nice/NA/servant/1"),
+            CachedRequest("key:2", "/nice/NA/servant/2?lang=en"),
+        ]
+        await redis.delete(get_cache_hits_key(Region.NA.value))
+
+    async def test_cache_versions(self, redis: "Redis[bytes]") -> None:
+        cache_versions = CacheVersions()
+        old_version = await cache_versions.get(redis, Region.NA)
+        assert old_version == await get_cache_version(redis, Region.NA)
+
+        # The other tests keep using the cache namespace of the current version
+        version_key = get_cache_version_key(Region.NA)
+        stored_version = await redis.get(version_key)
+        try:
+            new_version = await set_cache_version(redis, Region.NA)
+            # The version is only re-read after redis_lru_version_check_interval
+            assert await cache_versions.get(redis, Region.NA) == old_version
+            cache_versions.set(Region.NA, new_version)
+            assert await cache_versions.get(redis, Region.NA) == new_version
+
+            # A pinned version isn't re-read even after the check interval
+            cache_versions.set(Region.NA, "warming", pin=True)
+            cache_versions.versions[Region.NA] = ("warming", 0.0)
+            assert await cache_versions.get(redis, Region.NA) == "warming"
+            cache_versions.set(Region.NA, "warming")
+            cache_versions.versions[Region.NA] = ("warming", 0.0)
+            assert await cache_versions.get(redis, Region.NA) == new_version
+        finally:
+            if stored_version is None:
+                await redis.delete(version_key)
+            else:
+                await redis.set(version_key, stored_version)
+
+    async def test_load_redis_hash(self, redis: "Redis[bytes]") -> None:
+        redis_key = "test:load_redis_hash"
+        await redis.hset(redis_key, mapping={"0": b"old", "1": b"old"})
+        json_data = {str(i): f"[{i}]".encode() for i in range(2500)}
+
+        with ThreadPoolExecutor(2) as executor:
+            await load_redis_hash(
+                redis, Region.NA, "test", redis_key, json_data, executor
+            )
+
+        stored = await redis.hgetall(redis_key)
+        assert {
+            field.decode(): zstd_decompress(value) for field, value in stored.items()
+        } == json_data
+        assert not await redis.exists(f"{redis_key}:loading")
+
+        await load_redis_hash(redis, Region.NA, "test", redis_key, {})
+        assert not await redis.exists(redis_key)
+
+    async def test_load_redis_hash_zstd_dict(
+        self, redis: "Redis[bytes]", monkeypatch: MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(zstd_dict.settings, "redis_zstd_dict_size", 4096)
+        redis_key = "test:load_redis_hash_zstd_dict"
+        family = "testZstdDict"
+        dict_key = get_zstd_dict_redis_key(Region.NA)
+        family_key = get_zstd_dict_family_redis_key(Region.NA)
+
+        dict_ids: list[int] = []
+        for name in ("Skill", "Servant"):
+            json_data = {
+                str(i): orjson.dumps({"id": i, "name": f"{name} {i}", "vals": [i]})
+                for i in range(1000)
+            }
+            await load_redis_hash(redis, Region.NA, family, redis_key, json_data)
+            dict_id = int(await redis.hget(family_key, family) or 0)
+            assert await redis.hexists(dict_key, str(dict_id))
+            stored = await redis.hget(redis_key, "1") or b""
+            assert zstd_decompress(stored) == json_data["1"]
+            dict_ids.append(dict_id)
+
+        # The first dictionary is only removed once the values are swapped
+        assert dict_ids[0] != dict_ids[1]
+        assert not await redis.hexists(dict_key, str(dict_ids[0]))
+        assert dict_ids[0] not in zstd_dicts
+
+        await redis.delete(redis_key)
+        await redis.hdel(family_key, family)
+        await redis.hdel(dict_key, str(dict_ids[1]))
+
+    async def test_reverse_ids_many(self, redis: "Redis[bytes]") -> None:
+        buff_ids = [101, 202, -1]
+        reverse_ids = await get_reverse_ids_many(
+            redis, Region.NA, RedisReverse.BUFF_TO_FUNC, buff_ids
+        )
+        assert reverse_ids[101]
+        assert reverse_ids[-1] == []
+        assert reverse_ids == {
+            buff_id: await get_reverse_ids(
+                redis, Region.NA, RedisReverse.BUFF_TO_FUNC, buff_id
+            )
+            for buff_id in buff_ids
+        }
+
     async def test_NA_not_integer(self, client: AsyncClient) -> None:
         response = await client.get("/basic/NA/servant/lkji")
         assert response.status_code == 422
@@ -1,18 +1,20 @@
 from app.data.event import get_event_with_warIds
 from app.data.gift import get_gift_with_index
 from app.data.item import get_item_with_use
+from app.data.utils import MasterDataStore
+from app.schemas.raw import MstItem
 
 from .utils import test_gamedata
 
 
 def test_append_warIds_to_event() -> None:
-    eventWar = get_event_with_warIds(test_gamedata)
+    eventWar = get_event_with_warIds(MasterDataStore(test_gamedata))
     oniland = next(event for event in eventWar.mstEvents if event.id == 80119)
     assert oniland.warIds == [9050]
 
 
 def test_append_use_to_item() -> None:
-    mstItems = get_item_with_use(test_gamedata)
+    mstItems = get_item_with_use(MasterDataStore(test_gamedata))
 
     claw = next(item for item in mstItems if item.id == 6507)
     assert claw.useSkill is True
@@ -31,6 +33,19 @@ def test_append_use_to_item() -> None:
 
 
 def test_gift_import() -> None:
-    mstGift = get_gift_with_index(test_gamedata)
+    mstGift = get_gift_with_index(MasterDataStore(test_gamedata))
 
     assert [gift.sort_id for gift in mstGift[:3]] == [0, 1, 0]
+
+
+def test_master_data_store() -> None:
+    master_data = MasterDataStore(test_gamedata)
+
+    assert master_data.get(MstItem) is master_data.get(MstItem)
+    assert master_data.load(MstItem) is not master_data.get(MstItem)
+    assert master_data.get_raw("mstItem")[0]["id"] == master_data.get(MstItem)[0].id
+    assert master_data.get_raw("mstUnknownTable") == []
+
+    assert master_data.get_derived(get_item_with_use) is master_data.get_derived(
+        get_item_with_use
+    )
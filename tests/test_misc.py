@@ -1,20 +1,77 @@
 from decimal import Decimal
+from pathlib import Path
+from typing import Any
 
+import httpx
 import orjson
 import pytest
 from fastapi import HTTPException
+from sqlalchemy import Table
 from sqlalchemy.ext.asyncio import AsyncConnection
-
-from app.core.nice.func import parse_dataVals
-from app.core.utils import get_voice_name
+from sqlalchemy.sql.util import find_tables
+
+from app.core.name_index import NameIndex
+from app.core.nice.func import parse_dataVals, parse_raw_dataVals
+from app.core.raw import get_related_ais
+from app.core.rayshift import DROP_STATS_QUERY_ID_FROM, get_rayshift_min_query_id
+from app.core.search import match_name
+from app.core.utils import RowIndex, get_voice_name
 from app.data.custom_mappings import Translation
 from app.data.script import get_script_path, get_script_text_only, remove_brackets
-from app.db.load import get_SkillID_from_sval, get_Value_from_sval
+from app.db.helpers.rayshift import get_rayshift_run_rows
+from app.db.helpers.skill import select_skill_entity
+from app.db.helpers.svt import select_svt_entity_tables
+from app.db.helpers.td import select_td_entity
+from app.db.load import (
+    FuncExpander,
+    FuncRows,
+    get_copy_rows,
+    get_SkillID_from_sval,
+    get_source_hash,
+    get_Value_from_sval,
+    read_script,
+)
+from app.export.dependencies import (
+    ExportGroup,
+    get_changed_export_groups,
+    get_table_export_groups,
+)
+from app.models.raw import mstBuff, mstConstant
+from app.rayshift.importer import (
+    ImportCheckpoint,
+    RayshiftRateLimitError,
+    TokenBucket,
+    fetch_quest_details,
+    import_quest_details,
+)
+from app.rayshift.quest import DEFAULT_WAIT_SEC
 from app.routers.utils import list_string_exclude
 from app.schemas.common import Language, Region, ReverseDepth
-from app.schemas.gameenums import FuncType
+from app.schemas.gameenums import BuffType, FuncType
 from app.schemas.nice import NiceServant
-from app.schemas.raw import ScriptJsonInfo, get_subtitle_svtId
+from app.schemas.raw import (
+    AiCollection,
+    AiEntity,
+    MstBuff,
+    MstSvt,
+    ScriptJsonInfo,
+    get_subtitle_svtId,
+)
+from app.schemas.rayshift import QuestDetail
+from app.tasks import (
+    SvtExportCache,
+    get_depend_func_ids,
+    prune_svt_export_cache,
+    read_svt_export_cache,
+    write_svt_export_cache,
+)
+from app.zstd import (
+    ZstdDictNotFoundError,
+    train_zstd_dict,
+    zstd_compress,
+    zstd_decompress,
+    zstd_dicts,
+)
 
 from .utils import get_response_data, get_text_data
 
@@ -87,6 +144,20 @@ async def test_parse_datavals_fail_list_str(
         await parse_dataVals(na_db_conn, Region.NA, dataVals, 1, Language.en)
 
 
+def test_parse_raw_dataVals_cached() -> None:
+    dataVals = "[5000,DependFuncId1:[474],DependFuncVals1:[1000,3,3,300]]"
+    result = parse_raw_dataVals(dataVals, FuncType.GAIN_NP)
+    assert result == {
+        "Rate": 5000,
+        "DependFuncId": 474,
+        "DependFuncVals": "[1000,3,3,300]",
+    }
+
+    hits = parse_raw_dataVals.cache_info().hits
+    assert parse_raw_dataVals(dataVals, FuncType.GAIN_NP) is result
+    assert parse_raw_dataVals.cache_info().hits == hits + 1
+
+
 def test_reverseDepth_str_comparison() -> None:
     assert ReverseDepth.function >= "aaaaa"
 
@@ -116,6 +187,16 @@ def test_voice_lang_en() -> None:
     )
 
 
+def test_row_index_source_order() -> None:
+    rows = [(3, "a"), (1, "b"), (3, "c"), (2, "d"), (1, "e")]
+    index = RowIndex(rows, lambda row: row[0])
+
+    assert index.get(3) == [(3, "a"), (3, "c")]
+    assert index.get(4) == []
+    for keys in ([1, 3], [3, 1, 1], [4, 2, 1]):
+        assert index.get_all(keys) == [row for row in rows if row[0] in keys]
+
+
 def test_get_script_path() -> None:
     assert get_script_path("WarEpilogue108") == "01/WarEpilogue108"
 
@@ -155,3 +236,443 @@ def test_get_SkillID_from_sval() -> None:
         )
         == 961313
     )
+
+
+def test_zstd_dict() -> None:
+    samples = [
+        orjson.dumps({"id": i, "name": f"Skill {i}", "vals": [i, i * 2, i * 3]})
+        for i in range(1000)
+    ]
+    dict_id = train_zstd_dict(samples, 4096)
+    assert dict_id is not None
+
+    dict_compressed = zstd_compress(samples[0], dict_id)
+    assert len(dict_compressed) < len(zstd_compress(samples[0]))
+    assert zstd_decompress(dict_compressed) == samples[0]
+    assert zstd_decompress(samples[0]) == samples[0]
+
+    zstd_dict = zstd_dicts.pop(dict_id)
+    with pytest.raises(ZstdDictNotFoundError):
+        zstd_decompress(dict_compressed)
+    zstd_dicts[dict_id] = zstd_dict
+
+    assert train_zstd_dict(samples[:10], 4096) is None
+
+
+def test_changed_export_groups() -> None:
+    assert get_changed_export_groups([]) == set()
+    assert (
+        get_changed_export_groups(
+            ["gamedatatop.json", "ScriptActionEncrypt/01/0100000010.txt"]
+        )
+        == set()
+    )
+
+    svt_groups = get_changed_export_groups(["master/mstSvtLimit.json"])
+    assert svt_groups is not None
+    assert ExportGroup.SVT in svt_groups
+    assert ExportGroup.WAR not in svt_groups
+
+    event_groups = get_changed_export_groups(["master/mstEventReward.json"])
+    assert event_groups is not None
+    assert {ExportGroup.EVENT, ExportGroup.SVT} <= event_groups
+
+    assert get_changed_export_groups(["master/mstUnknownTable.json"]) is None
+    assert get_changed_export_groups(["unknown.json"]) is None
+
+
+def test_servant_entity_tables_in_svt_export_group() -> None:
+    stmts = [
+        select_svt_entity_tables([1], lore=True),
+        select_skill_entity([1], expand=True),
+        select_td_entity([1], expand=True),
+    ]
+    tables = {
+        table.name
+        for stmt in stmts
+        for table in find_tables(stmt, include_joins=True, include_aliases=True)
+        if isinstance(table, Table)
+    }
+    # Tables fetched separately by get_servant_entities_many
+    tables |= {
+        "mstSvtScript",
+        "mstItem",
+        "mstCommonRelease",
+        "mstSvtVoice",
+        "mstSvtVoiceRelation",
+        "mstVoice",
+        "mstVoicePlayCond",
+        "mstSubtitle",
+        "mstSvtGroup",
+    }
+    assert {"mstSvt", "mstBattlePointPhase", "mstSkillLv", "mstAiAct"} <= tables
+
+    for table in tables:
+        assert ExportGroup.SVT in get_table_export_groups(table), table
+
+
+def test_get_depend_func_ids() -> None:
+    nice_data = {
+        "skills": [
+            {"functions": [{"svals": [{"DependFunc": {"funcId": 1}}, {"Value": 1}]}]}
+        ],
+        "noblePhantasms": [
+            {"functions": [{"svals2": [{"DependFunc": {"funcId": 2}}]}]}
+        ],
+    }
+    assert get_depend_func_ids(nice_data) == {1, 2}
+    assert get_depend_func_ids({"skills": []}) == set()
+
+
+def test_prune_svt_export_cache(tmp_path: Path) -> None:
+    cache = SvtExportCache("hash", [1], ["{}"])
+    for svt_id in (100100, 100200):
+        write_svt_export_cache(tmp_path / f"{svt_id}.json", cache)
+
+    prune_svt_export_cache(tmp_path, [MstSvt.model_construct(id=100100)])
+
+    assert read_svt_export_cache(tmp_path / "100100.json") == cache
+    assert read_svt_export_cache(tmp_path / "100200.json") is None
+
+
+def test_get_source_hash(tmp_path: Path) -> None:
+    (tmp_path / "master").mkdir()
+    (tmp_path / "master" / "mstA.json").write_bytes(b"[]")
+    (tmp_path / "scripts").mkdir()
+    (tmp_path / "scripts" / "0100.txt").write_text("script")
+
+    sources = ["master/mstA.json", "master/mstB.json", "scripts"]
+    source_hash = get_source_hash(tmp_path, sources)
+    assert get_source_hash(tmp_path, sources) == source_hash
+
+    (tmp_path / "master" / "mstB.json").write_bytes(b"[]")
+    new_file_hash = get_source_hash(tmp_path, sources)
+    assert new_file_hash != source_hash
+
+    (tmp_path / "scripts" / "0100.txt").write_text("changed")
+    assert get_source_hash(tmp_path, sources) != new_file_hash
+
+
+def test_read_script(tmp_path: Path) -> None:
+    script_path = tmp_path / "0100000010.txt"
+    script_path.write_text("＠talker\n[&male1:female1]\n[k]", encoding="utf-8")
+    assert read_script(Region.NA, script_path) == (
+        "＠talker\n[&male1:female1]\n[k]",
+        "(talker) (Male) male1 (Female) female1",
+    )
+    assert read_script(Region.NA, tmp_path / "missing.txt") == ("", "")
+
+
+def test_func_expander() -> None:
+    buff = MstBuff(
+        vals=[],
+        tvals=[],
+        ckSelfIndv=[],
+        ckOpIndv=[],
+        script={},
+        id=10,
+        buffGroup=0,
+        type=BuffType.DEAD_FUNCTION,
+        name="",
+        detail="",
+        iconId=0,
+        maxRate=0,
+    )
+    funcs = {
+        1: {"id": 1, "funcType": FuncType.ADD_STATE, "vals": [10]},
+        2: {"id": 2, "funcType": FuncType.SUB_STATE, "vals": [10]},
+    }
+    func_expander = FuncExpander(funcs, {1: [{"funcId": 1}]}, {10: buff})
+
+    rows = [
+        {"funcId": [1, 2, 3], "svals": ["[1000,3,-1,900]", "[]", "[]"]},
+        {"funcId": [1], "svals": ["[1000,3,-1,901]"]},
+    ]
+    expanded = func_expander.expand_rows(FuncRows(rows))
+    assert func_expander.get_func_entity(1) is func_expander.get_func_entity(1)
+    assert "expandedVals" not in funcs[1]
+
+    assert orjson.loads(expanded[0]["expandedFuncId"]) == [
+        {
+            "mstFunc": {**funcs[1], "expandedVals": [{"mstBuff": buff.model_dump()}]},
+            "mstFuncGroup": [{"funcId": 1}],
+        },
+        {"mstFunc": {**funcs[2], "expandedVals": []}, "mstFuncGroup": []},
+    ]
+    assert expanded[0]["relatedSkillIds"] == [900]
+    assert expanded[1]["relatedSkillIds"] == [901]
+
+    overwrites = func_expander.expand_rows(
+        FuncRows([{"funcIds": [2]}], "funcIds", related_skills=False)
+    )
+    assert "relatedSkillIds" not in overwrites[0]
+
+
+def test_get_copy_rows() -> None:
+    assert list(get_copy_rows(mstConstant, [{"name": "A", "value": 1, "x": 2}])) == [
+        ("A", 1, 0)
+    ]
+
+    buff_row = next(get_copy_rows(mstBuff, [{"id": 1, "vals": [], "script": {}}]))
+    assert buff_row[0] == []
+    assert buff_row[4].obj == {}
+    assert buff_row[5] == 1
+
+
+def test_name_index() -> None:
+    items = [
+        (1, ["アルトリア・ペンドラゴン", "Altria Pendragon"]),
+        (2, ["アルトリア・ペンドラゴン〔オルタ〕", "Altria Pendragon (Alter)"]),
+        (3, ["沖田総司〔オルタ〕", "Okita Souji (Alter)"]),
+        (4, ["カレイドスコープ", "Kaleidoscope"]),
+        (5, ["魔眼", "Mystic Eyes of Distortion EX"]),
+        (6, ["", "Mystic Eyes"]),
+    ]
+    name_index = NameIndex(items)
+
+    for search_name in (
+        "Artoria",
+        "Pendragon Alter",
+        "Okita Souji (Alter)",
+        "scope",
+        "Kaleidoskope",
+        "Mystic Eyes",
+        "Eyes Mystic of",
+        "オルタ",
+        "a",
+        "      ",
+    ):
+        assert name_index.search(search_name) == {
+            item_id
+            for item_id, names in items
+            if any(match_name(search_name, name) for name in names if name)
+        }
+
+
+def test_rayshift_min_query_id_in_drop_stats() -> None:
+    assert get_rayshift_min_query_id(Region.NA, 2, 300) == 1062363
+    assert get_rayshift_min_query_id(Region.JP, 5, 1002) == 499538
+    assert get_rayshift_min_query_id(Region.JP, 5, 8000) is None
+    assert get_rayshift_min_query_id(Region.CN, 1, 100) is None
+
+    # The drop stats can only answer min query IDs that start a stats range
+    for region in Region:
+        for quest_type, war_id in ((1, 100), (5, 1002)):
+            min_query_id = get_rayshift_min_query_id(region, quest_type, war_id)
+            assert min_query_id is None or min_query_id in DROP_STATS_QUERY_ID_FROM
+
+
+def test_get_rayshift_run_rows() -> None:
+    drop = {"type": 1, "objectId": 6503, "originalNum": 1}
+    quest_detail = {
+        "questSelect": 2,
+        "stageCutins": [
+            {"wave": 1, "skillId": 960840, "dropInfos": [drop, drop]},
+            {"wave": 3, "skillId": 960841, "dropInfos": []},
+        ],
+    }
+    run_rows = get_rayshift_run_rows(
+        [
+            {
+                "queryId": 10,
+                "questId": 94000101,
+                "phase": 1,
+                "questDetail": quest_detail,
+            },
+            {
+                "queryId": 11,
+                "questId": 94000101,
+                "phase": 1,
+                "questDetail": {"questSelect": 0},
+            },
+        ]
+    )
+
+    assert [
+        (run["queryId"], run["questSelect"], run["stageCutinCount"])
+        for run in run_rows.runs
+    ] == [
+        (10, 2, 2),
+        (11, 0, 0),
+    ]
+    assert [(cutin["stage"], cutin["skillId"]) for cutin in run_rows.stage_cutins] == [
+        (1, 960840),
+        (3, 960841),
+    ]
+    assert run_rows.cutin_drops == [
+        {
+            "queryId": 10,
+            "stage": 1,
+            "type": 1,
+            "objectId": 6503,
+            "originalNum": 1,
+            "dropCount": 2,
+        }
+    ]
+
+
+def get_stub_quest_detail(query_id: int) -> dict[str, Any]:
+    empty_deck = {"svts": [], "followerType": 0, "stageId": 0}
+    return {
+        "battleId": query_id,
+        "addedTime": "2024-01-01T00:00:00Z",
+        "region": 2,
+        "questId": 94000101,
+        "questPhase": 1,
+        "questSelect": 0,
+        "eventId": 0,
+        "battleType": 0,
+        "enemyDeck": [],
+        "transformDeck": empty_deck,
+        "callDeck": [],
+        "shiftDeck": [],
+        "raidInfo": [],
+        "startRaidInfo": [],
+        "superBossInfo": [],
+        "userSvt": [],
+    }
+
+
+@pytest.mark.asyncio
+async def test_import_quest_details(tmp_path: Path) -> None:
+    requests: list[list[int]] = []
+
+    def stub_rayshift_api(request: httpx.Request) -> httpx.Response:
+        query_ids = [
+            int(query_id)
+            for query_id in request.url.params.get_list("ids")
+            or request.url.params.get_list("id")
+        ]
+        requests.append(query_ids)
+        if len(requests) == 2:
+            return httpx.Response(
+                429, json={"status": 429, "message": "Rate limited", "wait": 0}
+            )
+        return httpx.Response(
+            200,
+            json={
+                "status": 200,
+                "message": "OK",
+                "response": {
+                    "questDetails": {
+                        str(query_id): get_stub_quest_detail(query_id)
+                        for query_id in query_ids
+                        if query_id % 10 != 0
+                    }
+                },
+            },
+        )
+
+    inserted: dict[int, QuestDetail] = {}
+
+    def insert_quest_details(
+        region: Region, quest_details: dict[int, QuestDetail]
+    ) -> None:
+        assert region == Region.NA
+        inserted.update(quest_details)
+
+    checkpoint = ImportCheckpoint(tmp_path / "checkpoint.json")
+    query_ids = list(range(1, 61))
+    async with httpx.AsyncClient(
+        transport=httpx.MockTransport(stub_rayshift_api)
+    ) as client:
+        progress = await import_quest_details(
+            client,
+            Region.NA,
+            query_ids,
+            insert_quest_details,
+            TokenBucket(rate=1000, capacity=10),
+            checkpoint,
+            fetch_workers=2,
+            queue_size=1,
+            quest_endpoint="http://rayshift.test/quests",
+        )
+
+        # The rate limited batch is retried after the wait
+        assert len(requests) == 4
+        assert sorted(inserted) == [i for i in query_ids if i % 10 != 0]
+        assert progress.processed_runs == 60
+        assert progress.rate_limited == 1
+        assert ImportCheckpoint(tmp_path / "checkpoint.json").get(Region.NA) == 60
+
+        # Resuming from the checkpoint doesn't fetch anything again
+        progress = await import_quest_details(
+            client,
+            Region.NA,
+            [*query_ids, 61],
+            insert_quest_details,
+            TokenBucket(rate=1000, capacity=10),
+            checkpoint,
+            quest_endpoint="http://rayshift.test/quests",
+        )
+        assert requests[-1] == [61]
+        assert progress.processed_runs == 1
+
+
+async def test_import_quest_details_failed_batch(tmp_path: Path) -> None:
+    def stub_rayshift_api(request: httpx.Request) -> httpx.Response:
+        query_ids = [int(query_id) for query_id in request.url.params.get_list("ids")]
+        if 30 in query_ids:
+            return httpx.Response(503, text="Service Unavailable")
+        if 80 in query_ids:
+            return httpx.Response(429, text="Too Many Requests")
+        return httpx.Response(
+            200,
+            json={
+                "status": 200,
+                "message": "OK",
+                "response": {
+                    "questDetails": {
+                        str(query_id): get_stub_quest_detail(query_id)
+                        for query_id in query_ids
+                    }
+                },
+            },
+        )
+
+    inserted: dict[int, QuestDetail] = {}
+
+    def insert_quest_details(
+        region: Region, quest_details: dict[int, QuestDetail]
+    ) -> None:
+        assert region == Region.NA
+        inserted.update(quest_details)
+
+    checkpoint = ImportCheckpoint(tmp_path / "checkpoint.json")
+    endpoint = "http://rayshift.test/quests"
+    async with httpx.AsyncClient(
+        transport=httpx.MockTransport(stub_rayshift_api)
+    ) as client:
+        progress = await import_quest_details(
+            client,
+            Region.NA,
+            list(range(1, 76)),
+            insert_quest_details,
+            TokenBucket(rate=1000, capacity=10),
+            checkpoint,
+            fetch_workers=1,
+            quest_endpoint=endpoint,
+        )
+
+        # A 429 without a JSON body waits for the default time
+        with pytest.raises(RayshiftRateLimitError) as rate_limit:
+            await fetch_quest_details(client, Region.NA, [80, 81], endpoint)
+        assert rate_limit.value.wait == DEFAULT_WAIT_SEC
+
+    assert progress.failed_runs == 25
+    assert sorted(inserted) == [*range(1, 26), *range(51, 76)]
+    # The checkpoint stays before the failed batch even if later ones are done
+    assert ImportCheckpoint(tmp_path / "checkpoint.json").get(Region.NA) == 25
+
+
+def test_get_related_ais_cycle() -> None:
+    # 94032580 -> 94032581 -> 94032582 -> 94032580
+    ai_data = get_response_data("test_data_raw", "NA_AI_Beni_CQ_monkey")
+    for ai in ai_data["mainAis"] + ai_data["relatedAis"]:
+        ai["mstAiAct"].setdefault("script", {})
+    ai_collection = AiCollection.model_validate(ai_data)
+    ai_entities: dict[int, list[AiEntity]] = {}
+    for ai in ai_collection.mainAis + ai_collection.relatedAis:
+        ai_entities.setdefault(ai.mstAi.id, []).append(ai)
+
+    assert get_related_ais(ai_entities, 94032580) == ai_collection.relatedAis
@@ -251,6 +251,19 @@ class TestServantSpecial:
         assert response.status_code == 200
         assert any(voice["id"] == 600710 for voice in response.json()["mstSvtVoice"])
 
+    async def test_servant_search_same_as_single(self, client: AsyncClient) -> None:
+        response = await client.get(
+            "/raw/NA/servant/search?name=Pendragon&expand=true&lore=true"
+        )
+        assert response.status_code == 200
+        servants = response.json()
+        assert len(servants) > 1
+        for servant in servants:
+            single_response = await client.get(
+                f"/raw/NA/servant/{servant['mstSvt']['id']}?expand=true&lore=true"
+            )
+            assert servant == single_response.json()
+
     async def test_war_spots_from_multiple_maps(self, client: AsyncClient) -> None:
         response = await client.get("/raw/NA/war/9033")
         assert {spot["warId"] for spot in response.json()["mstSpot"]} == {9033, 9034}